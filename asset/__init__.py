@@ -1 +0,0 @@
-from asset import scheduler
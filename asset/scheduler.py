@@ -6,12 +6,13 @@ This module is used to register scheduled tasks
 
 from datetime import date, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from django.urls import reverse
 
+from horilla.horilla_scheduler import scheduled_job
 from notifications.signals import notify
 
 
+@scheduled_job("interval", hours=4)
 def notify_expiring_assets():
     """
     Finds all Expiring Assets and send a notification on the notify_before date.
@@ -45,6 +46,7 @@ def notify_expiring_assets():
                 )
 
 
+@scheduled_job("interval", hours=4)
 def notify_expiring_documents():
     """
     Finds all Expiring Documents and send a notification on the notify_before date.
@@ -81,9 +83,3 @@ def notify_expiring_documents():
                 )
             if today >= expiry_date:
                 document.is_active = False
-
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(notify_expiring_assets, "interval", hours=4)
-scheduler.add_job(notify_expiring_documents, "interval", hours=4)
-scheduler.start()
@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from attendance.models import Attendance, AttendanceDailySummary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError as error:
+        raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD") from error
+
+
+class Command(BaseCommand):
+    help = "Recompute the attendance daily summaries of a period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=parse_date,
+            help="First date to recompute, defaults to the first attendance",
+        )
+        parser.add_argument(
+            "--end",
+            type=parse_date,
+            help="Last date to recompute, defaults to the last attendance",
+        )
+
+    def handle(self, *args, **options):
+        period = Attendance._base_manager.aggregate(
+            start=Min("attendance_date"), end=Max("attendance_date")
+        )
+        start = options["start"] or period["start"] or date.today()
+        end = options["end"] or period["end"] or date.today()
+        if start > end:
+            raise CommandError("The start date is after the end date")
+
+        total = 0
+        # one month at a time, to keep the transactions short
+        while start <= end:
+            next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            month_end = min(next_month - timedelta(days=1), end)
+            total += len(AttendanceDailySummary.refresh(start, month_end))
+            self.stdout.write(f"{start} - {month_end} recomputed")
+            start = next_month
+        self.stdout.write(self.style.SUCCESS(f"{total} daily summaries written"))
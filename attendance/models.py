@@ -5,6 +5,7 @@ This module is used to register models for recruitment app
 
 """
 
+import calendar
 import contextlib
 import datetime as dt
 import json
@@ -12,9 +13,10 @@ from datetime import date, datetime, timedelta
 
 from django.apps import apps
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q
-from django.db.models.signals import post_save, pre_delete
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -30,10 +32,11 @@ from attendance.methods.utils import (
 )
 from base.horilla_company_manager import HorillaCompanyManager
 from base.methods import is_company_leave, is_holiday
-from base.models import Company, EmployeeShift, EmployeeShiftDay, Holidays, WorkType
-from employee.models import Employee
+from base.models import Company, Department, EmployeeShift, EmployeeShiftDay, WorkType
+from employee.models import Employee, EmployeeWorkInformation
 from horilla.methods import get_horilla_model_class
 from horilla.models import HorillaModel
+from horilla.signals import post_bulk_update, pre_bulk_update
 from horilla_audit.models import HorillaAuditInfo, HorillaAuditLog
 
 # Create your models here.
@@ -79,6 +82,30 @@ class AttendanceActivity(HorillaModel):
         ordering = ["-attendance_date", "employee_id__employee_first_name", "clock_in"]
 
 
+# Attendance values the monthly overtime account is computed from
+OVERTIME_ACCOUNT_FIELDS = (
+    "employee_id",
+    "attendance_date",
+    "minimum_hour",
+    "at_work_second",
+    "attendance_validated",
+    "approved_overtime_second",
+    "attendance_overtime_approve",
+)
+
+# Attendance fields counted in the daily summaries
+SUMMARY_FIELDS = {
+    "employee_id",
+    "employee_id_id",
+    "attendance_date",
+    "at_work_second",
+    "overtime_second",
+    "approved_overtime_second",
+    "attendance_validated",
+    "attendance_overtime_approve",
+}
+
+
 class Attendance(HorillaModel):
     """
     Attendance model
@@ -274,27 +301,22 @@ class Attendance(HorillaModel):
 
         self.at_work_second = strtime_seconds(self_at_work)
         self.overtime_second = strtime_seconds(self_overtime)
-        self.attendance_day = EmployeeShiftDay.objects.get(
-            day=self.attendance_date.strftime("%A").lower()
-        )
-        prev_attendance_approved = False
-
-        # Taking all holidays into a list
-        leaves = []
-        holidays = Holidays.objects.all()
-        for holi in holidays:
-            start_date = holi.start_date
-            end_date = holi.end_date
-
-            # Convert start_date and end_date to datetime objects
-            start_date = datetime.strptime(str(start_date), "%Y-%m-%d")
-            end_date = datetime.strptime(str(end_date), "%Y-%m-%d")
-
-            # Add dates in between start date and end date including both
-            current_date = start_date
-            while current_date <= end_date:
-                leaves.append(current_date.strftime("%Y-%m-%d"))
-                current_date += timedelta(days=1)
+        previous = None
+        if self.pk is not None:
+            # Previous values of the row, used to update the overtime account
+            previous = (
+                Attendance._base_manager.filter(pk=self.pk)
+                .values(*OVERTIME_ACCOUNT_FIELDS)
+                .first()
+            )
+        if (
+            self.attendance_day_id is None
+            or previous is None
+            or previous["attendance_date"] != self.attendance_date
+        ):
+            self.attendance_day = EmployeeShiftDay.objects.get(
+                day=self.attendance_date.strftime("%A").lower()
+            )
 
         # Checking attendance date is in holiday list,
         # if found making the minimum hour to 00:00
@@ -321,37 +343,28 @@ class Attendance(HorillaModel):
                 self.overtime_second = cutoff_seconds
                 self.attendance_overtime = format_time(cutoff_seconds)
 
-        if self.pk is not None:
-            # Get the previous values of the boolean field
-            prev_state = Attendance.objects.get(pk=self.pk)
-            prev_attendance_approved = prev_state.attendance_overtime_approve
-
-        super().save(*args, **kwargs)
-        self.first_save = False
-        employee_ot = self.employee_id.employee_overtime.filter(
-            month=self.attendance_date.strftime("%B").lower(),
-            year=self.attendance_date.strftime("%Y"),
+        prev_attendance_approved = (
+            previous["attendance_overtime_approve"] if previous else False
         )
-        if employee_ot.exists():
-            self.update_ot(employee_ot.first())
-        else:
-            self.create_ot()
-            self.update_ot(employee_ot.first())
         approved = self.attendance_overtime_approve
-        attendance_account = self.employee_id.employee_overtime.filter(
-            month=self.attendance_date.strftime("%B").lower(),
-            year=self.attendance_date.year,
-        ).first()
-        total_ot_seconds = attendance_account.overtime_second
         if approved and prev_attendance_approved is False:
             self.approved_overtime_second = self.overtime_second
-            total_ot_seconds = total_ot_seconds + self.approved_overtime_second
         elif not approved:
-            total_ot_seconds = total_ot_seconds - self.approved_overtime_second
             self.approved_overtime_second = 0
-        attendance_account.overtime = format_time(total_ot_seconds)
-        attendance_account.save()
+
         super().save(*args, **kwargs)
+        self.first_save = False
+        self.update_overtime_account(previous)
+        AttendanceDailySummary.refresh_employee(
+            self.employee_id_id, self.attendance_date
+        )
+        if previous and (
+            previous["employee_id"] != self.employee_id_id
+            or previous["attendance_date"] != self.attendance_date
+        ):
+            AttendanceDailySummary.refresh_employee(
+                previous["employee_id"], previous["attendance_date"]
+            )
 
     def serialize(self):
         """
@@ -382,80 +395,226 @@ class Attendance(HorillaModel):
             AttendanceActivity.objects.filter(
                 attendance_date=self.attendance_date, employee_id=self.employee_id
             ).delete()
-            employee_ot = self.employee_id.employee_overtime.filter(
-                month=self.attendance_date.strftime("%B").lower(),
-                year=self.attendance_date.strftime("%Y"),
-            )
-        if employee_ot.exists():
-            self.update_ot(employee_ot.first())
+        previous = (
+            Attendance._base_manager.filter(pk=self.pk)
+            .values(*OVERTIME_ACCOUNT_FIELDS)
+            .first()
+        )
         # Call the superclass delete() method to delete the object
         super().delete(*args, **kwargs)
 
         # Perform additional operations after deleting the object
+        if previous is not None:
+            self.apply_overtime_delta(
+                previous["employee_id"],
+                previous["attendance_date"],
+                *(-value for value in self.account_contribution(previous)),
+            )
 
-    def create_ot(self):
+    @staticmethod
+    def account_contribution(values):
         """
-        this method is used to create new AttendanceOvertime's instance if there
-        is no existing for a specific month and year
+        Seconds an attendance adds to the overtime account of its month
+
+        Args:
+            values (dict): attendance values of OVERTIME_ACCOUNT_FIELDS
+
+        Returns:
+            tuple: (worked seconds, required seconds, approved overtime seconds)
         """
-        employee_ot = AttendanceOverTime()
-        employee_ot.employee_id = self.employee_id
-        employee_ot.month = self.attendance_date.strftime("%B").lower()
-        employee_ot.year = self.attendance_date.year
-        if self.attendance_overtime_approve:
-            employee_ot.overtime = self.attendance_overtime
-        if self.attendance_validated:
-            employee_ot.hour_account = self.attendance_worked_hour
-        employee_ot.save()
-        return self
+        worked_second = required_second = 0
+        if values["attendance_validated"] and not Attendance.on_approved_leave(
+            values["employee_id"], values["attendance_date"]
+        ):
+            required_second = strtime_seconds(values["minimum_hour"])
+            worked_second = min(required_second, values["at_work_second"] or 0)
+        return worked_second, required_second, values["approved_overtime_second"]
+
+    @staticmethod
+    def on_approved_leave(employee_id, attendance_date):
+        """
+        Whether the employee has an approved leave on the attendance date
+        """
+        if not apps.is_installed("leave"):
+            return False
+        LeaveRequest = get_horilla_model_class(app_label="leave", model="leaverequest")
+        return LeaveRequest._base_manager.filter(
+            employee_id=employee_id,
+            start_date__lte=attendance_date,
+            end_date__gte=attendance_date,
+            status="approved",
+        ).exists()
+
+    def update_overtime_account(self, previous=None):
+        """
+        Move the contribution of the attendance in its month's overtime
+        account from the previous values of the row to the saved ones
+
+        Args:
+            previous (dict): values of OVERTIME_ACCOUNT_FIELDS before the save
+        """
+        current = {
+            field: getattr(self, field if field != "employee_id" else "employee_id_id")
+            for field in OVERTIME_ACCOUNT_FIELDS
+        }
+        contribution = self.account_contribution(current)
+        if previous is not None:
+            previous_contribution = self.account_contribution(previous)
+            same_month = previous["employee_id"] == current["employee_id"] and (
+                previous["attendance_date"].year,
+                previous["attendance_date"].month,
+            ) == (current["attendance_date"].year, current["attendance_date"].month)
+            if same_month:
+                contribution = [
+                    value - previous_value
+                    for value, previous_value in zip(
+                        contribution, previous_contribution
+                    )
+                ]
+            else:
+                self.apply_overtime_delta(
+                    previous["employee_id"],
+                    previous["attendance_date"],
+                    *(-value for value in previous_contribution),
+                )
+        self.apply_overtime_delta(
+            current["employee_id"], current["attendance_date"], *contribution
+        )
+
+    @staticmethod
+    def apply_overtime_delta(
+        employee_id, attendance_date, worked_second, required_second, overtime_second
+    ):
+        """
+        Add the seconds to the overtime account of the employee's month, the
+        account is created from the month's attendances if it does not exist
 
-    def update_ot(self, employee_ot):
+        The seconds are added by the database, the row stays locked by the
+        update until the end of the transaction, so concurrent saves do not
+        overwrite each other and the hours are written from the new totals.
         """
-        This method is used to update the overtime
+        if employee_id is None:
+            return
+        month = attendance_date.strftime("%B").lower()
+        accounts = AttendanceOverTime._base_manager.filter(
+            employee_id=employee_id, month=month, year=attendance_date.year
+        )
+        with transaction.atomic():
+            if worked_second or required_second or overtime_second:
+                updated = accounts.update(
+                    hour_account_second=Coalesce(F("hour_account_second"), Value(0))
+                    + worked_second,
+                    hour_pending_second=Coalesce(F("hour_pending_second"), Value(0))
+                    + required_second
+                    - worked_second,
+                    overtime_second=Coalesce(F("overtime_second"), Value(0))
+                    + overtime_second,
+                )
+            else:
+                updated = accounts.exists()
+                if updated:
+                    return
+            if not updated:
+                employee_ot = AttendanceOverTime(
+                    employee_id_id=employee_id, month=month, year=attendance_date.year
+                )
+                Attendance.update_ot(employee_ot, employee_id, attendance_date)
+                return
+            totals = {
+                field: max(0, value)
+                for field, value in accounts.values(
+                    "hour_account_second", "hour_pending_second", "overtime_second"
+                )
+                .first()
+                .items()
+            }
+            accounts.update(
+                worked_hours=format_time(totals["hour_account_second"]),
+                pending_hours=format_time(totals["hour_pending_second"]),
+                overtime=format_time(totals["overtime_second"]),
+                **totals,
+            )
+
+    @staticmethod
+    def refresh_overtime_accounts(employee_id, start_date, end_date):
+        """
+        Compute again the overtime accounts of the employee's months between
+        the dates from their attendances, when an approved leave changes the
+        attendances that count in them
+        """
+        month_start = start_date.replace(day=1)
+        while month_start <= end_date:
+            with transaction.atomic():
+                employee_ot = (
+                    AttendanceOverTime._base_manager.select_for_update()
+                    .filter(
+                        employee_id=employee_id,
+                        month=month_start.strftime("%B").lower(),
+                        year=month_start.year,
+                    )
+                    .first()
+                )
+                if employee_ot is not None:
+                    Attendance.update_ot(employee_ot, employee_id, month_start)
+            month_start = (month_start + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def update_ot(employee_ot, employee_id, attendance_date):
+        """
+        This method is used to compute the overtime account of a month from
+        its attendances
 
         Args:
             employee_ot (obj): AttendanceOverTime instance
+            employee_id (int): id of the employee
+            attendance_date (date): any date of the month
         """
+        month_attendances = Attendance._base_manager.filter(
+            employee_id=employee_id,
+            attendance_date__month=attendance_date.month,
+            attendance_date__year=attendance_date.year,
+        )
         if apps.is_installed("leave"):
-            approved_leave_requests = self.employee_id.leaverequest_set.filter(
-                start_date__lte=self.attendance_date,
-                end_date__gte=self.attendance_date,
-                status="approved",
+            LeaveRequest = get_horilla_model_class(
+                app_label="leave", model="leaverequest"
             )
+            leave_ranges = LeaveRequest._base_manager.filter(
+                employee_id=employee_id,
+                start_date__lte=attendance_date.replace(
+                    day=calendar.monthrange(
+                        attendance_date.year, attendance_date.month
+                    )[1]
+                ),
+                end_date__gte=attendance_date.replace(day=1),
+                status="approved",
+            ).values_list("start_date", "end_date")
         else:
-            approved_leave_requests = []
+            leave_ranges = []
 
         # Create a Q object to combine multiple conditions for the exclude clause
         exclude_condition = Q()
-        for leave_request in approved_leave_requests:
-            exclude_condition |= Q(
-                attendance_date__range=(
-                    leave_request.start_date,
-                    leave_request.end_date,
-                )
-            )
+        for start_date, end_date in leave_ranges:
+            exclude_condition |= Q(attendance_date__range=(start_date, end_date))
 
-        # Filter Attendance objects
-        month_attendances = Attendance.objects.filter(
-            employee_id=self.employee_id,
-            attendance_date__month=self.attendance_date.month,
-            attendance_date__year=self.attendance_date.year,
-            attendance_validated=True,
-        ).exclude(exclude_condition)
         hour_balance = 0
-        hours_pending = 0
         minimum_hour_second = 0
-        for attendance in month_attendances:
-            required_work_second = strtime_seconds(attendance.minimum_hour)
-            at_work_second = min(
-                required_work_second,
-                attendance.at_work_second,
-            )
-            hour_balance = hour_balance + at_work_second
-            minimum_hour_second += strtime_seconds(attendance.minimum_hour)
-            hours_pending = minimum_hour_second - hour_balance
+        for minimum_hour, at_work_second in (
+            month_attendances.filter(attendance_validated=True)
+            .exclude(exclude_condition)
+            .values_list("minimum_hour", "at_work_second")
+        ):
+            required_work_second = strtime_seconds(minimum_hour)
+            hour_balance += min(required_work_second, at_work_second or 0)
+            minimum_hour_second += required_work_second
+        overtime_second = (
+            month_attendances.aggregate(total=models.Sum("approved_overtime_second"))[
+                "total"
+            ]
+            or 0
+        )
         employee_ot.worked_hours = format_time(hour_balance)
-        employee_ot.pending_hours = format_time(hours_pending)
+        employee_ot.pending_hours = format_time(minimum_hour_second - hour_balance)
+        employee_ot.overtime = format_time(overtime_second)
         employee_ot.save()
         return employee_ot
 
@@ -701,6 +860,9 @@ class AttendanceLateComeEarlyOut(HorillaModel):
         super().save(*args, **kwargs)
         self.employee_id = self.attendance_id.employee_id
         super().save(*args, **kwargs)
+        AttendanceDailySummary.refresh_employee(
+            self.employee_id_id, self.attendance_id.attendance_date
+        )
 
     class Meta:
         """
@@ -715,6 +877,236 @@ class AttendanceLateComeEarlyOut(HorillaModel):
             {self.attendance_id.employee_id.employee_last_name} - {self.type}"
 
 
+class AttendanceDailySummary(models.Model):
+    """
+    Attendance statistics of a department on a date, read by the attendance
+    dashboard charts.
+
+    A summary row is recomputed from the attendances and late come/early
+    out records of its department and date whenever one of them is written,
+    the rebuild_attendance_summary command recomputes a whole period. The
+    approved overtime follows the minimum overtime to approve and the active
+    employees of the time of the refresh, rebuild the summaries after changing
+    either.
+    """
+
+    company_id = models.ForeignKey(Company, on_delete=models.CASCADE, null=True)
+    department_id = models.ForeignKey(Department, on_delete=models.CASCADE, null=True)
+    attendance_date = models.DateField()
+    attendance_count = models.IntegerField(default=0)
+    late_come_count = models.IntegerField(default=0)
+    early_out_count = models.IntegerField(default=0)
+    at_work_second = models.BigIntegerField(default=0)
+    overtime_second = models.BigIntegerField(default=0)
+    # overtime of the validated attendances of the active employees whose
+    # overtime is approved and reaches the minimum overtime to approve
+    approved_overtime_second = models.BigIntegerField(default=0)
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["attendance_date", "company_id", "department_id"])
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company_id", "department_id", "attendance_date"],
+                name="unique_attendance_daily_summary",
+            )
+        ]
+
+    @classmethod
+    def compute(cls, start_date, end_date, **bucket):
+        """
+        Summaries of the period grouped by company, department and date
+
+        Args:
+            bucket: company_id and/or department_id to restrict the summaries to
+
+        Returns:
+            list: unsaved AttendanceDailySummary instances
+        """
+        company = "employee_id__employee_work_info__company_id"
+        department = "employee_id__employee_work_info__department_id"
+        attendances = Attendance._base_manager.filter(
+            attendance_date__range=(start_date, end_date)
+        )
+        late_early = AttendanceLateComeEarlyOut._base_manager.filter(
+            attendance_id__attendance_date__range=(start_date, end_date)
+        )
+        paths = {"company_id": company, "department_id": department}
+        for key, value in bucket.items():
+            lookup = (
+                {f"{paths[key]}__isnull": True}
+                if value is None
+                else {paths[key]: value}
+            )
+            attendances = attendances.filter(**lookup)
+            late_early = late_early.filter(
+                **{f"attendance_id__{path}": value for path, value in lookup.items()}
+            )
+
+        condition = AttendanceValidationCondition.objects.first()
+        min_ot = strtime_seconds("00:00")
+        if condition is not None and condition.minimum_overtime_to_approve is not None:
+            min_ot = strtime_seconds(condition.minimum_overtime_to_approve)
+
+        summaries = {}
+        for row in (
+            attendances.values(company, department, "attendance_date")
+            .annotate(
+                attendance_count=models.Count("id"),
+                at_work=models.Sum("at_work_second"),
+                overtime=models.Sum("overtime_second"),
+                approved_overtime=models.Sum(
+                    "approved_overtime_second",
+                    filter=Q(
+                        attendance_validated=True,
+                        attendance_overtime_approve=True,
+                        overtime_second__gte=min_ot,
+                        employee_id__is_active=True,
+                    ),
+                ),
+            )
+            .order_by()
+        ):
+            summaries[(row[company], row[department], row["attendance_date"])] = cls(
+                company_id_id=row[company],
+                department_id_id=row[department],
+                attendance_date=row["attendance_date"],
+                attendance_count=row["attendance_count"],
+                at_work_second=row["at_work"] or 0,
+                overtime_second=row["overtime"] or 0,
+                approved_overtime_second=row["approved_overtime"] or 0,
+            )
+        for row in (
+            late_early.values(
+                f"attendance_id__{company}",
+                f"attendance_id__{department}",
+                "attendance_id__attendance_date",
+            )
+            .annotate(
+                late_come=models.Count("id", filter=Q(type="late_come")),
+                early_out=models.Count("id", filter=Q(type="early_out")),
+            )
+            .order_by()
+        ):
+            key = (
+                row[f"attendance_id__{company}"],
+                row[f"attendance_id__{department}"],
+                row["attendance_id__attendance_date"],
+            )
+            summary = summaries.get(key)
+            if summary is not None:
+                summary.late_come_count = row["late_come"]
+                summary.early_out_count = row["early_out"]
+        return list(summaries.values())
+
+    @classmethod
+    def refresh(cls, start_date, end_date, **bucket):
+        """
+        Recompute the summaries of the period, restricted to the bucket
+
+        The summaries are upserted on their company, department and date, so
+        concurrent refreshes of a bucket never duplicate its rows. A null
+        company or department is not unique in the database, those rows are
+        matched to the existing ones instead.
+        """
+        summaries = cls.compute(start_date, end_date, **bucket)
+        fields = [
+            "attendance_count",
+            "late_come_count",
+            "early_out_count",
+            "at_work_second",
+            "overtime_second",
+            "approved_overtime_second",
+        ]
+        with transaction.atomic():
+            existing = {
+                (company_id, department_id, attendance_date): summary_id
+                for summary_id, company_id, department_id, attendance_date in (
+                    cls.objects.select_for_update()
+                    .filter(
+                        attendance_date__range=(start_date, end_date),
+                        **{
+                            key if value is not None else f"{key}__isnull": (
+                                value if value is not None else True
+                            )
+                            for key, value in bucket.items()
+                        },
+                    )
+                    .values_list("id", "company_id", "department_id", "attendance_date")
+                )
+            }
+            upserts, updates = [], []
+            for summary in summaries:
+                key = (
+                    summary.company_id_id,
+                    summary.department_id_id,
+                    summary.attendance_date,
+                )
+                summary_id = existing.pop(key, None)
+                if None not in key:
+                    upserts.append(summary)
+                elif summary_id is not None:
+                    summary.id = summary_id
+                    updates.append(summary)
+                else:
+                    upserts.append(summary)
+            cls.objects.filter(id__in=existing.values()).delete()
+            cls.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=["company_id", "department_id", "attendance_date"],
+                update_fields=fields,
+            )
+            cls.objects.bulk_update(updates, fields)
+        return summaries
+
+    @classmethod
+    def refresh_employee(cls, employee_id, *dates):
+        """
+        Recompute the summaries of the employee's department on the dates
+        """
+        dates = [attendance_date for attendance_date in dates if attendance_date]
+        if not dates:
+            return
+        bucket = (
+            EmployeeWorkInformation._base_manager.filter(employee_id=employee_id)
+            .values("company_id", "department_id")
+            .first()
+        ) or {"company_id": None, "department_id": None}
+        for attendance_date in set(dates):
+            cls.refresh(attendance_date, attendance_date, **bucket)
+
+    @classmethod
+    def summary_periods(cls, attendances):
+        """
+        Periods of the summaries the attendances of the queryset count in
+
+        Returns:
+            dict: {(company_id, department_id): (start_date, end_date)}
+        """
+        company = "employee_id__employee_work_info__company_id"
+        department = "employee_id__employee_work_info__department_id"
+        return {
+            (row[company], row[department]): (row["start_date"], row["end_date"])
+            for row in attendances.values(company, department)
+            .annotate(
+                start_date=models.Min("attendance_date"),
+                end_date=models.Max("attendance_date"),
+            )
+            .order_by()
+        }
+
+    @classmethod
+    def refresh_periods(cls, periods):
+        """
+        Recompute the summaries of the periods, see summary_periods
+        """
+        for (company_id, department_id), period in periods.items():
+            cls.refresh(*period, company_id=company_id, department_id=department_id)
+
+
 class AttendanceValidationCondition(HorillaModel):
     """
     AttendanceValidationCondition model
@@ -1015,6 +1407,44 @@ class WorkRecords(models.Model):
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def write_records(cls, employee_id, dates, build):
+        """
+        Create or update the work records of an employee on the dates, the
+        existing records are loaded with one query and written in bulk
+
+        Args:
+            employee_id (int): id of the employee
+            dates (list): dates of the records
+            build (callable): build(date, work_record) returns the field
+                values of the date, work_record is the existing record of
+                the date or None
+        """
+        if not dates:
+            return
+        existing = {}
+        for work_record in cls._base_manager.filter(
+            employee_id=employee_id, date__range=(min(dates), max(dates))
+        ).order_by("id"):
+            existing.setdefault(work_record.date, work_record)
+        last_update = timezone.now()
+        records_to_create, records_to_update = [], []
+        fields = {"last_update"}
+        for record_date in dates:
+            work_record = existing.get(record_date)
+            values = build(record_date, work_record)
+            if work_record is None:
+                work_record = cls(employee_id_id=employee_id, date=record_date)
+                records_to_create.append(work_record)
+            else:
+                records_to_update.append(work_record)
+            for field, value in values.items():
+                setattr(work_record, field, value)
+            work_record.last_update = last_update
+            fields.update(values)
+        cls._base_manager.bulk_create(records_to_create)
+        cls._base_manager.bulk_update(records_to_update, list(fields))
+
     def clean(self):
         super().clean()
         if not 0.0 <= self.day_percentage <= 1.0:
@@ -1055,55 +1485,39 @@ class OverrideAttendances(Attendance):
                 if status == "HDP" and min_hour_second > at_work_second
                 else message
             )
-            work_record = WorkRecords.objects.filter(
-                date=instance.attendance_date,
-                is_attendance_record=True,
-                employee_id=instance.employee_id,
-            )
-            work_record = (
-                WorkRecords()
-                if not WorkRecords.objects.filter(
-                    date=instance.attendance_date,
-                    employee_id=instance.employee_id,
-                ).exists()
-                else WorkRecords.objects.filter(
-                    date=instance.attendance_date,
-                    employee_id=instance.employee_id,
-                ).first()
-            )
-            work_record.employee_id = instance.employee_id
-            work_record.date = instance.attendance_date
-            work_record.at_work = instance.attendance_worked_hour
-            work_record.min_hour = instance.minimum_hour
-            work_record.min_hour_second = min_hour_second
-            work_record.at_work_second = at_work_second
-            work_record.work_record_type = status
-            work_record.message = message
-            work_record.is_attendance_record = True
-            if instance.attendance_validated:
-                work_record.day_percentage = (
-                    1.00 if at_work_second > min_hour_second / 2 else 0.50
+
+            def work_record_values(_date, work_record):
+                values = {
+                    "at_work": instance.attendance_worked_hour,
+                    "min_hour": instance.minimum_hour,
+                    "min_hour_second": min_hour_second,
+                    "at_work_second": at_work_second,
+                    "work_record_type": status,
+                    "message": message,
+                    "is_attendance_record": True,
+                }
+                if instance.attendance_validated:
+                    values["day_percentage"] = (
+                        1.00 if at_work_second > min_hour_second / 2 else 0.50
+                    )
+                is_leave_record = (
+                    work_record is not None and work_record.is_leave_record
                 )
-            work_record.save()
-
-            if status == "HDP" and work_record.is_leave_record:
-                message = _("Half day leave")
-            elif status == "FDP" and work_record.is_leave_record:
-                message = _("An approved leave exists")
-            elif status == "FDP":
-                message = _("Present")
-
-            work_record.message = message
-            work_record.save()
-
-            message = work_record.message
-            status = work_record.work_record_type
-            if not instance.attendance_clock_out:
-                status = "FDP"
-                message = _("Currently working")
-            work_record.message = message
-            work_record.work_record_type = status
-            work_record.save()
+                if status == "HDP" and is_leave_record:
+                    values["message"] = _("Half day leave")
+                elif status == "FDP" and is_leave_record:
+                    values["message"] = _("An approved leave exists")
+                elif status == "FDP":
+                    values["message"] = _("Present")
+
+                if not instance.attendance_clock_out:
+                    values["work_record_type"] = "FDP"
+                    values["message"] = _("Currently working")
+                return values
+
+            WorkRecords.write_records(
+                instance.employee_id_id, [instance.attendance_date], work_record_values
+            )
 
     @receiver(pre_delete, sender=Attendance)
     def attendance_pre_delete(sender, instance, **_kwargs):
@@ -1117,3 +1531,59 @@ class OverrideAttendances(Attendance):
             is_attendance_record=True,
             date=instance.attendance_date,
         ).delete()
+
+    @receiver(post_delete, sender=Attendance)
+    def attendance_post_delete(sender, instance, **_kwargs):
+        """
+        Remove the deleted attendance from its daily summary
+        """
+        AttendanceDailySummary.refresh_employee(
+            instance.employee_id_id, instance.attendance_date
+        )
+
+    @receiver(post_delete, sender=AttendanceLateComeEarlyOut)
+    def late_come_early_out_post_delete(sender, instance, **_kwargs):
+        """
+        Remove the deleted late come/early out from its daily summary
+        """
+        attendance = (
+            Attendance._base_manager.filter(id=instance.attendance_id_id)
+            .values("employee_id", "attendance_date")
+            .first()
+        )
+        if attendance:
+            AttendanceDailySummary.refresh_employee(
+                attendance["employee_id"], attendance["attendance_date"]
+            )
+
+    @receiver(pre_bulk_update, sender=Attendance)
+    def attendance_pre_bulk_update(sender, queryset, kwargs, **_kwargs):
+        """
+        Keep the daily summaries the attendances updated through the queryset
+        count in, the update may move them out of the queryset
+        """
+        if SUMMARY_FIELDS.intersection(kwargs):
+            queryset.summary_attendance_ids = list(
+                queryset.values_list("id", flat=True)
+            )
+            queryset.summary_periods = AttendanceDailySummary.summary_periods(
+                Attendance._base_manager.filter(id__in=queryset.summary_attendance_ids)
+            )
+
+    @receiver(post_bulk_update, sender=Attendance)
+    def attendance_post_bulk_update(sender, queryset, kwargs, **_kwargs):
+        """
+        Refresh the daily summaries of the attendances updated through the
+        queryset, before and after the update
+        """
+        if not getattr(queryset, "summary_attendance_ids", None):
+            return
+        periods = AttendanceDailySummary.summary_periods(
+            Attendance._base_manager.filter(id__in=queryset.summary_attendance_ids)
+        )
+        for bucket, (start_date, end_date) in queryset.summary_periods.items():
+            if bucket in periods:
+                start_date = min(start_date, periods[bucket][0])
+                end_date = max(end_date, periods[bucket][1])
+            periods[bucket] = (start_date, end_date)
+        AttendanceDailySummary.refresh_periods(periods)
@@ -1,3 +1,267 @@
+"""
+Test cases of the attendance app
+"""
+
+from datetime import date, time
+
+from django.apps import apps
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from attendance.models import (
+    Attendance,
+    AttendanceDailySummary,
+    AttendanceOverTime,
+    AttendanceValidationCondition,
+)
+from base.models import Company, Department, EmployeeShiftDay
+from employee.models import Employee, EmployeeWorkInformation
+
+
+class OvertimeAccountTests(TestCase):
+    """
+    The monthly overtime account follows the saves of the attendances and
+    the approved leaves
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for day in [
+            "monday",
+            "tuesday",
+            "wednesday",
+            "thursday",
+            "friday",
+            "saturday",
+            "sunday",
+        ]:
+            EmployeeShiftDay(day=day).save()
+        cls.employee = Employee(
+            employee_first_name="Employee",
+            email="employee@example.com",
+            phone="1234567890",
+        )
+        cls.employee.save()
+
+    def create_attendance(self, attendance_date, worked_hour="06:00"):
+        attendance = Attendance(
+            employee_id=self.employee,
+            attendance_date=attendance_date,
+            attendance_clock_in_date=attendance_date,
+            attendance_clock_in=time(9, 0),
+            attendance_clock_out_date=attendance_date,
+            attendance_clock_out=time(15, 0),
+            attendance_worked_hour=worked_hour,
+            minimum_hour="08:00",
+            attendance_validated=True,
+        )
+        attendance.save()
+        return attendance
+
+    def account(self, month="march"):
+        return AttendanceOverTime._base_manager.get(
+            employee_id=self.employee, month=month, year="2024"
+        )
+
+    def test_saves_update_the_account(self):
+        first = self.create_attendance(date(2024, 3, 4))
+        self.create_attendance(date(2024, 3, 5))
+        account = self.account()
+        self.assertEqual(
+            (account.worked_hours, account.pending_hours), ("12:00", "04:00")
+        )
+
+        first.attendance_worked_hour = "08:00"
+        first.save()
+        account = self.account()
+        self.assertEqual(
+            (account.worked_hours, account.pending_hours), ("14:00", "02:00")
+        )
+
+        first.attendance_date = first.attendance_clock_in_date = date(2024, 4, 1)
+        first.attendance_clock_out_date = date(2024, 4, 1)
+        first.save()
+        self.assertEqual(self.account().worked_hours, "06:00")
+        self.assertEqual(self.account("april").worked_hours, "08:00")
+
+        first.delete()
+        self.assertEqual(self.account("april").worked_hours, "00:00")
+
+    def test_save_query_count(self):
+        self.create_attendance(date(2024, 3, 4))
+        attendance = self.create_attendance(date(2024, 3, 5))
+        attendance.attendance_worked_hour = "07:00"
+        with CaptureQueriesContext(connection) as queries:
+            attendance.save()
+        # the month is no longer scanned on every save, it took 50 queries
+        self.assertLessEqual(len(queries), 30)
+
+    def test_approved_leave_updates_the_account(self):
+        if not apps.is_installed("leave"):
+            self.skipTest("leave is not installed")
+        from leave.models import LeaveRequest, LeaveType
+
+        self.create_attendance(date(2024, 3, 4))
+        self.create_attendance(date(2024, 3, 5))
+        leave_type = LeaveType(name="Casual", payment="paid", total_days=10)
+        leave_type.save()
+        leave_request = LeaveRequest(
+            employee_id=self.employee,
+            leave_type_id=leave_type,
+            start_date=date(2024, 3, 5),
+            end_date=date(2024, 3, 5),
+            requested_days=1,
+            status="requested",
+        )
+        leave_request.save()
+        self.assertEqual(self.account().worked_hours, "12:00")
+
+        leave_request.status = "approved"
+        leave_request.save()
+        account = self.account()
+        self.assertEqual(
+            (account.worked_hours, account.pending_hours), ("06:00", "02:00")
+        )
+
+        leave_request.status = "cancelled"
+        leave_request.save()
+        self.assertEqual(self.account().worked_hours, "12:00")
+
+        leave_request.status = "approved"
+        leave_request.save()
+        # approved leaves are only deleted through querysets
+        LeaveRequest._base_manager.filter(pk=leave_request.pk).delete()
+        self.assertEqual(self.account().worked_hours, "12:00")
+
+
+class AttendanceDailySummaryTests(TestCase):
+    """
+    A department has a single summary row per date
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for day in [
+            "monday",
+            "tuesday",
+            "wednesday",
+            "thursday",
+            "friday",
+            "saturday",
+            "sunday",
+        ]:
+            EmployeeShiftDay(day=day).save()
+        cls.company = Company(
+            company="Company",
+            hq=True,
+            address="Address",
+            country="Country",
+            state="State",
+            city="City",
+            zip="000000",
+        )
+        cls.company.save()
+        cls.department = Department(department="Department")
+        cls.department.save()
+        cls.department.company_id.add(cls.company)
+        cls.employees = []
+        for index in range(2):
+            employee = Employee(
+                employee_first_name=f"Employee {index}",
+                email=f"employee{index}@example.com",
+                phone="1234567890",
+            )
+            employee.save()
+            EmployeeWorkInformation.objects.update_or_create(
+                employee_id=employee,
+                defaults={
+                    "company_id": cls.company,
+                    "department_id": cls.department,
+                },
+            )
+            cls.employees.append(employee)
+
+    def create_attendance(self, employee, attendance_date, **fields):
+        attendance = Attendance(
+            employee_id=employee,
+            attendance_date=attendance_date,
+            attendance_clock_in_date=attendance_date,
+            attendance_clock_in=time(9, 0),
+            attendance_clock_out_date=attendance_date,
+            attendance_clock_out=time(15, 0),
+            **{
+                "attendance_worked_hour": "06:00",
+                "minimum_hour": "08:00",
+                "attendance_validated": True,
+                **fields,
+            },
+        )
+        attendance.save()
+        return attendance
+
+    def summaries(self, **bucket):
+        return AttendanceDailySummary.objects.filter(
+            attendance_date=date(2024, 3, 4), **bucket
+        )
+
+    def test_refresh_upserts_the_summary(self):
+        for employee in self.employees:
+            self.create_attendance(employee, date(2024, 3, 4))
+        for _ in range(2):
+            AttendanceDailySummary.refresh(
+                date(2024, 3, 4),
+                date(2024, 3, 4),
+                company_id=self.company.id,
+                department_id=self.department.id,
+            )
+        summaries = self.summaries(department_id=self.department)
+        self.assertEqual(
+            list(summaries.values_list("attendance_count", "at_work_second")),
+            [(2, 12 * 3600)],
+        )
+
+    def test_refresh_removes_the_empty_summary(self):
+        attendance = self.create_attendance(self.employees[0], date(2024, 3, 4))
+        self.assertEqual(self.summaries().count(), 1)
+        attendance.delete()
+        self.assertFalse(self.summaries().exists())
+
+    def test_refresh_keeps_a_single_unassigned_summary(self):
+        EmployeeWorkInformation.objects.filter(employee_id=self.employees[0]).update(
+            company_id=None, department_id=None
+        )
+        self.create_attendance(self.employees[0], date(2024, 3, 4))
+        for _ in range(2):
+            AttendanceDailySummary.refresh(
+                date(2024, 3, 4),
+                date(2024, 3, 4),
+                company_id=None,
+                department_id=None,
+            )
+        summaries = self.summaries(company_id__isnull=True)
+        self.assertEqual(list(summaries.values_list("attendance_count")), [(1,)])
+
+    def test_approved_overtime_follows_the_minimum_and_active_employees(self):
+        AttendanceValidationCondition(
+            validation_at_work="09:00", minimum_overtime_to_approve="02:00"
+        ).save()
+        for employee, worked_hour in zip(self.employees, ["09:00", "11:00"]):
+            self.create_attendance(
+                employee,
+                date(2024, 3, 4),
+                attendance_worked_hour=worked_hour,
+                attendance_overtime_approve=True,
+            )
+        summaries = self.summaries(department_id=self.department)
+        # the hour of overtime under the minimum is left out
+        self.assertEqual(summaries.get().approved_overtime_second, 3 * 3600)
 
-# Create your tests here.
+        Employee.objects.filter(id=self.employees[1].id).update(is_active=False)
+        AttendanceDailySummary.refresh(
+            date(2024, 3, 4),
+            date(2024, 3, 4),
+            company_id=self.company.id,
+            department_id=self.department.id,
+        )
+        self.assertEqual(summaries.get().approved_overtime_second, 0)
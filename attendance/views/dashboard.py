@@ -8,28 +8,21 @@ import json
 from datetime import date, datetime
 
 from django.apps import apps
-from django.db.models import Q
+from django.db.models import Q, Sum
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils.translation import gettext_lazy as _
 
-from attendance.filters import (
-    AttendanceFilters,
-    AttendanceOverTimeFilter,
-    LateComeEarlyOutFilter,
-)
-from attendance.methods.utils import (
-    get_month_start_end_dates,
-    get_week_start_end_dates,
-    pending_hour_data,
-    worked_hour_data,
-)
+from attendance.filters import AttendanceOverTimeFilter
+from attendance.methods.utils import get_month_start_end_dates, get_week_start_end_dates
 from attendance.models import (
     Attendance,
+    AttendanceDailySummary,
     AttendanceLateComeEarlyOut,
     AttendanceValidationCondition,
 )
 from attendance.views.views import strtime_seconds
+from base.horilla_company_manager import get_selected_company
 from base.methods import filtersubordinates
 from base.models import Department
 from employee.models import Employee
@@ -39,22 +32,32 @@ from horilla.decorators import hx_request_required, login_required
 from horilla.methods import get_horilla_model_class
 
 
-def find_on_time(request, today, week_day, department=None):
+def daily_summaries(start_date, end_date=None):
     """
-    This method is used to find count for on time attendances
+    Attendance daily summaries of the period, in the selected company
     """
-
-    on_time = 0
-    attendances = Attendance.objects.filter(attendance_date=today)
-    if department is not None:
-        attendances = attendances.filter(
-            employee_id__employee_work_info__department_id=department
-        )
-    late_come = AttendanceLateComeEarlyOut.objects.filter(
-        attendance_id__attendance_date=today, type="late_come"
+    summaries = AttendanceDailySummary.objects.filter(
+        attendance_date__range=(start_date, end_date or start_date)
     )
-    on_time = len(attendances) - len(late_come)
-    return on_time
+    company_id = get_selected_company()
+    if company_id is not None:
+        summaries = summaries.filter(
+            Q(company_id=company_id) | Q(company_id__isnull=True)
+        )
+    return summaries
+
+
+def get_period(start_date, type, end_date):
+    """
+    First and last dates of the chart period
+    """
+    if type == "day":
+        end_date = start_date
+    if type == "weekly":
+        start_date, end_date = get_week_start_end_dates(start_date)
+    if type == "monthly":
+        start_date, end_date = get_month_start_end_dates(start_date)
+    return start_date, end_date
 
 
 def find_expected_attendances(week_day):
@@ -86,9 +89,11 @@ def dashboard(request):
     today = datetime.today()
     week_day = today.strftime("%A").lower()
 
-    on_time = find_on_time(request, today=today, week_day=week_day)
-    late_come = find_late_come(start_date=today)
-    late_come_obj = len(late_come)
+    summary = daily_summaries(today.date()).aggregate(
+        attendance_count=Sum("attendance_count"), late_come=Sum("late_come_count")
+    )
+    late_come_obj = summary["late_come"] or 0
+    on_time = (summary["attendance_count"] or 0) - late_come_obj
 
     marked_attendances = late_come_obj + on_time
 
@@ -180,115 +185,6 @@ def validated_attendances_table(request):
     return render(request, "attendance/dashboard/to_validate_table.html", context)
 
 
-def total_attendance(start_date, department, end_date=None):
-    """
-    This method is used to find total attendance
-    """
-    attendance = AttendanceFilters(
-        {
-            "attendance_date__gte": start_date,
-            "attendance_date__lte": end_date,
-            "department": department,
-        }
-    ).qs
-    return attendance
-
-
-def find_late_come(start_date, department=None, end_date=None):
-    """
-    This method is used to find late comers
-    """
-    if department is not None:
-        late_come_obj = LateComeEarlyOutFilter(
-            {
-                "type": "late_come",
-                "department": department,
-                "attendance_date__gte": start_date,
-                "attendance_date__lte": end_date,
-            }
-        ).qs
-    else:
-        late_come_obj = LateComeEarlyOutFilter(
-            {
-                "type": "late_come",
-                "attendance_date__gte": start_date,
-                "attendance_date__lte": end_date,
-            }
-        ).qs
-    return late_come_obj
-
-
-def find_early_out(start_date, end_date=None, department=None):
-    """
-    This method is used to find early out attendances and it returns query set
-    """
-    if department is not None:
-        early_out_obj = LateComeEarlyOutFilter(
-            {
-                "type": "early_out",
-                "department": department,
-                "attendance_date__gte": start_date,
-                "attendance_date__lte": end_date,
-            }
-        ).qs
-    else:
-        early_out_obj = LateComeEarlyOutFilter(
-            {
-                "type": "early_out",
-                "attendance_date__gte": start_date,
-                "attendance_date__lte": end_date,
-            }
-        ).qs
-    return early_out_obj
-
-
-def generate_data_set(request, start_date, type, end_date, dept):
-    """
-    This method is used to generate all the dashboard data
-    """
-    attendance = []
-    late_come_obj = []
-    early_out_obj = []
-    on_time = 0
-    if type == "day":
-        start_date = start_date
-        end_date = start_date
-    if type == "weekly":
-        start_date, end_date = get_week_start_end_dates(start_date)
-    if type == "monthly":
-        start_date, end_date = get_month_start_end_dates(start_date)
-    if type == "date_range":
-        start_date = start_date
-        end_date = end_date
-    # below method will find all the on-time attendance corresponding to the
-    # employee shift and shift schedule.
-    attendance = total_attendance(
-        start_date=start_date, department=dept, end_date=end_date
-    )
-
-    # below method will find all the late-come attendance corresponding to the
-    # employee shift and schedule.
-    late_come_obj = find_late_come(
-        start_date=start_date, department=dept, end_date=end_date
-    )
-
-    # below method will find all the early-out attendance corresponding to the
-    # employee shift and shift schedule
-    early_out_obj = find_early_out(
-        department=dept, start_date=start_date, end_date=end_date
-    )
-    on_time = len(attendance) - len(late_come_obj)
-
-    data = {}
-    if on_time or late_come_obj or early_out_obj:
-        data = {
-            "label": dept.department,
-            "data": [on_time, len(late_come_obj), len(early_out_obj)],
-        }
-
-    return data if data else None
-
-
 @login_required
 def dashboard_attendance(request):
     """
@@ -303,7 +199,6 @@ def dashboard_attendance(request):
         _("Early Out"),
     ]
     # initializing values
-    data_set = []
     start_date = date.today()
     end_date = start_date
     type = "date"
@@ -315,13 +210,31 @@ def dashboard_attendance(request):
         type = request.GET.get("type")
     if request.GET.get("end_date"):
         end_date = request.GET.get("end_date")
-
-    # get all departments for filtration
-    departments = Department.objects.all()
-    for dept in departments:
-        data_set.append(generate_data_set(request, start_date, type, end_date, dept))
+    start_date, end_date = get_period(start_date, type, end_date)
+
+    departments = (
+        daily_summaries(start_date, end_date)
+        .filter(department_id__isnull=False)
+        .values("department_id__department")
+        .annotate(
+            attendance_count=Sum("attendance_count"),
+            late_come=Sum("late_come_count"),
+            early_out=Sum("early_out_count"),
+        )
+        .order_by("department_id")
+    )
+    data_set = [
+        {
+            "label": department["department_id__department"],
+            "data": [
+                department["attendance_count"] - department["late_come"],
+                department["late_come"],
+                department["early_out"],
+            ],
+        }
+        for department in departments
+    ]
     message = _("No data Found...")
-    data_set = list(filter(None, data_set))
     return JsonResponse({"dataSet": data_set, "labels": labels, "message": message})
 
 
@@ -331,11 +244,33 @@ def pending_hours(request):
     """
     records = AttendanceOverTimeFilter(request.GET).qs
     labels = list(Department.objects.values_list("department", flat=True))
+    hours = {
+        row["employee_id__employee_work_info__department_id__department"]: row
+        for row in records.values(
+            "employee_id__employee_work_info__department_id__department"
+        )
+        .annotate(pending=Sum("hour_pending_second"), worked=Sum("hour_account_second"))
+        .order_by()
+    }
     data = {
         "labels": labels,
         "datasets": [
-            pending_hour_data(labels, records),
-            worked_hour_data(labels, records),
+            {
+                "label": "Pending Hours",
+                "backgroundColor": "rgba(255, 99, 132, 0.6)",
+                "data": [
+                    (hours[dept]["pending"] or 0) / 3600 if dept in hours else 0
+                    for dept in labels
+                ],
+            },
+            {
+                "label": "Worked Hours",
+                "backgroundColor": "rgba(75, 192, 192, 0.6)",
+                "data": [
+                    (hours[dept]["worked"] or 0) / 3600 if dept in hours else 0
+                    for dept in labels
+                ],
+            },
         ],
     }
 
@@ -350,65 +285,27 @@ def department_overtime_chart(request):
         request.GET.get("end_date") if request.GET.get("end_date") else start_date
     )
 
-    if chart_type == "day":
-        start_date = start_date
-        end_date = start_date
-    if chart_type == "weekly":
-        start_date, end_date = get_week_start_end_dates(start_date)
-    if chart_type == "monthly":
-        start_date, end_date = get_month_start_end_dates(start_date)
-    if chart_type == "date_range":
-        start_date = start_date
-        end_date = end_date
-
-    attendance = total_attendance(
-        start_date=start_date, department=None, end_date=end_date
-    )
-
-    condition = AttendanceValidationCondition.objects.first()
-    min_ot = strtime_seconds("00:00")
-    if condition is not None and condition.minimum_overtime_to_approve is not None:
-        min_ot = strtime_seconds(condition.minimum_overtime_to_approve)
-    attendances = attendance.filter(
-        overtime_second__gte=min_ot,
-        attendance_validated=True,
-        employee_id__is_active=True,
-        attendance_overtime_approve=True,
-    )
-    departments = []
-    department_total = []
-
-    for attendance in attendances:
-        departments.append(
-            attendance.employee_id.employee_work_info.department_id.department
-        )
-    departments = list(set(departments))
-
-    for depart in departments:
-        department_total.append({"department": depart, "ot_hours": 0})
-
-    for attendance in attendances:
-        if attendance.employee_id.employee_work_info.department_id:
-            department = (
-                attendance.employee_id.employee_work_info.department_id.department
-            )
-            ot = attendance.approved_overtime_second
-            ot_hrs = ot / 3600
-            for depart in department_total:
-                if depart["department"] == department:
-                    depart["ot_hours"] += ot_hrs
+    start_date, end_date = get_period(start_date, chart_type, end_date)
 
+    department_total = [
+        {
+            "department": department["department_id__department"],
+            "ot_hours": department["ot_second"] / 3600,
+        }
+        for department in daily_summaries(start_date, end_date)
+        .filter(department_id__isnull=False, approved_overtime_second__gt=0)
+        .values("department_id__department")
+        .annotate(ot_second=Sum("approved_overtime_second"))
+        .order_by("department_id")
+    ]
+    departments = [depart["department"] for depart in department_total]
     dataset = [
         {
             "label": "",
-            "data": [],
+            "data": [depart["ot_hours"] for depart in department_total],
         }
     ]
 
-    for depart_total, depart in zip(department_total, departments):
-        if depart == depart_total["department"]:
-            dataset[0]["data"].append(depart_total["ot_hours"])
-
     response = {
         "dataset": dataset,
         "labels": departments,
@@ -355,9 +355,16 @@ def approve_validate_attendance_request(request, attendance_id):
             if requested_data["attendance_clock_out_date"] == "None"
             else requested_data["attendance_clock_out_date"]
         )
-        Attendance.objects.filter(id=attendance_id).update(**requested_data)
-        # DUE TO AFFECT THE OVERTIME CALCULATION ON SAVE METHOD, SAVE THE INSTANCE ONCE MORE
+        # Applied through save so the overtime account is moved from the
+        # previous values of the attendance to the requested ones
         attendance = Attendance.objects.get(id=attendance_id)
+        for field_name, value in requested_data.items():
+            field = Attendance._meta.get_field(field_name)
+            setattr(
+                attendance,
+                field.attname,
+                None if value in ("", None) else field.to_python(value),
+            )
         attendance.save()
 
     if (
@@ -552,9 +559,16 @@ def bulk_approve_attendance_request(request):
                 if requested_data["attendance_clock_out_date"] == "None"
                 else requested_data["attendance_clock_out_date"]
             )
-            Attendance.objects.filter(id=attendance_id).update(**requested_data)
-            # DUE TO AFFECT THE OVERTIME CALCULATION ON SAVE METHOD, SAVE THE INSTANCE ONCE MORE
+            # Applied through save so the overtime account is moved from the
+            # previous values of the attendance to the requested ones
             attendance = Attendance.objects.get(id=attendance_id)
+            for field_name, value in requested_data.items():
+                field = Attendance._meta.get_field(field_name)
+                setattr(
+                    attendance,
+                    field.attname,
+                    None if value in ("", None) else field.to_python(value),
+                )
             attendance.save()
         if (
             attendance.attendance_clock_out is None
@@ -12,3 +12,10 @@ class BaseConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "base"
+
+    def ready(self):
+        super().ready()
+        from base import signals
+        from base.horilla_company_manager import build_company_scope
+
+        build_company_scope()
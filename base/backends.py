@@ -26,9 +26,10 @@ class DefaultHorillaMailBackend(EmailBackend):
         timeout=None,
         ssl_keyfile=None,
         ssl_certfile=None,
+        configuration=None,
         **kwargs,
     ):
-        self.configuration = self.get_dynamic_email_config()
+        self.configuration = configuration or self.get_dynamic_email_config()
         ssl_keyfile = (
             getattr(self.configuration, "ssl_keyfile", None)
             if self.configuration
@@ -55,8 +56,8 @@ class DefaultHorillaMailBackend(EmailBackend):
         )
 
     @staticmethod
-    def get_dynamic_email_config():
-        request = getattr(_thread_locals, "request", None)
+    def get_dynamic_email_config(request=None):
+        request = request or getattr(_thread_locals, "request", None)
         company = None
         if request and not request.user.is_anonymous:
             company = request.user.employee_get.get_company()
@@ -191,4 +192,14 @@ if EMAIL_BACKEND != default:
     ConfiguredEmailBackend.dynamic_from_email_with_display_name = from_mail
 
 
-__all__ = ["ConfiguredEmailBackend"]
+def get_configured_backend(configuration=None):
+    """
+    ConfiguredEmailBackend sending through the given mail server configuration,
+    the configuration only applies to the default horilla backend
+    """
+    if issubclass(ConfiguredEmailBackend, DefaultHorillaMailBackend):
+        return ConfiguredEmailBackend(configuration=configuration)
+    return ConfiguredEmailBackend()
+
+
+__all__ = ["ConfiguredEmailBackend", "get_configured_backend"]
@@ -3,9 +3,13 @@ horilla_company_manager.py
 """
 
 import logging
+from contextvars import ContextVar
 from typing import Coroutine, Sequence
 
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
+from django.db.models import Q
 from django.db.models.query import QuerySet
 
 from horilla.horilla_middlewares import _thread_locals
@@ -30,6 +34,102 @@ def update(self, *args, **kwargs):
 setattr(QuerySet, "update", update)
 
 
+# Apps whose models are filtered by the selected company
+COMPANY_SCOPED_APPS = [
+    "recruitment",
+    "employee",
+    "onboarding",
+    "attendance",
+    "leave",
+    "payroll",
+    "asset",
+    "pms",
+    "base",
+    "helpdesk",
+    "offboarding",
+    "horilla_documents",
+]
+
+# model -> path of the company field, built once on startup
+COMPANY_SCOPE = {}
+
+# models whose company field path crosses a many valued relation, filtering
+# them through a join could return their rows more than once
+COMPANY_SCOPE_MANY_VALUED = set()
+
+# id of the company the current request is scoped to, None for all companies
+_selected_company = ContextVar("selected_company", default=None)
+
+
+def build_company_scope():
+    """
+    Map every model of the company scoped apps to the path of its company field
+    """
+    COMPANY_SCOPE.clear()
+    COMPANY_SCOPE_MANY_VALUED.clear()
+    for model in apps.get_models():
+        if model._meta.app_label not in COMPANY_SCOPED_APPS:
+            continue
+        manager = getattr(model, "objects", None)
+        if getattr(model, "company_id", None):
+            company_field = "company_id"
+        elif isinstance(manager, HorillaCompanyManager) and (
+            manager.related_company_field
+        ):
+            company_field = manager.related_company_field
+        else:
+            continue
+        try:
+            many_valued = _is_many_valued(model, company_field)
+        except FieldDoesNotExist as error:
+            logger.warning("%s is not company scoped: %s", model.__name__, error)
+            continue
+        COMPANY_SCOPE[model] = company_field
+        if many_valued:
+            COMPANY_SCOPE_MANY_VALUED.add(model)
+    return COMPANY_SCOPE
+
+
+def _is_many_valued(model, path):
+    """
+    Whether the lookup path crosses a many to many or reverse foreign key
+    """
+    many_valued = False
+    for part in path.split("__"):
+        field = model._meta.get_field(part)
+        many_valued = many_valued or field.many_to_many or field.one_to_many
+        if not field.is_relation:
+            break
+        model = field.related_model
+    return many_valued
+
+
+def set_selected_company(company_id):
+    """
+    Scope the queries of the current request to the company, None for all
+    """
+    _selected_company.set(company_id)
+
+
+def get_selected_company():
+    """
+    Id of the company the current request is scoped to, None for all companies
+    """
+    return _selected_company.get()
+
+
+def company_filter(model, company_id=None):
+    """
+    Q object filtering the model by the company, None when the model is not
+    company scoped or no company is selected
+    """
+    company_id = get_selected_company() if company_id is None else company_id
+    company_field = COMPANY_SCOPE.get(model)
+    if company_id is None or company_field is None:
+        return None
+    return Q(**{company_field: company_id}) | Q(**{f"{company_field}__isnull": True})
+
+
 class HorillaCompanyManager(models.Manager):
     """
     HorillaCompanyManager
@@ -49,24 +149,13 @@ class HorillaCompanyManager(models.Manager):
         """
 
         queryset = super().get_queryset()
-        request = getattr(_thread_locals, "request", None)
-        selected_company = None
-        if request is not None:
-            selected_company = request.session.get("selected_company")
-        try:
-            queryset = (
-                queryset.filter(self.model.company_filter)
-                if selected_company != "all" and selected_company
-                else queryset
-            )
-        except Exception as e:
-            logger.error(e)
-        try:
-            has_duplicates = queryset.count() != queryset.distinct().count()
-            if has_duplicates:
-                queryset = queryset.distinct()
-        except:
-            pass
+        scope = company_filter(self.model)
+        if scope is not None:
+            if self.model in COMPANY_SCOPE_MANY_VALUED:
+                # A subquery keeps the rows unique without distinct(), which
+                # would forbid delete() on the queryset
+                scope = Q(pk__in=self.model._base_manager.filter(scope).values("pk"))
+            queryset = queryset.filter(scope)
         return queryset
 
     def all(self):
@@ -76,25 +165,24 @@ class HorillaCompanyManager(models.Manager):
         queryset = []
         try:
             queryset = self.get_queryset()
-            if queryset.exists():
-                try:
-                    model_name = queryset.model._meta.model_name
-                    if model_name == "employee":
-                        request = getattr(_thread_locals, "request", None)
-                        if not getattr(request, "is_filtering", None):
-                            queryset = queryset.filter(is_active=True)
-                    else:
-                        for field in queryset.model._meta.fields:
-                            if isinstance(field, models.ForeignKey):
-                                if field.name in self.check_fields:
-                                    related_model_is_active_filter = {
-                                        f"{field.name}__is_active": True
-                                    }
-                                    queryset = queryset.filter(
-                                        **related_model_is_active_filter
-                                    )
-                except:
-                    pass
+            try:
+                model_name = queryset.model._meta.model_name
+                if model_name == "employee":
+                    request = getattr(_thread_locals, "request", None)
+                    if not getattr(request, "is_filtering", None):
+                        queryset = queryset.filter(is_active=True)
+                else:
+                    for field in queryset.model._meta.fields:
+                        if isinstance(field, models.ForeignKey):
+                            if field.name in self.check_fields:
+                                related_model_is_active_filter = {
+                                    f"{field.name}__is_active": True
+                                }
+                                queryset = queryset.filter(
+                                    **related_model_is_active_filter
+                                )
+            except:
+                pass
         except:
             pass
         return queryset
@@ -0,0 +1,212 @@
+"""
+mail_outbox.py
+
+Durable outbox of the outgoing mails.
+
+Producers call enqueue_mail, which only stores the rendered message in the
+MailOutbox table, so it returns immediately and the mail survives a restart
+of the process. The ``send_outbox_mails`` command drains the outbox in
+batches, over one SMTP connection per mail server configuration, and
+retries the failed deliveries with an exponential backoff.
+"""
+
+import base64
+import logging
+from datetime import timedelta
+from email import message_from_bytes
+
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.utils import timezone
+
+from base.backends import DefaultHorillaMailBackend, get_configured_backend
+from base.models import MailOutbox
+from horilla.horilla_settings import (
+    MAIL_OUTBOX_BATCH_SIZE,
+    MAIL_OUTBOX_MAX_ATTEMPTS,
+    MAIL_OUTBOX_RETRY_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of the wait before retrying a failed delivery
+MAX_RETRY_DELAY = 60 * 60
+# A claimed mail is delivered again if its worker did not finish in time
+CLAIM_TIMEOUT = 10 * 60
+
+
+def _encode_attachment(attachment):
+    if isinstance(attachment, tuple):
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        return [filename, base64.b64encode(content).decode(), mimetype]
+    # MIMEBase attachment, kept as a whole
+    return [None, base64.b64encode(attachment.as_bytes()).decode(), None]
+
+
+def _decode_attachment(attachment):
+    filename, content, mimetype = attachment
+    content = base64.b64decode(content)
+    if filename is None and mimetype is None:
+        return message_from_bytes(content)
+    return filename, content, mimetype
+
+
+def enqueue_mail(email, configuration=None, request=None):
+    """
+    Store the EmailMessage in the outbox
+
+    Args:
+        email (EmailMessage): message to deliver
+        configuration (DynamicEmailConfiguration): mail server to send through,
+            defaults to the one of the request's company
+        request: request the mail is sent from, used to pick the configuration
+
+    Returns:
+        MailOutbox: the queued mail
+    """
+    if configuration is None:
+        configuration = DefaultHorillaMailBackend.get_dynamic_email_config(request)
+    return MailOutbox.objects.create(
+        subject=email.subject,
+        body=email.body,
+        content_subtype=email.content_subtype,
+        from_email=email.from_email,
+        to=list(email.to),
+        cc=list(email.cc),
+        bcc=list(email.bcc),
+        reply_to=list(email.reply_to),
+        headers=email.extra_headers,
+        alternatives=[
+            list(alternative) for alternative in getattr(email, "alternatives", [])
+        ],
+        attachments=[
+            _encode_attachment(attachment) for attachment in email.attachments
+        ],
+        configuration=configuration,
+    )
+
+
+def build_message(mail, connection=None):
+    """
+    Rebuild the EmailMessage of a queued mail
+    """
+    email = EmailMultiAlternatives(
+        mail.subject,
+        mail.body,
+        mail.from_email,
+        to=mail.to,
+        cc=mail.cc,
+        bcc=mail.bcc,
+        reply_to=mail.reply_to,
+        headers=mail.headers,
+        alternatives=[tuple(alternative) for alternative in mail.alternatives],
+        connection=connection,
+    )
+    email.content_subtype = mail.content_subtype
+    email.attachments = [
+        _decode_attachment(attachment) for attachment in mail.attachments
+    ]
+    return email
+
+
+def claim_mails(batch_size):
+    """
+    Claim the next due mails, a claimed mail is not picked by another worker
+    until CLAIM_TIMEOUT
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        mails = list(
+            MailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        MailOutbox.objects.filter(id__in=[mail.id for mail in mails]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT)
+        )
+    return mails
+
+
+class OutboxDelivery:
+    """
+    Delivers the claimed mails, keeping one open connection per mail server
+    configuration
+    """
+
+    def __init__(
+        self, max_attempts=MAIL_OUTBOX_MAX_ATTEMPTS, retry_delay=MAIL_OUTBOX_RETRY_DELAY
+    ):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.connections = {}
+
+    def get_connection(self, mail):
+        connection = self.connections.get(mail.configuration_id)
+        if connection is None:
+            connection = get_configured_backend(mail.configuration)
+            # the failures are recorded on the mail instead
+            connection.fail_silently = False
+            connection.open()
+            self.connections[mail.configuration_id] = connection
+        return connection
+
+    def drop_connection(self, mail):
+        connection = self.connections.pop(mail.configuration_id, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as error:
+                logger.error("Got an error while closing the connection %s", error)
+
+    def close(self):
+        for connection in self.connections.values():
+            try:
+                connection.close()
+            except Exception as error:
+                logger.error("Got an error while closing the connection %s", error)
+        self.connections.clear()
+
+    def deliver(self, mail):
+        """
+        Send the mail, scheduling a retry when it fails
+
+        Returns:
+            bool: whether the mail is sent
+        """
+        try:
+            connection = self.get_connection(mail)
+            if not connection.send_messages([build_message(mail, connection)]):
+                raise ConnectionError("The mail server did not accept the mail")
+        except Exception as error:
+            # reconnect for the next mail, the connection may be broken
+            self.drop_connection(mail)
+            mail.attempts += 1
+            mail.last_error = str(error)
+            if mail.attempts >= self.max_attempts:
+                mail.status = "failed"
+            delay = min(self.retry_delay * 2 ** (mail.attempts - 1), MAX_RETRY_DELAY)
+            mail.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            mail.save(
+                update_fields=["attempts", "last_error", "status", "next_attempt_at"]
+            )
+            logger.error("Mail %s not sent: %s", mail.id, error)
+            return False
+        mail.status = "sent"
+        mail.sent_at = timezone.now()
+        mail.attempts += 1
+        mail.last_error = None
+        mail.save(update_fields=["status", "sent_at", "attempts", "last_error"])
+        return True
+
+    def deliver_batch(self, batch_size=MAIL_OUTBOX_BATCH_SIZE):
+        """
+        Deliver the next due mails
+
+        Returns:
+            tuple: number of mails claimed and number of mails sent
+        """
+        mails = claim_mails(batch_size)
+        sent = sum(self.deliver(mail) for mail in mails)
+        return len(mails), sent
@@ -0,0 +1,57 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from horilla.horilla_scheduler import SchedulerRunner, job_statuses
+from horilla.horilla_settings import SCHEDULER_LEASE_SECONDS
+
+
+class Command(BaseCommand):
+    help = "Run the scheduled jobs, only one of the running processes runs them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=SCHEDULER_LEASE_SECONDS,
+            help="Seconds the leader holds its lease without renewing it",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Print the last runs of the scheduled jobs and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            for job in job_statuses():
+                self.stdout.write(
+                    f"{job['id']}: next run {job['next_run_time'] or '-'}, "
+                    f"last success {job['last_success'] or '-'}, "
+                    f"{job['failures']} failures, "
+                    f"average duration {job['average_duration'] or 0:.2f}s, "
+                    f"max duration {job['max_duration'] or 0:.2f}s"
+                )
+            return
+
+        self.stopping = False
+
+        def stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        runner = SchedulerRunner(lease_seconds=options["lease"])
+        # renewed well before it expires
+        interval = max(options["lease"] // 3, 1)
+        try:
+            while not self.stopping:
+                runner.tick()
+                for _second in range(interval):
+                    if self.stopping:
+                        break
+                    time.sleep(1)
+        finally:
+            runner.close()
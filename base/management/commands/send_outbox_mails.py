@@ -0,0 +1,84 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from base.mail_outbox import OutboxDelivery
+from horilla.horilla_settings import (
+    MAIL_OUTBOX_BATCH_SIZE,
+    MAIL_OUTBOX_INTERVAL,
+    MAIL_OUTBOX_MAX_ATTEMPTS,
+    MAIL_OUTBOX_RETRY_DELAY,
+)
+
+
+class Command(BaseCommand):
+    help = "Deliver the mails queued in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MAIL_OUTBOX_BATCH_SIZE,
+            help="Number of mails delivered at a time",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=MAIL_OUTBOX_INTERVAL,
+            help="Seconds to wait when the outbox is empty",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=MAIL_OUTBOX_MAX_ATTEMPTS,
+            help="Number of deliveries tried before a mail is marked as failed",
+        )
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=MAIL_OUTBOX_RETRY_DELAY,
+            help="Seconds before the first retry of a failed delivery",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver the mails due now and exit",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+
+        def stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        delivery = OutboxDelivery(
+            max_attempts=options["max_attempts"],
+            retry_delay=options["retry_delay"],
+        )
+        total_claimed = total_sent = 0
+        try:
+            while not self.stopping:
+                close_old_connections()
+                claimed, sent = delivery.deliver_batch(options["batch_size"])
+                total_claimed += claimed
+                total_sent += sent
+                if claimed:
+                    continue
+                if options["once"]:
+                    break
+                # do not keep the connections open while idle
+                delivery.close()
+                for _second in range(options["interval"]):
+                    if self.stopping:
+                        break
+                    time.sleep(1)
+        finally:
+            delivery.close()
+        self.stdout.write(
+            self.style.SUCCESS(f"{total_sent} of {total_claimed} mails delivered")
+        )
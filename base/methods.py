@@ -5,13 +5,12 @@ import os
 import random
 from datetime import date, datetime, time, timedelta
 
-import pandas as pd
 from django.apps import apps
 from django.conf import settings
 from django.contrib.staticfiles import finders
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.db.models import F, ForeignKey, ManyToManyField, OneToOneField, Q
+from django.db.models import F, ForeignKey, ManyToManyField, OneToOneField
 from django.db.models.functions import Lower
 from django.forms.models import ModelChoiceField
 from django.http import HttpResponse
@@ -19,9 +18,17 @@ from django.template.loader import get_template, render_to_string
 from django.utils.translation import gettext as _
 from xhtml2pdf import pisa
 
-from base.models import Company, CompanyLeaves, DynamicPagination, Holidays
+from base.models import Company, DynamicPagination
+from base.working_calendar import (
+    company_leave_dates,
+    get_year_calendar,
+    holiday_dates,
+    off_dates,
+    selected_company_id,
+)
 from employee.models import Employee, EmployeeWorkInformation
 from horilla.decorators import login_required
+from horilla.horilla_export import export_response, iterate_export
 from horilla.horilla_settings import HORILLA_DATE_FORMATS, HORILLA_TIME_FORMATS
 
 
@@ -414,8 +421,15 @@ def closest_numbers(numbers: list, input_number: int) -> tuple:
     return (previous_number, next_number)
 
 
-def format_export_value(value, employee):
-    work_info = EmployeeWorkInformation.objects.filter(employee_id=employee).first()
+def export_formats(employee):
+    """
+    Date and time formats of the company of the employee, used in the exports
+    """
+    work_info = (
+        EmployeeWorkInformation.objects.filter(employee_id=employee)
+        .select_related("company_id")
+        .first()
+    )
     time_format = (
         work_info.company_id.time_format
         if work_info and work_info.company_id
@@ -426,6 +440,11 @@ def format_export_value(value, employee):
         if work_info and work_info.company_id
         else "MMM. D, YYYY"
     )
+    return date_format, time_format
+
+
+def format_export_value(value, employee, formats=None):
+    date_format, time_format = formats or export_formats(employee)
 
     if isinstance(value, time):
         # Convert the string to a datetime.time object
@@ -481,11 +500,9 @@ def export_data(request, model, form_class, filter_class, file_name):
 
     selected_columns = []
     today_date = date.today().strftime("%Y-%m-%d")
-    file_name = f"{file_name}_{today_date}.xlsx"
-    data_export = {}
+    file_name = f"{file_name}_{today_date}"
 
     form = form_class()
-    model_fields = model._meta.get_fields()
     export_objects = filter_class(request.GET).qs
     selected_fields = request.GET.getlist("selected_fields")
 
@@ -501,46 +518,41 @@ def export_data(request, model, form_class, filter_class, file_name):
         if value in selected_fields:
             selected_columns.append((value, key))
 
-    for field_name, verbose_name in selected_columns:
-        if field_name in selected_fields:
-            data_export[verbose_name] = []
-            for obj in export_objects:
-                value = obj
-                nested_attributes = field_name.split("__")
-                for attr in nested_attributes:
-                    value = getattr(value, attr, None)
-                    if value is None:
-                        break
-                if value is True:
-                    value = _("Yes")
-                elif value is False:
-                    value = _("No")
-                if value in fields_mapping:
-                    value = fields_mapping[value]
-                if value == "None":
-                    value = " "
-                if field_name == "month":
-                    value = _(value.title())
-
-                # Check if the type of 'value' is time
-                value = format_export_value(value, employee)
-                data_export[verbose_name].append(value)
-
-    data_frame = pd.DataFrame(data=data_export)
-    styled_data_frame = data_frame.style.applymap(
-        lambda x: "text-align: center", subset=pd.IndexSlice[:, :]
-    )
-
-    response = HttpResponse(content_type="application/ms-excel")
-    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
-
-    writer = pd.ExcelWriter(response, engine="xlsxwriter")
-    styled_data_frame.to_excel(writer, index=False, sheet_name="Sheet1")
-    worksheet = writer.sheets["Sheet1"]
-    worksheet.set_column("A:Z", 18)
-    writer.close()
+    # the company formats are read once for the whole export
+    formats = export_formats(employee)
 
-    return response
+    def export_value(obj, field_name):
+        value = obj
+        nested_attributes = field_name.split("__")
+        for attr in nested_attributes:
+            value = getattr(value, attr, None)
+            if value is None:
+                break
+        if value is True:
+            value = _("Yes")
+        elif value is False:
+            value = _("No")
+        if isinstance(value, str) and value in fields_mapping:
+            value = fields_mapping[value]
+        if value == "None":
+            value = " "
+        if field_name == "month":
+            value = _(value.title())
+
+        # Check if the type of 'value' is time
+        return format_export_value(value, employee, formats)
+
+    field_names = [field_name for field_name, _verbose_name in selected_columns]
+    rows = (
+        [export_value(obj, field_name) for field_name in field_names]
+        for obj in iterate_export(export_objects, field_names)
+    )
+    return export_response(
+        file_name,
+        [verbose_name for _field_name, verbose_name in selected_columns],
+        rows,
+        request.GET.get("export_format", "xlsx"),
+    )
 
 
 def reload_queryset(fields):
@@ -667,28 +679,7 @@ def is_holiday(date):
     Returns:
         Holidays or bool: The Holidays object if the date is a holiday, otherwise False.
     """
-    holidays = Holidays.objects.all()
-    for holiday in holidays:
-        start_date = holiday.start_date
-        end_date = holiday.end_date
-        # Check if the date is within the range of the holiday dates
-        if start_date <= date <= end_date:
-            return holiday
-        # Check for recurring holidays
-        if holiday.recurring:
-            try:
-                # Create a new date object for comparison without the year
-                start_date_without_year = datetime(
-                    year=date.year, month=start_date.month, day=start_date.day
-                ).date()
-                end_date_without_year = datetime(
-                    year=date.year, month=end_date.month, day=end_date.day
-                ).date()
-                if start_date_without_year <= date <= end_date_without_year:
-                    return holiday
-            except:
-                return False
-    return False
+    return get_year_calendar(date.year).holiday(date, selected_company_id())
 
 
 def is_company_leave(input_date):
@@ -699,29 +690,9 @@ def is_company_leave(input_date):
     Returns:
         CompanyLeaves or bool: The CompanyLeaves object if the date is a company leave, otherwise False.
     """
-    # Calculate the week number within the month (1-5)
-    first_day_of_month = input_date.replace(day=1)
-    first_week_day = first_day_of_month.weekday()  # Monday is 0 and Sunday is 6
-    adjusted_day = input_date.day + first_week_day
-    date_week_no = (adjusted_day - 1) // 7
-    # Calculate the weekday (1 for Monday to 7 for Sunday)
-    date_week_day = input_date.isoweekday() - 1
-    company_leaves = CompanyLeaves.objects.all()
-    for company_leave in company_leaves:
-        week_no = (
-            company_leave.based_on_week
-            if not company_leave.based_on_week
-            else int(company_leave.based_on_week)
-        )  # from 0 for the first week to 4 for the fifth week
-        week_day = int(
-            company_leave.based_on_week_day
-        )  # from 0 to 6 for Monday to Sunday
-        if not week_no:
-            if date_week_day == week_day:
-                return company_leave
-        if date_week_no == week_no and date_week_day == week_day:
-            return company_leave
-    return False
+    return get_year_calendar(input_date.year).company_leave(
+        input_date, selected_company_id()
+    )
 
 
 def get_date_range(start_date, end_date):
@@ -754,59 +725,16 @@ def get_holiday_dates(range_start: date, range_end: date) -> list:
     """
     :return: this functions returns a list of all holiday dates.
     """
-    pay_range_dates = get_date_range(start_date=range_start, end_date=range_end)
-    query = Q()
-    for check_date in pay_range_dates:
-        query |= Q(start_date__lte=check_date, end_date__gte=check_date)
-    holidays = Holidays.objects.filter(query)
-    holiday_dates = set([])
-    for holiday in holidays:
-        holiday_dates = holiday_dates | (
-            set(
-                get_date_range(start_date=holiday.start_date, end_date=holiday.end_date)
-            )
-        )
-    return list(set(holiday_dates))
+    return holiday_dates(range_start, range_end, selected_company_id())
 
 
 def get_company_leave_dates(year):
     """
     :return: This function returns a list of all company leave dates
     """
-    company_leaves = CompanyLeaves.objects.all()
-    company_leave_dates = []
-    for company_leave in company_leaves:
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-        for month in range(1, 13):
-            if based_on_week is not None:
-                # Set Sunday as the first day of the week
-                calendar.setfirstweekday(6)
-                month_calendar = calendar.monthcalendar(year, month)
-                weeks = month_calendar[int(based_on_week)]
-                weekdays_in_weeks = [day for day in weeks if day != 0]
-                for day in weekdays_in_weeks:
-                    leave_date = datetime.strptime(
-                        f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                    ).date()
-                    if (
-                        leave_date.weekday() == int(based_on_week_day)
-                        and leave_date not in company_leave_dates
-                    ):
-                        company_leave_dates.append(leave_date)
-            else:
-                # Set Monday as the first day of the week
-                calendar.setfirstweekday(0)
-                month_calendar = calendar.monthcalendar(year, month)
-                for week in month_calendar:
-                    if week[int(based_on_week_day)] != 0:
-                        leave_date = datetime.strptime(
-                            f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                            "%Y-%m-%d",
-                        ).date()
-                        if leave_date not in company_leave_dates:
-                            company_leave_dates.append(leave_date)
-    return company_leave_dates
+    return company_leave_dates(
+        date(year, 1, 1), date(year, 12, 31), selected_company_id()
+    )
 
 
 def get_working_days(start_date, end_date):
@@ -818,31 +746,13 @@ def get_working_days(start_date, end_date):
         end_date (_type_): the end date till the date needed
     """
 
-    holiday_dates = get_holiday_dates(start_date, end_date)
-
-    # appending company/holiday leaves
-    # Note: Duplicate entry may exist
-    company_leave_dates = (
-        list(
-            set(
-                get_company_leave_dates(start_date.year)
-                + get_company_leave_dates(end_date.year)
-            )
-        )
-        + holiday_dates
-    )
+    # company/holiday leave dates between the start and end date
+    company_leave_dates = off_dates(start_date, end_date, selected_company_id())
+    leave_dates = set(company_leave_dates)
 
-    date_range = get_date_range(start_date, end_date)
-
-    # making unique list of company/holiday leave dates then filtering
-    # the leave dates only between the start and end date
-    company_leave_dates = [
-        date
-        for date in list(set(company_leave_dates))
-        if start_date <= date <= end_date
+    working_days_between_ranges = [
+        day for day in get_date_range(start_date, end_date) if day not in leave_dates
     ]
-
-    working_days_between_ranges = list(set(date_range) - set(company_leave_dates))
     total_working_days = len(working_days_between_ranges)
 
     return {
@@ -1522,6 +1522,73 @@ class EmailLog(models.Model):
     )
 
 
+class MailOutbox(models.Model):
+    """
+    Mails waiting to be delivered by the send_outbox_mails command, see
+    base.mail_outbox
+    """
+
+    statuses = [("queued", "Queued"), ("sent", "Sent"), ("failed", "Failed")]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default="plain")
+    from_email = models.CharField(max_length=255, null=True)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    # [content, mimetype] pairs
+    alternatives = models.JSONField(default=list)
+    # [filename, base64 content, mimetype] triples
+    attachments = models.JSONField(default=list)
+    configuration = models.ForeignKey(
+        DynamicEmailConfiguration, on_delete=models.SET_NULL, null=True
+    )
+    status = models.CharField(max_length=6, choices=statuses, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=django.utils.timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.subject} ({self.status})"
+
+
+class SchedulerLease(models.Model):
+    """
+    Lease of the leader scheduler runner, only the run_scheduler process
+    holding it runs the scheduled jobs, see horilla.horilla_scheduler
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=255, null=True)
+    expires_at = models.DateTimeField(default=django.utils.timezone.now)
+    objects = models.Manager()
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.owner})"
+
+
+class CacheVersion(models.Model):
+    """
+    Version of a cached data set, shared by all the processes, a new version
+    makes every process rebuild its cached copy, see base.working_calendar
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.CharField(max_length=32)
+    objects = models.Manager()
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.version})"
+
+
 class DriverViewed(models.Model):
     """
     Model to store driver viewed status
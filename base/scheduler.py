@@ -2,9 +2,10 @@ import calendar
 import datetime as dt
 from datetime import date, datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from django.urls import reverse
 
+from horilla.horilla_scheduler import scheduled_job
+from horilla.horilla_settings import SCHEDULER_HISTORY_DAYS
 from notifications.signals import notify
 
 
@@ -108,6 +109,7 @@ def work_type_rotate_every(rotating_work_type):
     return
 
 
+@scheduled_job("interval", minutes=5)
 def rotate_work_type():
     """
     This method will identify the based on condition to the rotating shift assign
@@ -173,10 +175,11 @@ def update_rotating_shift_assign(rotating_shift, new_date):
     return
 
 
-def shift_rotate_after_day(rotating_shift, today=datetime.now()):
+def shift_rotate_after_day(rotating_shift, today=None):
     """
     This method for rotate shift based on after day
     """
+    today = today or datetime.now()
     switch_date = rotating_shift.next_change_date
     if switch_date.strftime("%Y-%m-%d") == today.strftime("%Y-%m-%d"):
         # calculate the next work type switch date
@@ -185,10 +188,11 @@ def shift_rotate_after_day(rotating_shift, today=datetime.now()):
     return
 
 
-def shift_rotate_weekend(rotating_shift, today=datetime.now()):
+def shift_rotate_weekend(rotating_shift, today=None):
     """
     This method for rotate shift based on weekend
     """
+    today = today or datetime.now()
     switch_date = rotating_shift.next_change_date
     if switch_date.strftime("%Y-%m-%d") == today.strftime("%Y-%m-%d"):
         # calculate the next work type switch date
@@ -200,10 +204,11 @@ def shift_rotate_weekend(rotating_shift, today=datetime.now()):
     return
 
 
-def shift_rotate_every(rotating_shift, today=datetime.now()):
+def shift_rotate_every(rotating_shift, today=None):
     """
     This method for rotate shift based on every month
     """
+    today = today or datetime.now()
     switch_date = rotating_shift.next_change_date
     day_date = rotating_shift.rotate_every
     if switch_date.strftime("%Y-%m-%d") == today.strftime("%Y-%m-%d"):
@@ -220,6 +225,7 @@ def shift_rotate_every(rotating_shift, today=datetime.now()):
     return
 
 
+@scheduled_job("interval", minutes=5)
 def rotate_shift():
     """
     This method will identify the based on condition to the rotating shift assign
@@ -244,6 +250,7 @@ def rotate_shift():
     return
 
 
+@scheduled_job("interval", minutes=5)
 def switch_shift():
     """
     This method change employees shift information regards to the shift request
@@ -283,6 +290,7 @@ def switch_shift():
     return
 
 
+@scheduled_job("interval", minutes=5)
 def undo_shift():
     """
     This method undo previous employees shift information regards to the shift request
@@ -325,6 +333,7 @@ def undo_shift():
     return
 
 
+@scheduled_job("interval", minutes=5)
 def switch_work_type():
     """
     This method change employees work type information regards to the work type request
@@ -365,6 +374,7 @@ def switch_work_type():
     return
 
 
+@scheduled_job("interval", minutes=5)
 def undo_work_type():
     """
     This method undo previous employees work type information regards to the work type request
@@ -407,6 +417,7 @@ def undo_work_type():
     return
 
 
+@scheduled_job("interval", hours=4)
 def recurring_holiday():
     from .models import Holidays
 
@@ -429,66 +440,14 @@ def recurring_holiday():
         recurring_holiday.save()
 
 
-scheduler = BackgroundScheduler()
-
-# Set the initial start time to the current time
-start_time = datetime.now()
-
-# Add jobs with next_run_time set to the end of the previous job
-try:
-    scheduler.add_job(rotate_shift, "interval", minutes=5, id="job1")
-except:
-    pass
+@scheduled_job("interval", days=1)
+def delete_old_job_executions():
+    """
+    This method deletes the runs of the scheduled jobs older than
+    SCHEDULER_HISTORY_DAYS
+    """
+    from django_apscheduler.models import DjangoJobExecution
 
-try:
-    scheduler.add_job(
-        rotate_work_type,
-        "interval",
-        minutes=5,
-        id="job2",
-    )
-except:
-    pass
-
-try:
-    scheduler.add_job(
-        undo_shift,
-        "interval",
-        minutes=5,
-        id="job3",
+    DjangoJobExecution.objects.delete_old_job_executions(
+        SCHEDULER_HISTORY_DAYS * 24 * 60 * 60
     )
-except:
-    pass
-
-try:
-    scheduler.add_job(
-        switch_shift,
-        "interval",
-        minutes=5,
-        id="job4",
-    )
-except:
-    pass
-
-try:
-    scheduler.add_job(
-        undo_work_type,
-        "interval",
-        minutes=5,
-        id="job6",
-    )
-except:
-    pass
-
-try:
-    scheduler.add_job(
-        switch_work_type,
-        "interval",
-        minutes=5,
-        id="job5",
-    )
-except:
-    pass
-
-scheduler.add_job(recurring_holiday, "interval", hours=4)
-scheduler.start()
@@ -0,0 +1,26 @@
+"""
+signals.py
+
+Signal receivers of the base app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from base.models import CompanyLeaves, Holidays
+from base.working_calendar import invalidate_working_calendar
+from horilla.signals import post_bulk_update
+
+
+@receiver(post_save, sender=Holidays)
+@receiver(post_delete, sender=Holidays)
+@receiver(post_bulk_update, sender=Holidays)
+@receiver(post_save, sender=CompanyLeaves)
+@receiver(post_delete, sender=CompanyLeaves)
+@receiver(post_bulk_update, sender=CompanyLeaves)
+def refresh_working_calendar(sender, **kwargs):
+    """
+    Invalidate the precomputed working calendar when holidays or company
+    leaves change
+    """
+    invalidate_working_calendar()
@@ -1,3 +1,66 @@
+"""
+Test cases of the base app
+"""
+
 from django.test import TestCase
 
-# Create your tests here.
+from base.horilla_company_manager import set_selected_company
+from base.models import Company, Department
+from employee.models import Employee, EmployeeWorkInformation
+
+
+class HorillaCompanyManagerTests(TestCase):
+    """
+    The company scope is applied without counting the rows first
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.companies = []
+        for index in range(2):
+            company = Company(
+                company=f"Company {index}",
+                hq=not index,
+                address="Address",
+                country="Country",
+                state="State",
+                city="City",
+                zip="000000",
+            )
+            company.save()
+            cls.companies.append(company)
+            for number in range(3):
+                employee = Employee(
+                    employee_first_name=f"Employee {index}{number}",
+                    email=f"employee{index}{number}@example.com",
+                    phone="1234567890",
+                )
+                employee.save()
+                EmployeeWorkInformation.objects.update_or_create(
+                    employee_id=employee, defaults={"company_id": company}
+                )
+            department = Department(department=f"Department {index}")
+            department.save()
+            department.company_id.add(company)
+
+    def tearDown(self):
+        set_selected_company(None)
+
+    def test_scoped_listing_runs_a_single_query(self):
+        set_selected_company(self.companies[0].id)
+        with self.assertNumQueries(1):
+            employees = list(Employee.objects.all())
+        self.assertEqual(len(employees), 3)
+
+    def test_many_valued_scope_runs_a_single_query(self):
+        set_selected_company(self.companies[1].id)
+        with self.assertNumQueries(1):
+            departments = list(Department.objects.all())
+        self.assertEqual(
+            [department.department for department in departments], ["Department 1"]
+        )
+
+    def test_unscoped_listing_runs_a_single_query(self):
+        with self.assertNumQueries(1):
+            employees = list(Employee.objects.all())
+        self.assertEqual(len(employees), 6)
@@ -0,0 +1,301 @@
+"""
+working_calendar.py
+
+Precomputed holiday and company leave calendar.
+
+Every company's holiday and weekly-off dates are materialised once per year
+into integer bitsets (bit ``n`` is the ``n``-th day of the year) and kept in
+the Django cache. The holiday/company leave helpers in ``base.methods`` answer
+from this index without touching the database. Saving or deleting a
+``Holidays``/``CompanyLeaves`` row bumps the version stored in the database
+(see ``base.signals``). Every process reads that version again after
+WORKING_CALENDAR_VERSION_SECONDS, so the web workers, the scheduler and the
+payroll workers all rebuild the affected years, whatever the cache backend.
+"""
+
+import calendar
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.cache import cache
+
+from base.horilla_company_manager import get_selected_company
+from base.models import CacheVersion, CompanyLeaves, Holidays
+from horilla.horilla_settings import WORKING_CALENDAR_VERSION_SECONDS
+
+VERSION_NAME = "working_calendar"
+CACHE_KEY = "base_working_calendar_{version}_{year}"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Version read from the database by this process and when it was read
+_version = {"value": None, "read_at": 0.0}
+
+# Company leave weeks are counted on a Sunday first calendar
+_WEEK_CALENDAR = calendar.Calendar(firstweekday=calendar.SUNDAY)
+
+
+class YearCalendar:
+    """
+    Holiday and company leave index of a single year for every company.
+
+    The bitset dicts are keyed by company id, ``None`` holds the rows that
+    are not bound to any company and apply to all of them.
+    """
+
+    def __init__(self, year):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        # Holiday ranges of this year, recurring holidays are not included
+        self.holidays = {}
+        # Holidays including recurring ones, offset -> Holidays instance
+        self.holiday_on = {}
+        self.company_leaves = {}
+        # offset -> CompanyLeaves instance
+        self.company_leave_on = {}
+
+    def offset(self, day):
+        """
+        Day of the year (starting from 0) of the given date
+        """
+        return (day - self.first_day).days
+
+    def _mark(self, bits, lookup, company_id, start, end, instance):
+        start = max(start, self.first_day)
+        end = min(end, date(self.year, 12, 31))
+        if start > end:
+            return
+        first, last = self.offset(start), self.offset(end)
+        if bits is not None:
+            bits[company_id] = bits.get(company_id, 0) | (
+                ((1 << (last - first + 1)) - 1) << first
+            )
+        company_lookup = lookup.setdefault(company_id, {})
+        for offset in range(first, last + 1):
+            company_lookup.setdefault(offset, instance)
+
+    def add_holiday(self, holiday):
+        """
+        Index the holiday and its recurring occurrence in this year
+        """
+        end_date = holiday.end_date or holiday.start_date
+        self._mark(
+            self.holidays,
+            self.holiday_on,
+            holiday.company_id_id,
+            holiday.start_date,
+            end_date,
+            holiday,
+        )
+        if not holiday.recurring:
+            return
+        try:
+            start = holiday.start_date.replace(year=self.year)
+            end = end_date.replace(year=self.year)
+        except ValueError:
+            # 29th February on a non leap year
+            return
+        if end < start:
+            # The holiday runs over the new year
+            self._mark(
+                None,
+                self.holiday_on,
+                holiday.company_id_id,
+                self.first_day,
+                end,
+                holiday,
+            )
+            end = date(self.year, 12, 31)
+        self._mark(None, self.holiday_on, holiday.company_id_id, start, end, holiday)
+
+    def add_company_leave(self, company_leave):
+        """
+        Index every occurrence of the company leave in this year
+        """
+        week_day = int(company_leave.based_on_week_day)
+        based_on_week = company_leave.based_on_week
+        company_id = company_leave.company_id_id
+        for month in range(1, 13):
+            if based_on_week is not None:
+                weeks = _WEEK_CALENDAR.monthdayscalendar(self.year, month)
+                week_no = int(based_on_week)
+                days = weeks[week_no] if week_no < len(weeks) else []
+            else:
+                days = range(1, calendar.monthrange(self.year, month)[1] + 1)
+            for day in days:
+                if not day:
+                    continue
+                leave_date = date(self.year, month, day)
+                if leave_date.weekday() == week_day:
+                    self._mark(
+                        self.company_leaves,
+                        self.company_leave_on,
+                        company_id,
+                        leave_date,
+                        leave_date,
+                        company_leave,
+                    )
+
+    @staticmethod
+    def _scoped(mapping, company_id):
+        """
+        Values applicable to the company, every value when company_id is None
+        """
+        if company_id is None:
+            return list(mapping.values())
+        return [
+            value
+            for value in (mapping.get(company_id), mapping.get(None))
+            if value is not None
+        ]
+
+    def holiday_bits(self, company_id=None):
+        bits = 0
+        for value in self._scoped(self.holidays, company_id):
+            bits |= value
+        return bits
+
+    def company_leave_bits(self, company_id=None):
+        bits = 0
+        for value in self._scoped(self.company_leaves, company_id):
+            bits |= value
+        return bits
+
+    def holiday(self, day, company_id=None):
+        offset = self.offset(day)
+        for lookup in self._scoped(self.holiday_on, company_id):
+            if offset in lookup:
+                return lookup[offset]
+        return False
+
+    def company_leave(self, day, company_id=None):
+        offset = self.offset(day)
+        for lookup in self._scoped(self.company_leave_on, company_id):
+            if offset in lookup:
+                return lookup[offset]
+        return False
+
+
+def _build_year(year):
+    year_calendar = YearCalendar(year)
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    holidays = Holidays._base_manager.order_by("id")
+    for holiday in holidays:
+        end_date = holiday.end_date or holiday.start_date
+        if holiday.recurring or (
+            holiday.start_date <= last_day and end_date >= first_day
+        ):
+            year_calendar.add_holiday(holiday)
+    for company_leave in CompanyLeaves._base_manager.order_by("id"):
+        year_calendar.add_company_leave(company_leave)
+    return year_calendar
+
+
+def _cache_version():
+    """
+    Version of the calendar, read from the database at most once every
+    WORKING_CALENDAR_VERSION_SECONDS by a process
+    """
+    now = time.monotonic()
+    if (
+        _version["value"] is None
+        or now - _version["read_at"] >= WORKING_CALENDAR_VERSION_SECONDS
+    ):
+        version, _created = CacheVersion.objects.get_or_create(
+            name=VERSION_NAME, defaults={"version": uuid.uuid4().hex}
+        )
+        _version.update(value=version.version, read_at=now)
+    return _version["value"]
+
+
+def invalidate_working_calendar():
+    """
+    Drop every precomputed year, called when holidays or company leaves change
+    """
+    version = uuid.uuid4().hex
+    CacheVersion.objects.update_or_create(
+        name=VERSION_NAME, defaults={"version": version}
+    )
+    _version.update(value=version, read_at=time.monotonic())
+
+
+def get_year_calendar(year):
+    """
+    Return the YearCalendar of the year, building and caching it if needed
+    """
+    key = CACHE_KEY.format(version=_cache_version(), year=year)
+    year_calendar = cache.get(key)
+    if year_calendar is None:
+        year_calendar = _build_year(year)
+        cache.set(key, year_calendar, CACHE_TIMEOUT)
+    return year_calendar
+
+
+def selected_company_id():
+    """
+    Company the current request is scoped to, None when all companies apply.
+    Mirrors the scoping done by HorillaCompanyManager.
+    """
+    return get_selected_company()
+
+
+def _iter_set_days(start_date, end_date, bits_for_year):
+    """
+    Yield every date between start_date and end_date marked in the bitsets
+    """
+    if start_date > end_date:
+        return
+    for year in range(start_date.year, end_date.year + 1):
+        year_calendar = get_year_calendar(year)
+        bits = bits_for_year(year_calendar)
+        if not bits:
+            continue
+        first = year_calendar.offset(max(start_date, year_calendar.first_day))
+        last = year_calendar.offset(min(end_date, date(year, 12, 31)))
+        bits >>= first
+        for offset in range(first, last + 1):
+            if bits & 1:
+                yield year_calendar.first_day + timedelta(days=offset)
+            bits >>= 1
+            if not bits:
+                break
+
+
+def holiday_dates(start_date, end_date, company_id=None):
+    """
+    Holiday dates between start_date and end_date
+    """
+    return list(
+        _iter_set_days(
+            start_date,
+            end_date,
+            lambda year_calendar: year_calendar.holiday_bits(company_id),
+        )
+    )
+
+
+def company_leave_dates(start_date, end_date, company_id=None):
+    """
+    Company leave dates between start_date and end_date
+    """
+    return list(
+        _iter_set_days(
+            start_date,
+            end_date,
+            lambda year_calendar: year_calendar.company_leave_bits(company_id),
+        )
+    )
+
+
+def off_dates(start_date, end_date, company_id=None):
+    """
+    Holiday and company leave dates between start_date and end_date
+    """
+    return list(
+        _iter_set_days(
+            start_date,
+            end_date,
+            lambda year_calendar: year_calendar.holiday_bits(company_id)
+            | year_calendar.company_leave_bits(company_id),
+        )
+    )
@@ -0,0 +1,421 @@
+"""
+This module records the punches pulled from the biometric devices in bulk.
+
+A batch of raw punches is resolved to employees with one query, sorted and
+deduplicated per employee, and replayed in memory with the check-in/check-out
+semantics of ``attendance.views.clock_in_out``. The attendance activities are
+written with bulk queries and every attendance touched by the batch is saved
+once, with its first check-in and last check-out.
+"""
+
+import logging
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone as django_timezone
+
+from attendance.methods.utils import (
+    activity_datetime,
+    format_time,
+    overtime_calculation,
+    shift_schedule_today,
+    strtime_seconds,
+)
+from attendance.models import Attendance, AttendanceActivity, AttendanceLateComeEarlyOut
+from attendance.views.clock_in_out import early_out, late_come
+from attendance.views.views import attendance_validate
+from base.models import EmployeeShiftDay
+from employee.models import Employee
+
+from .models import BiometricEmployees
+
+logger = logging.getLogger(__name__)
+
+# A punch as read from a device, datetime is timezone aware
+Punch = namedtuple("Punch", ["device_user_id", "datetime", "clock_in"])
+
+MID_DAY_SECONDS = strtime_seconds("12:00")
+
+
+def zk_punches(attendances):
+    """
+    Convert the attendance records of a ZK device to punches
+    """
+    return [
+        Punch(
+            attendance.user_id,
+            django_timezone.make_aware(attendance.timestamp),
+            attendance.punch in {0, 3, 4},
+        )
+        for attendance in attendances
+    ]
+
+
+def cosec_punches(attendances):
+    """
+    Convert the COSEC attendance events to punches, the events whose punch
+    code is neither a check-in nor a check-out are skipped.
+    """
+    punches = []
+    for attendance in attendances:
+        punch_code = attendance["detail-2"]
+        if punch_code in ["1", "3", "5", "7", "9", "0"]:
+            clock_in = True
+        elif punch_code in ["2", "4", "6", "8", "10"]:
+            clock_in = False
+        else:
+            continue
+        if not str(attendance["detail-1"]).isdigit():
+            continue
+        attendance_datetime = datetime.combine(
+            datetime.strptime(attendance["date"], "%d/%m/%Y").date(),
+            datetime.strptime(attendance["time"], "%H:%M:%S").time(),
+        )
+        punches.append(
+            Punch(
+                int(attendance["detail-1"]),
+                django_timezone.make_aware(attendance_datetime),
+                clock_in,
+            )
+        )
+    return punches
+
+
+def biometric_employee_ids(field, device_user_ids):
+    """
+    Map the device user ids to employee ids with a single query
+
+    Args:
+        field (str): BiometricEmployees field holding the device user id
+        device_user_ids (iterable): user ids found in the punches
+
+    Returns:
+        dict: str(device user id) -> employee id
+    """
+    return {
+        str(device_user_id): employee_id
+        for device_user_id, employee_id in BiometricEmployees.objects.filter(
+            **{f"{field}__in": set(device_user_ids)}
+        ).values_list(field, "employee_id")
+    }
+
+
+def badge_employee_ids(badge_ids):
+    """
+    Map the badge ids to employee ids with a single query
+    """
+    return {
+        str(badge_id): employee_id
+        for badge_id, employee_id in Employee._base_manager.filter(
+            badge_id__in=set(badge_ids)
+        ).values_list("badge_id", "id")
+    }
+
+
+class PunchIngestion:
+    """
+    Replays the punches of a batch on the attendance state of its employees
+    """
+
+    def __init__(self, employee_punches):
+        self.employee_punches = employee_punches
+        employee_ids = list(employee_punches)
+        punch_dates = [
+            punched_at.date()
+            for punches in employee_punches.values()
+            for punched_at, _clock_in in punches
+        ]
+        # night shift punches before noon belong to the previous day
+        start_date, end_date = min(punch_dates) - timedelta(days=1), max(punch_dates)
+
+        self.employees = Employee._base_manager.select_related(
+            "employee_work_info__shift_id",
+            "employee_work_info__work_type_id",
+        ).in_bulk(employee_ids)
+        self.days = {day.day: day for day in EmployeeShiftDay.objects.all()}
+        self.schedules = {}
+        self.attendances = {
+            (attendance.employee_id_id, attendance.attendance_date): attendance
+            for attendance in Attendance._base_manager.filter(
+                employee_id__in=employee_ids,
+                attendance_date__range=(start_date, end_date),
+            )
+        }
+        self.activities = defaultdict(list)
+        for activity in AttendanceActivity._base_manager.filter(
+            Q(attendance_date__range=(start_date, end_date))
+            | Q(clock_out__isnull=True),
+            employee_id__in=employee_ids,
+        ).order_by("attendance_date", "id"):
+            self.activities[activity.employee_id_id].append(activity)
+
+        self.created_activities = []
+        self.updated_activities = {}
+        self.created_attendances = set()
+        self.reopened_attendances = set()
+        self.clocked_out_attendances = set()
+        self.last_punch = {}
+        self.recorded = 0
+
+    def schedule(self, day, shift):
+        """
+        Cached minimum hour, start and end seconds of the shift on the day
+        """
+        key = (day.id, shift.id if shift else None)
+        if key not in self.schedules:
+            self.schedules[key] = shift_schedule_today(day=day, shift=shift)
+        return self.schedules[key]
+
+    def attendance(self, employee_id, attendance_date):
+        key = (employee_id, attendance_date)
+        if key not in self.attendances:
+            # clock out of an activity opened before the batch
+            self.attendances[key] = Attendance._base_manager.filter(
+                employee_id=employee_id, attendance_date=attendance_date
+            ).first()
+        return self.attendances[key]
+
+    def clock_in(self, employee, work_info, punched_at):
+        """
+        Same as attendance.views.clock_in_out.clock_in
+        """
+        activities = self.activities[employee.id]
+        punch_date, punch_time = punched_at.date(), punched_at.time()
+        if any(
+            activity.clock_in_date == punch_date and activity.clock_in == punch_time
+            for activity in activities
+        ):
+            # already recorded by an earlier pull
+            return
+        shift = work_info.shift_id
+        attendance_date = punch_date
+        day = self.days[punch_date.strftime("%A").lower()]
+        minimum_hour, start_time_sec, end_time_sec = self.schedule(day, shift)
+        if (
+            start_time_sec > end_time_sec
+            and strtime_seconds(punch_time.strftime("%H:%M")) < MID_DAY_SECONDS
+        ):
+            attendance_date = punch_date - timedelta(days=1)
+            day = self.days[attendance_date.strftime("%A").lower()]
+            minimum_hour, start_time_sec, end_time_sec = self.schedule(day, shift)
+
+        open_activity = next(
+            (
+                activity
+                for activity in activities
+                if activity.clock_out is None
+                and activity.attendance_date == attendance_date
+                and activity.clock_in_date == punch_date
+                and activity.shift_day_id == day.id
+            ),
+            None,
+        )
+        if open_activity is not None:
+            open_activity.clock_out = punch_time
+            open_activity.clock_out_date = punch_date
+            if open_activity.pk:
+                self.updated_activities[open_activity.pk] = open_activity
+        activity = AttendanceActivity(
+            employee_id=employee,
+            attendance_date=attendance_date,
+            clock_in_date=punch_date,
+            shift_day=day,
+            clock_in=punch_time,
+            in_datetime=punched_at,
+        )
+        activities.append(activity)
+        self.created_activities.append(activity)
+
+        key = (employee.id, attendance_date)
+        attendance = self.attendances.get(key)
+        if attendance is None:
+            attendance = Attendance(
+                employee_id=employee,
+                shift_id=shift,
+                work_type_id=work_info.work_type_id,
+                attendance_date=attendance_date,
+                attendance_day=day,
+                attendance_clock_in=punch_time.replace(second=0, microsecond=0),
+                attendance_clock_in_date=punch_date,
+                minimum_hour=minimum_hour,
+            )
+            self.attendances[key] = attendance
+            self.created_attendances.add(key)
+        else:
+            attendance.attendance_clock_out = None
+            attendance.attendance_clock_out_date = None
+            if attendance.pk:
+                self.reopened_attendances.add(key)
+        self.last_punch[key] = True
+        self.recorded += 1
+
+    def clock_out(self, employee, punched_at):
+        """
+        Same as attendance.views.clock_in_out.clock_out
+        """
+        activities = self.activities[employee.id]
+        punch_date, punch_time = punched_at.date(), punched_at.time()
+        if any(
+            activity.clock_out_date == punch_date and activity.clock_out == punch_time
+            for activity in activities
+        ):
+            return
+        open_activities = [
+            activity for activity in activities if activity.clock_out is None
+        ]
+        if not open_activities:
+            logger.error(
+                "No attendance clock in activity found that needs clocking out."
+            )
+            return
+        # latest attendance date, latest activity of the date
+        activity = max(
+            reversed(open_activities), key=lambda activity: activity.attendance_date
+        )
+        activity.clock_out = punch_time
+        activity.clock_out_date = punch_date
+        activity.out_datetime = punched_at
+        if activity.pk:
+            self.updated_activities[activity.pk] = activity
+
+        attendance = self.attendance(employee.id, activity.attendance_date)
+        if attendance is None:
+            return
+        key = (employee.id, activity.attendance_date)
+        attendance.attendance_clock_out = punch_time.replace(second=0, microsecond=0)
+        attendance.attendance_clock_out_date = punch_date
+        self.clocked_out_attendances.add(key)
+        self.last_punch[key] = False
+        self.recorded += 1
+
+    def replay(self):
+        for employee_id, punches in self.employee_punches.items():
+            employee = self.employees.get(employee_id)
+            if employee is None:
+                continue
+            try:
+                work_info = employee.employee_work_info
+            except ObjectDoesNotExist:
+                continue
+            for punched_at, clock_in in sorted(punches):
+                if clock_in:
+                    self.clock_in(employee, work_info, punched_at)
+                else:
+                    self.clock_out(employee, punched_at)
+
+    def worked_seconds(self, employee_id, attendance_date):
+        duration = 0
+        for activity in self.activities[employee_id]:
+            if (
+                activity.attendance_date != attendance_date
+                or activity.clock_out is None
+            ):
+                continue
+            in_datetime, out_datetime = activity_datetime(activity)
+            difference = out_datetime - in_datetime
+            duration += difference.days * 24 * 3600 + difference.seconds
+        return duration
+
+    def save(self):
+        """
+        Write the activities in bulk and save every touched attendance once
+
+        The activities and the attendances are written in one transaction, a
+        failing attendance rolls the whole batch back and the error is raised,
+        so the punches are recorded again by the next ingestion instead of
+        being skipped as already recorded activities.
+        """
+        with transaction.atomic():
+            AttendanceActivity._base_manager.bulk_update(
+                list(self.updated_activities.values()),
+                ["clock_out", "clock_out_date", "out_datetime"],
+            )
+            AttendanceActivity._base_manager.bulk_create(self.created_activities)
+            self.save_attendances()
+
+    def save_attendances(self):
+        reopened = [self.attendances[key].pk for key in self.reopened_attendances]
+        if reopened:
+            # a check-in after the check-out removes the early out
+            AttendanceLateComeEarlyOut.objects.filter(
+                type="early_out", attendance_id__in=reopened
+            ).delete()
+        early_outs = set(
+            AttendanceLateComeEarlyOut.objects.filter(
+                type="early_out",
+                attendance_id__in=[
+                    self.attendances[key].pk
+                    for key in self.clocked_out_attendances
+                    if self.attendances[key].pk
+                ],
+            ).values_list("attendance_id", flat=True)
+        )
+
+        for key, clocked_in in self.last_punch.items():
+            attendance = self.attendances[key]
+            shift = self.employees[key[0]].employee_work_info.shift_id
+            try:
+                if key in self.clocked_out_attendances:
+                    attendance.attendance_worked_hour = format_time(
+                        self.worked_seconds(*key)
+                    )
+                    attendance.attendance_overtime = overtime_calculation(attendance)
+                    attendance.attendance_validated = attendance_validate(attendance)
+                attendance.save()
+                _minimum_hour, start_time_sec, end_time_sec = self.schedule(
+                    attendance.attendance_day, shift
+                )
+                if key in self.created_attendances:
+                    late_come(
+                        attendance=attendance,
+                        start_time=start_time_sec,
+                        end_time=end_time_sec,
+                        shift=shift,
+                    )
+                if not clocked_in and attendance.pk not in early_outs:
+                    early_out(
+                        attendance=attendance,
+                        start_time=start_time_sec,
+                        end_time=end_time_sec,
+                        shift=shift,
+                    )
+            except Exception as error:
+                logger.error(
+                    "Got an error while saving the attendance of employee %s on %s %s",
+                    key[0],
+                    key[1],
+                    error,
+                )
+                raise
+
+
+def ingest_punches(punches, employee_ids):
+    """
+    Record a batch of punches of a device as attendance activities and
+    attendances
+
+    Args:
+        punches (list): Punch tuples
+        employee_ids (dict): str(device user id) -> employee id, see
+            biometric_employee_ids and badge_employee_ids
+
+    Returns:
+        int: number of punches recorded
+    """
+    employee_punches = defaultdict(set)
+    for punch in punches:
+        employee_id = employee_ids.get(str(punch.device_user_id))
+        if employee_id is None:
+            continue
+        employee_punches[employee_id].add(
+            (django_timezone.localtime(punch.datetime), punch.clock_in)
+        )
+    if not employee_punches:
+        return 0
+    ingestion = PunchIngestion(employee_punches)
+    ingestion.replay()
+    ingestion.save()
+    return ingestion.recorded
@@ -0,0 +1,52 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from biometric.poller import DevicePoller
+from horilla.horilla_settings import (
+    BIO_POLLER_BATCH_SIZE,
+    BIO_POLLER_INTERVAL,
+    BIO_POLLER_WORKERS,
+)
+
+
+class Command(BaseCommand):
+    help = "Poll the biometric devices in live capture mode and record their punches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=BIO_POLLER_WORKERS,
+            help="Number of threads reading the devices",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=BIO_POLLER_INTERVAL,
+            help="Seconds between two reads of a device",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BIO_POLLER_BATCH_SIZE,
+            help="Number of punches recorded at a time",
+        )
+
+    def handle(self, *args, **options):
+        poller = DevicePoller(
+            workers=options["workers"],
+            interval=options["interval"],
+            batch_size=options["batch_size"],
+        )
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, poller.stop)
+            await poller.run()
+
+        self.stdout.write(self.style.SUCCESS("Biometric poller started"))
+        asyncio.run(main())
+        self.stdout.write(self.style.SUCCESS("Biometric poller stopped"))
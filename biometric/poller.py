@@ -0,0 +1,336 @@
+"""
+This module polls the biometric devices in live capture mode.
+
+A single DevicePoller drives every live device from one asyncio loop. The
+blocking device calls run on a bounded thread pool, the punches read from
+the devices are queued and recorded in batches by one consumer, see
+biometric.ingestion. The fetch checkpoint of a device is written once per
+batch, after its punches are recorded, and a device is read again only once
+its previous punches are recorded, from the checkpoint saved last.
+
+The poller runs in its own process, started with ``manage.py biometric_poller``,
+and picks up the devices switched to live mode from the UI.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.db import close_old_connections
+from zk import ZK
+
+from horilla.horilla_settings import (
+    BIO_POLLER_BATCH_SIZE,
+    BIO_POLLER_INTERVAL,
+    BIO_POLLER_WORKERS,
+)
+
+from .cosec import COSECBiometric
+from .ingestion import biometric_employee_ids, cosec_punches, ingest_punches, zk_punches
+from .models import BiometricDevices, COSECAttendanceArguments
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two reloads of the live devices
+REFRESH_INTERVAL = 30
+# Upper bound of the wait before retrying a failing device
+MAX_BACKOFF = 300
+
+
+class ZKReader:
+    """
+    Reads the new attendance records of a ZK device
+    """
+
+    user_id_field = "user_id"
+
+    def __init__(self, device):
+        self.device_id = device.id
+        self.machine_ip = device.machine_ip
+        self.port = device.port
+        self.conn = None
+        # record count of the device at the last recorded read
+        self.records = None
+        self.read_records = None
+        self.last_fetch = (
+            datetime.combine(device.last_fetch_date, device.last_fetch_time)
+            if device.last_fetch_date and device.last_fetch_time
+            else None
+        )
+
+    def read(self):
+        """
+        The device log is downloaded only when its record count changed,
+        pyzk has no way to read a part of it.
+
+        Returns:
+            tuple: punches newer than the last fetch, checkpoint of the read
+        """
+        if self.conn is None:
+            self.conn = ZK(
+                self.machine_ip,
+                port=self.port,
+                timeout=5,
+                password=0,
+                force_udp=False,
+                ommit_ping=False,
+            ).connect()
+        self.conn.read_sizes()
+        self.read_records = self.conn.records
+        if self.records is not None and self.read_records == self.records:
+            return [], None
+        attendances = [
+            attendance
+            for attendance in self.conn.get_attendance()
+            if self.last_fetch is None or attendance.timestamp > self.last_fetch
+        ]
+        if not attendances:
+            self.records = self.read_records
+            return [], None
+        checkpoint = max(attendance.timestamp for attendance in attendances)
+        return zk_punches(attendances), checkpoint
+
+    def advance(self, checkpoint):
+        """
+        Move the cursor past the punches recorded up to the checkpoint
+        """
+        self.last_fetch = checkpoint
+        self.records = self.read_records
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.disconnect()
+            except Exception as error:
+                logger.error("Got an error while disconnecting %s", error)
+            self.conn = None
+
+    @staticmethod
+    def save_checkpoint(device_id, checkpoint):
+        BiometricDevices.objects.filter(id=device_id).update(
+            last_fetch_date=checkpoint.date(), last_fetch_time=checkpoint.time()
+        )
+
+
+class COSECReader:
+    """
+    Reads the new attendance events of a COSEC device
+    """
+
+    user_id_field = "ref_user_id"
+
+    def __init__(self, device):
+        self.device_id = device.id
+        self.cosec = COSECBiometric(
+            device.machine_ip,
+            device.port,
+            device.cosec_username,
+            device.cosec_password,
+            timeout=10,
+        )
+        device_args = COSECAttendanceArguments.objects.filter(device_id=device).first()
+        self.roll_over_count = (
+            int(device_args.last_fetch_roll_ovr_count) if device_args else 0
+        )
+        self.seq_number = int(device_args.last_fetch_seq_number) if device_args else 1
+
+    def read(self):
+        attendances = self.cosec.get_attendance_events(
+            self.roll_over_count, self.seq_number + 1
+        )
+        if not isinstance(attendances, list):
+            raise ConnectionError(f"COSEC device answered {attendances}")
+        if not attendances:
+            return [], None
+        return cosec_punches(attendances), (
+            int(attendances[-1]["roll-over-count"]),
+            int(attendances[-1]["seq-No"]),
+        )
+
+    def advance(self, checkpoint):
+        """
+        Move the cursor past the events recorded up to the checkpoint
+        """
+        self.roll_over_count, self.seq_number = checkpoint
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def save_checkpoint(device_id, checkpoint):
+        COSECAttendanceArguments.objects.update_or_create(
+            device_id_id=device_id,
+            defaults={
+                "last_fetch_roll_ovr_count": checkpoint[0],
+                "last_fetch_seq_number": checkpoint[1],
+            },
+        )
+
+
+READERS = {"zk": ZKReader, "cosec": COSECReader}
+
+
+class DevicePoller:
+    """
+    Supervises the polling of every live biometric device
+    """
+
+    def __init__(
+        self,
+        workers=BIO_POLLER_WORKERS,
+        interval=BIO_POLLER_INTERVAL,
+        batch_size=BIO_POLLER_BATCH_SIZE,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        # device reads, one database connection per thread at most
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="biometric-poller"
+        )
+        # reloads and batch ingestion share a single thread and connection
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="biometric-ingestion"
+        )
+        self.queue = None
+        self.stopping = None
+        self.tasks = {}
+
+    def stop(self):
+        self.stopping.set()
+
+    async def _db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.db_executor, func, *args
+        )
+
+    def _load_readers(self, running):
+        close_old_connections()
+        devices = BiometricDevices.objects.filter(
+            is_live=True, machine_type__in=READERS
+        )
+        live = set(devices.values_list("id", flat=True))
+        readers = [
+            READERS[device.machine_type](device)
+            for device in devices.exclude(id__in=running)
+        ]
+        return live, readers
+
+    async def refresh(self):
+        """
+        Start polling the devices switched to live mode and stop the others
+        """
+        live, readers = await self._db(self._load_readers, list(self.tasks))
+        for device_id in set(self.tasks) - live:
+            self.tasks.pop(device_id).cancel()
+            logger.info("Stopped polling the biometric device %s", device_id)
+        for reader in readers:
+            self.tasks[reader.device_id] = asyncio.create_task(self.poll(reader))
+            logger.info("Started polling the biometric device %s", reader.device_id)
+
+    async def poll(self, reader):
+        """
+        Read the device every interval, backing off while it fails
+        """
+        loop = asyncio.get_running_loop()
+        backoff = self.interval
+        try:
+            while True:
+                try:
+                    punches, checkpoint = await loop.run_in_executor(
+                        self.executor, reader.read
+                    )
+                except Exception as error:
+                    logger.error(
+                        "Biometric device %s failed, retrying in %ss: %s",
+                        reader.device_id,
+                        backoff,
+                        error,
+                    )
+                    await loop.run_in_executor(self.executor, reader.close)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    continue
+                backoff = self.interval
+                if checkpoint is not None:
+                    recorded = loop.create_future()
+                    await self.queue.put((reader, punches, checkpoint, recorded))
+                    # the cursor moves once the checkpoint is saved, a failed
+                    # batch is read again from the saved checkpoint
+                    if await recorded:
+                        reader.advance(checkpoint)
+                await asyncio.sleep(self.interval)
+        finally:
+            await loop.run_in_executor(self.executor, reader.close)
+
+    def _ingest(self, batch):
+        """
+        Returns:
+            set: ids of the devices whose punches and checkpoint are saved
+        """
+        close_old_connections()
+        items = {}
+        for reader, reader_punches, checkpoint, _recorded in batch:
+            items.setdefault(type(reader), []).append(
+                (reader.device_id, reader_punches, checkpoint)
+            )
+        recorded = set()
+        for reader_class, class_items in items.items():
+            punches = [punch for _id, punches, _cp in class_items for punch in punches]
+            try:
+                ingest_punches(
+                    punches,
+                    biometric_employee_ids(
+                        reader_class.user_id_field,
+                        [punch.device_user_id for punch in punches],
+                    ),
+                )
+                for device_id, _punches, checkpoint in class_items:
+                    reader_class.save_checkpoint(device_id, checkpoint)
+                    recorded.add(device_id)
+            except Exception as error:
+                # the saved checkpoints are kept, the punches are read again
+                logger.error("Got an error while recording the punches %s", error)
+        return recorded
+
+    async def consume(self):
+        """
+        Record the queued punches in batches
+        """
+        while True:
+            batch = [await self.queue.get()]
+            size = len(batch[0][1])
+            while size < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                size += len(batch[-1][1])
+            try:
+                recorded = await self._db(self._ingest, batch)
+            except Exception as error:
+                logger.error("Got an error while recording the punches %s", error)
+                recorded = set()
+            for reader, _punches, _checkpoint, future in batch:
+                if not future.done():
+                    future.set_result(reader.device_id in recorded)
+
+    async def run(self):
+        self.queue = asyncio.Queue()
+        self.stopping = asyncio.Event()
+        consumer = asyncio.create_task(self.consume())
+        try:
+            while not self.stopping.is_set():
+                await self.refresh()
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), REFRESH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            # record what has been read before leaving
+            while not self.queue.empty():
+                await asyncio.sleep(0.1)
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            self.executor.shutdown()
+            self.db_executor.shutdown()
@@ -0,0 +1,38 @@
+"""
+scheduler.py
+
+This module is used to register scheduled tasks
+"""
+
+from horilla.horilla_scheduler import job_provider
+
+# device machine type -> attendance fetching job
+DEVICE_JOBS = {
+    "zk": "biometric.views:zk_biometric_device_attendance",
+    "anviz": "biometric.views:anviz_biometric_device_attendance",
+    "cosec": "biometric.views:cosec_biometric_device_attendance",
+}
+
+
+@job_provider
+def scheduled_device_jobs():
+    """
+    Attendance fetching job of every device in scheduled mode, run at the
+    scheduler duration of the device
+    """
+    from biometric.models import BiometricDevices
+    from biometric.views import str_time_seconds
+
+    jobs = {}
+    for device in BiometricDevices.objects.filter(
+        is_scheduler=True, machine_type__in=DEVICE_JOBS
+    ):
+        seconds = str_time_seconds(device.scheduler_duration)
+        if seconds > 0:
+            jobs[f"biometric.device.{device.id}"] = {
+                "func": DEVICE_JOBS[device.machine_type],
+                "args": [device.id],
+                "trigger": "interval",
+                "seconds": seconds,
+            }
+    return jobs
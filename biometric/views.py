@@ -9,11 +9,9 @@ registered on biometric devices.
 import json
 import logging
 from datetime import datetime
-from threading import Event, Thread
 from urllib.parse import parse_qs, unquote
 
 import requests
-from apscheduler.schedulers.background import BackgroundScheduler
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
@@ -22,8 +20,6 @@ from django.utils.translation import gettext as __
 from django.utils.translation import gettext_lazy as _
 from zk import ZK
 
-from attendance.methods.utils import Request
-from attendance.views.clock_in_out import clock_in, clock_out
 from base.methods import get_key_instances, get_pagination
 from employee.models import Employee, EmployeeWorkInformation
 from horilla.decorators import (
@@ -33,7 +29,6 @@ from horilla.decorators import (
     permission_required,
 )
 from horilla.filters import HorillaPaginator
-from horilla.horilla_settings import BIO_DEVICE_THREADS
 
 from .cosec import COSECBiometric
 from .filters import BiometricDeviceFilter
@@ -44,6 +39,14 @@ from .forms import (
     COSECUserForm,
     EmployeeBiometricAddForm,
 )
+from .ingestion import (
+    Punch,
+    badge_employee_ids,
+    biometric_employee_ids,
+    cosec_punches,
+    ingest_punches,
+    zk_punches,
+)
 from .models import BiometricDevices, BiometricEmployees, COSECAttendanceArguments
 
 logger = logging.getLogger(__name__)
@@ -108,215 +111,6 @@ def biometric_set_time(conn):
     conn.set_time(new_time)
 
 
-class ZKBioAttendance(Thread):
-    """
-    Represents a thread for capturing live attendance data from a ZKTeco biometric device.
-
-    Attributes:
-    - machine_ip: The IP address of the ZKTeco biometric device.
-    - port_no: The port number for communication with the ZKTeco biometric device.
-    - conn: The connection object to the ZKTeco biometric device.
-    - _stop_event: Event flag to signal thread termination.
-
-    Methods:
-    - run(): Overrides the run method of the Thread class to capture live attendance data.
-    - stop(): Sets the _stop_event to signal the thread to stop gracefully.
-    """
-
-    def __init__(self, machine_ip, port_no):
-        super().__init__()
-        self.machine_ip = machine_ip
-        self.port_no = port_no
-        self._stop_event = Event()  # Initialize stop event
-        self.conn = None
-
-    def run(self):
-        try:
-            zk_device = ZK(
-                self.machine_ip,
-                port=self.port_no,
-                timeout=5,
-                password=0,
-                force_udp=False,
-                ommit_ping=False,
-            )
-            conn = zk_device.connect()
-            self.conn = conn
-            if conn:
-                device = BiometricDevices.objects.filter(
-                    machine_ip=self.machine_ip, port=self.port_no
-                ).first()
-                if device and device.is_live:
-                    while not self._stop_event.is_set():
-                        attendances = conn.live_capture()
-                        for attendance in attendances:
-                            if attendance:
-                                user_id = attendance.user_id
-                                punch_code = attendance.punch
-                                date_time = django_timezone.make_aware(
-                                    attendance.timestamp
-                                )
-                                # date_time = attendance.timestamp
-                                date = date_time.date()
-                                time = date_time.time()
-                                device.last_fetch_date = date
-                                device.last_fetch_time = time
-                                device.save()
-                                bio_id = BiometricEmployees.objects.filter(
-                                    user_id=user_id
-                                ).first()
-                                if bio_id:
-                                    if punch_code in {0, 3, 4}:
-                                        try:
-                                            clock_in(
-                                                Request(
-                                                    user=bio_id.employee_id.employee_user_id,
-                                                    date=date,
-                                                    time=time,
-                                                    datetime=date_time,
-                                                )
-                                            )
-                                        except Exception as error:
-                                            logger.error(
-                                                "Got an error in clock_in %s", error
-                                            )
-
-                                            continue
-                                    else:
-                                        try:
-                                            clock_out(
-                                                Request(
-                                                    user=bio_id.employee_id.employee_user_id,
-                                                    date=date,
-                                                    time=time,
-                                                    datetime=date_time,
-                                                )
-                                            )
-                                        except Exception as error:
-                                            logger.error(
-                                                "Got an error in clock_out", error
-                                            )
-                                            continue
-                            else:
-                                continue
-        except ConnectionResetError as error:
-            ZKBioAttendance(self.machine_ip, self.port_no).start()
-
-    def stop(self):
-        """To stop the ZK live capture mode"""
-        self.conn.end_live_capture = True
-
-
-class COSECBioAttendanceThread(Thread):
-    """
-    A thread class that handles the real-time retrieval and processing of
-    biometric attendance data from a COSEC biometric device.
-
-    Attributes:
-        device_id (int): The ID of the biometric device to interact with.
-        _stop_event (threading.Event): An event to signal when to stop the thread.
-
-    Methods:
-        run():
-            Continuously fetches attendance data from the COSEC device, processes
-            it, and updates the last fetched sequence and rollover count.
-
-        stop():
-            Signals the thread to stop by setting the _stop_event.
-    """
-
-    def __init__(self, device_id):
-        super().__init__()
-        self.device_id = device_id
-        self._stop_event = Event()
-
-    def run(self):
-        try:
-            device = BiometricDevices.objects.get(id=self.device_id)
-            if not device.is_live:
-                return
-
-            device_args = COSECAttendanceArguments.objects.filter(
-                device_id=device
-            ).first()
-            last_fetch_roll_ovr_count = (
-                int(device_args.last_fetch_roll_ovr_count) if device_args else 0
-            )
-            last_fetch_seq_number = (
-                int(device_args.last_fetch_seq_number) if device_args else 1
-            )
-
-            cosec = COSECBiometric(
-                device.machine_ip,
-                device.port,
-                device.cosec_username,
-                device.cosec_password,
-                timeout=10,
-            )
-            while not self._stop_event.is_set():
-                attendances = cosec.get_attendance_events(
-                    last_fetch_roll_ovr_count, int(last_fetch_seq_number) + 1
-                )
-                if not isinstance(attendances, list):
-                    self._stop_event.wait(5)
-                    continue
-
-                for attendance in attendances:
-                    ref_user_id = attendance["detail-1"]
-                    employee = BiometricEmployees.objects.filter(
-                        ref_user_id=ref_user_id
-                    ).first()
-                    if not employee:
-                        continue
-
-                    date_str = attendance["date"]
-                    time_str = attendance["time"]
-                    attendance_date = datetime.strptime(date_str, "%d/%m/%Y").date()
-                    attendance_time = datetime.strptime(time_str, "%H:%M:%S").time()
-                    attendance_datetime = datetime.combine(
-                        attendance_date, attendance_time
-                    )
-                    punch_code = attendance["detail-2"]
-
-                    request_data = Request(
-                        user=employee.employee_id.employee_user_id,
-                        date=attendance_date,
-                        time=attendance_time,
-                        datetime=django_timezone.make_aware(attendance_datetime),
-                    )
-                    try:
-                        if punch_code in ["1", "3", "5", "7", "9", "0"]:
-                            clock_in(request_data)
-                        elif punch_code in ["2", "4", "6", "8", "10"]:
-                            clock_out(request_data)
-                    except Exception as error:
-                        logger.error("Error processing attendance: ", error)
-
-                if attendances:
-                    last_attendance = attendances[-1]
-                    last_fetch_seq_number = last_attendance["seq-No"]
-                    last_fetch_roll_ovr_count = last_attendance["roll-over-count"]
-                    COSECAttendanceArguments.objects.update_or_create(
-                        device_id=device,
-                        defaults={
-                            "last_fetch_roll_ovr_count": last_fetch_roll_ovr_count,
-                            "last_fetch_seq_number": last_fetch_seq_number,
-                        },
-                    )
-                # Sleep to prevent overwhelming the device with requests
-                self._stop_event.wait(2)
-
-        except Exception as error:
-            device = BiometricDevices.objects.get(id=self.device_id)
-            device.is_live = False
-            device.save()
-            logger.error("Error in COSECBioAttendanceThread: ", error)
-
-    def stop(self):
-        """Set the stop event to signal the thread to stop gracefully."""
-        self._stop_event.set()
-
-
 class AnvizBiometricDeviceManager:
     """Manages communication with Anviz biometric devices for attendance records."""
 
@@ -521,13 +315,6 @@ def biometric_device_schedule(request, device_id):
                     device.is_scheduler = True
                     device.is_live = False
                     device.save()
-                    scheduler = BackgroundScheduler()
-                    scheduler.add_job(
-                        lambda: zk_biometric_device_attendance(device.id),
-                        "interval",
-                        seconds=str_time_seconds(device.scheduler_duration),
-                    )
-                    scheduler.start()
                     return HttpResponse("<script>window.location.reload()</script>")
                 except Exception as error:
                     logger.error("An error comes in biometric_device_schedule ", error)
@@ -552,13 +339,6 @@ def biometric_device_schedule(request, device_id):
                 device.is_scheduler = True
                 device.scheduler_duration = duration
                 device.save()
-                scheduler = BackgroundScheduler()
-                scheduler.add_job(
-                    lambda: anviz_biometric_device_attendance(device.id),
-                    "interval",
-                    seconds=str_time_seconds(device.scheduler_duration),
-                )
-                scheduler.start()
                 return HttpResponse("<script>window.location.reload()</script>")
             else:
                 duration = request.POST.get("scheduler_duration")
@@ -566,17 +346,6 @@ def biometric_device_schedule(request, device_id):
                 device.is_live = False
                 device.scheduler_duration = duration
                 device.save()
-                scheduler = BackgroundScheduler()
-                existing_thread = BIO_DEVICE_THREADS.get(device.id)
-                if existing_thread:
-                    existing_thread.stop()
-                    del BIO_DEVICE_THREADS[device.id]
-                scheduler.add_job(
-                    lambda: cosec_biometric_device_attendance(device.id),
-                    "interval",
-                    seconds=str_time_seconds(device.scheduler_duration),
-                )
-                scheduler.start()
                 return HttpResponse("<script>window.location.reload()</script>")
 
         context["scheduler_form"] = scheduler_form
@@ -1713,13 +1482,12 @@ def biometric_device_live(request):
                     ommit_ping=False,
                 )
                 conn = zk_device.connect()
-                instance = ZKBioAttendance(machine_ip, port_no)
                 conn.test_voice(index=14)
                 if conn:
+                    # the punches are read by the biometric_poller command
                     device.is_live = True
                     device.is_scheduler = False
                     device.save()
-                    instance.start()
             elif device.machine_type == "cosec":
                 cosec = COSECBiometric(
                     device.machine_ip,
@@ -1730,9 +1498,6 @@ def biometric_device_live(request):
                 )
                 response = cosec.basic_config()
                 if response.get("app"):
-                    thread = COSECBioAttendanceThread(device.id)
-                    thread.start()
-                    BIO_DEVICE_THREADS[device.id] = thread
                     device.is_live = True
                     device.is_scheduler = False
                     device.save()
@@ -1779,11 +1544,6 @@ def biometric_device_live(request):
     else:
         device.is_live = False
         device.save()
-        if device.machine_type == "cosec":
-            existing_thread = BIO_DEVICE_THREADS.get(device.id)
-            if existing_thread:
-                existing_thread.stop()
-                del BIO_DEVICE_THREADS[device.id]
 
         script = """
            <script>
@@ -1835,33 +1595,17 @@ def zk_biometric_device_attendance(device_id):
                 ]
             else:
                 filtered_attendances = attendances
+            punches = zk_punches(filtered_attendances)
+            ingest_punches(
+                punches,
+                biometric_employee_ids(
+                    "user_id", [punch.device_user_id for punch in punches]
+                ),
+            )
+            # the checkpoint moves once the punches are recorded
             device.last_fetch_date = last_attendance_datetime.date()
             device.last_fetch_time = last_attendance_datetime.time()
             device.save()
-            for attendance in filtered_attendances:
-                user_id = attendance.user_id
-                punch_code = attendance.punch
-                date_time = django_timezone.make_aware(attendance.timestamp)
-                date = date_time.date()
-                time = date_time.time()
-                bio_id = BiometricEmployees.objects.filter(user_id=user_id).first()
-                if bio_id:
-                    request_data = Request(
-                        user=bio_id.employee_id.employee_user_id,
-                        date=date,
-                        time=time,
-                        datetime=date_time,
-                    )
-                    if punch_code in {0, 3, 4}:
-                        try:
-                            clock_in(request_data)
-                        except Exception as error:
-                            logger.error("Got an error : ", error)
-                    else:
-                        try:
-                            clock_out(request_data)
-                        except Exception as error:
-                            logger.error("Got an error : ", error)
         except Exception as error:
             logger.error("Process terminate : ", error)
         finally:
@@ -1879,34 +1623,23 @@ def anviz_biometric_device_attendance(device_id):
     if device.is_scheduler:
         anviz_device = AnvizBiometricDeviceManager(device_id)
         attendance_records = anviz_device.get_attendance_records()
+        punches = []
         for attendance in attendance_records["payload"]["list"]:
-            badge_id = attendance["employee"]["workno"]
-            punch_code = attendance["checktype"]
             date_time_utc = datetime.strptime(
                 attendance["checktime"], "%Y-%m-%dT%H:%M:%S%z"
             )
-            date_time_obj = date_time_utc.astimezone(
-                django_timezone.get_current_timezone()
-            )
-            employee = Employee.objects.filter(badge_id=badge_id).first()
-            if employee:
-                request_data = Request(
-                    user=employee.employee_user_id,
-                    date=date_time_obj.date(),
-                    time=date_time_obj.time(),
-                    datetime=date_time_obj,
+            # // 1 , 129 check type check out and door close
+            punches.append(
+                Punch(
+                    attendance["employee"]["workno"],
+                    date_time_utc.astimezone(django_timezone.get_current_timezone()),
+                    attendance["checktype"] in {0, 128},
                 )
-                if punch_code in {0, 128}:
-                    try:
-                        clock_in(request_data)
-                    except Exception as error:
-                        logger.error("Error in clock in ", error)
-                else:
-                    try:
-                        # // 1 , 129 check type check out and door close
-                        clock_out(request_data)
-                    except Exception as error:
-                        logger.error("Error in clock out ", error)
+            )
+        ingest_punches(
+            punches,
+            badge_employee_ids([punch.device_user_id for punch in punches]),
+        )
 
 
 def cosec_biometric_device_attendance(device_id):
@@ -1943,35 +1676,13 @@ def cosec_biometric_device_attendance(device_id):
     if not isinstance(attendances, list):
         return
 
-    for attendance in attendances:
-        ref_user_id = attendance["detail-1"]
-        employee = BiometricEmployees.objects.filter(ref_user_id=ref_user_id).first()
-        if not employee:
-            continue
-
-        date_str = attendance["date"]
-        time_str = attendance["time"]
-        attendance_date = datetime.strptime(date_str, "%d/%m/%Y").date()
-        attendance_time = datetime.strptime(time_str, "%H:%M:%S").time()
-        attendance_datetime = datetime.combine(attendance_date, attendance_time)
-        punch_code = attendance["detail-2"]
-
-        request_data = Request(
-            user=employee.employee_id.employee_user_id,
-            date=attendance_date,
-            time=attendance_time,
-            datetime=django_timezone.make_aware(attendance_datetime),
-        )
-
-        try:
-            if punch_code in ["1", "3", "5", "7", "9", "0"]:
-                clock_in(request_data)
-            elif punch_code in ["2", "4", "6", "8", "10"]:
-                clock_out(request_data)
-            else:
-                pass
-        except Exception as error:
-            logger.error("Error processing attendance: ", error)
+    punches = cosec_punches(attendances)
+    ingest_punches(
+        punches,
+        biometric_employee_ids(
+            "ref_user_id", [punch.device_user_id for punch in punches]
+        ),
+    )
 
     if attendances:
         last_attendance = attendances[-1]
@@ -1982,38 +1693,3 @@ def cosec_biometric_device_attendance(device_id):
                 "last_fetch_seq_number": last_attendance["seq-No"],
             },
         )
-
-
-try:
-    devices = BiometricDevices.objects.all().update(is_live=False)
-    for device in BiometricDevices.objects.filter(is_scheduler=True):
-        if device:
-            if str_time_seconds(device.scheduler_duration) > 0:
-                if device.machine_type == "anviz":
-                    scheduler = BackgroundScheduler()
-                    scheduler.add_job(
-                        lambda: anviz_biometric_device_attendance(device.id),
-                        "interval",
-                        seconds=str_time_seconds(device.scheduler_duration),
-                    )
-                    scheduler.start()
-                elif device.machine_type == "zk":
-                    scheduler = BackgroundScheduler()
-                    scheduler.add_job(
-                        lambda: zk_biometric_device_attendance(device.id),
-                        "interval",
-                        seconds=str_time_seconds(device.scheduler_duration),
-                    )
-                    scheduler.start()
-                elif device.machine_type == "cosec":
-                    scheduler = BackgroundScheduler()
-                    scheduler.add_job(
-                        lambda: cosec_biometric_device_attendance(device.id),
-                        "interval",
-                        seconds=str_time_seconds(device.scheduler_duration),
-                    )
-                    scheduler.start()
-                else:
-                    pass
-except:
-    pass
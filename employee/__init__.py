@@ -1 +0,0 @@
-from employee import scheduler
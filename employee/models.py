@@ -5,7 +5,7 @@ This module is used to register models for employee app
 
 """
 
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
 
 from django.apps import apps
 from django.conf import settings
@@ -14,8 +14,9 @@ from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.db import models
 from django.db.models.query import QuerySet
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy as trans
 
@@ -850,6 +851,216 @@ class DisciplinaryAction(HorillaModel):
     class Meta:
         ordering = ["-id"]
 
+    def account_block_periods(self):
+        """
+        Login block periods of the employees of the action
+
+        A dismissal blocks from the start date on, a suspension in days until
+        the end of the last day and a suspension in hours from the start of
+        the employee's shift on the start date.
+
+        Returns:
+            dict: {employee id: (starts_at, ends_at)}, ends_at is None when the
+            block never ends
+        """
+        action = self.action
+        if (
+            not action.block_option
+            or action.action_type not in ("suspension", "dismissal")
+            or self.start_date is None
+        ):
+            return {}
+        start = timezone.make_aware(datetime.combine(self.start_date, time.min))
+        employees = self.employee_id.all()
+        if action.action_type == "dismissal":
+            return {employee.id: (start, None) for employee in employees}
+        if self.unit_in == "days":
+            if not self.days or self.days < 1:
+                return {}
+            end = start + timedelta(days=self.days)
+            return {employee.id: (start, end) for employee in employees}
+
+        duration = strtime_seconds(self.hours) if self.hours else 0
+        if duration <= 0:
+            return {}
+        EmployeeShiftSchedule = get_horilla_model_class(
+            app_label="base", model="employeeshiftschedule"
+        )
+        shift_starts = dict(
+            EmployeeShiftSchedule.objects.filter(
+                day__day=self.start_date.strftime("%A").lower(),
+                start_time__isnull=False,
+            ).values_list("shift_id", "start_time")
+        )
+        periods = {}
+        for employee_id, shift_id in employees.values_list(
+            "id", "employee_work_info__shift_id"
+        ):
+            starts_at = start
+            if shift_id in shift_starts:
+                starts_at = timezone.make_aware(
+                    datetime.combine(self.start_date, shift_starts[shift_id])
+                )
+            periods[employee_id] = (starts_at, starts_at + timedelta(seconds=duration))
+        return periods
+
+    def sync_account_blocks(self):
+        """
+        Replace the login block periods of the action and block or unblock
+        the accounts the change takes effect on now
+        """
+        now = timezone.now()
+        previous = DisciplinaryAccountBlock.objects.filter(disciplinary_action=self)
+        released = set(
+            previous.filter(blocked=True, unblocked=False).values_list(
+                "employee_id", flat=True
+            )
+        )
+        previous.delete()
+        blocks = DisciplinaryAccountBlock.objects.bulk_create(
+            [
+                DisciplinaryAccountBlock(
+                    disciplinary_action=self,
+                    employee_id_id=employee_id,
+                    starts_at=starts_at,
+                    ends_at=ends_at,
+                    blocked=starts_at <= now,
+                    unblocked=ends_at is not None and ends_at <= now,
+                )
+                for employee_id, (starts_at, ends_at) in (
+                    self.account_block_periods().items()
+                )
+            ]
+        )
+        DisciplinaryAccountBlock.update_accounts(
+            {block.employee_id_id for block in blocks if block.blocked},
+            released,
+            now,
+        )
+
+
+class DisciplinaryAccountBlockQuerySet(models.QuerySet):
+    def in_force(self, now):
+        """
+        Blocks applied at the moment
+        """
+        return self.filter(starts_at__lte=now).filter(
+            models.Q(ends_at__isnull=True) | models.Q(ends_at__gt=now)
+        )
+
+
+class DisciplinaryAccountBlock(models.Model):
+    """
+    Login block period of an employee from a suspension or a dismissal.
+
+    The block and unblock instants are computed when the disciplinary action
+    is saved, the apply_disciplinary_account_blocks scheduled job runs at
+    those instants only.
+    """
+
+    disciplinary_action = models.ForeignKey(
+        DisciplinaryAction, on_delete=models.CASCADE, related_name="account_blocks"
+    )
+    employee_id = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(null=True)
+    # whether the block and the unblock have been applied to the account
+    blocked = models.BooleanField(default=False)
+    unblocked = models.BooleanField(default=False)
+    objects = DisciplinaryAccountBlockQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["blocked", "starts_at"]),
+            models.Index(fields=["unblocked", "ends_at"]),
+        ]
+
+    @classmethod
+    def update_accounts(cls, employee_ids, released_ids, now):
+        """
+        Block the accounts of the employees with a block in force and unblock
+        the released employees left without one
+        """
+        employee_ids = set(employee_ids) | set(released_ids)
+        if not employee_ids:
+            return
+        in_force = set(
+            cls.objects.in_force(now)
+            .filter(employee_id__in=employee_ids)
+            .values_list("employee_id", flat=True)
+        )
+        if in_force:
+            User.objects.filter(employee_get__in=in_force, is_active=True).update(
+                is_active=False
+            )
+        unblock = set(released_ids) - in_force
+        if unblock:
+            User.objects.filter(employee_get__in=unblock, is_active=False).update(
+                is_active=True
+            )
+
+    @classmethod
+    def next_transition(cls):
+        """
+        Instant of the next block or unblock to apply, None if there is none
+        """
+        return min(
+            filter(
+                None,
+                cls.objects.aggregate(
+                    block=models.Min("starts_at", filter=models.Q(blocked=False)),
+                    unblock=models.Min("ends_at", filter=models.Q(unblocked=False)),
+                ).values(),
+            ),
+            default=None,
+        )
+
+    @classmethod
+    def apply_due(cls, now=None):
+        """
+        Apply the blocks and unblocks due by now
+        """
+        now = now or timezone.now()
+        starting = cls.objects.filter(blocked=False, starts_at__lte=now)
+        ending = cls.objects.filter(unblocked=False, ends_at__lte=now)
+        employee_ids = set(starting.values_list("employee_id", flat=True))
+        released_ids = set(ending.values_list("employee_id", flat=True))
+        cls.update_accounts(employee_ids, released_ids, now)
+        starting.update(blocked=True)
+        ending.update(unblocked=True)
+        return len(employee_ids | released_ids)
+
+    @receiver(post_save, sender=DisciplinaryAction)
+    def disciplinary_action_post_save(sender, instance, **_kwargs):
+        instance.sync_account_blocks()
+
+    @receiver(m2m_changed, sender=DisciplinaryAction.employee_id.through)
+    def disciplinary_employees_changed(sender, instance, action, **_kwargs):
+        if action in ("post_add", "post_remove", "post_clear") and isinstance(
+            instance, DisciplinaryAction
+        ):
+            instance.sync_account_blocks()
+
+    @receiver(post_save, sender=Actiontype)
+    def action_type_post_save(sender, instance, created, **_kwargs):
+        if not created:
+            for disciplinary_action in DisciplinaryAction.objects.filter(
+                action=instance
+            ):
+                disciplinary_action.sync_account_blocks()
+
+    @receiver(pre_delete, sender=DisciplinaryAction)
+    def disciplinary_action_pre_delete(sender, instance, **_kwargs):
+        now = timezone.now()
+        blocks = DisciplinaryAccountBlock.objects.filter(disciplinary_action=instance)
+        released = set(
+            blocks.filter(blocked=True, unblocked=False).values_list(
+                "employee_id", flat=True
+            )
+        )
+        blocks.delete()
+        DisciplinaryAccountBlock.update_accounts(set(), released, now)
+
 
 class EmployeeGeneralSetting(HorillaModel):
     """
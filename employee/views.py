@@ -98,7 +98,7 @@ from horilla.decorators import (
 from horilla.filters import HorillaPaginator
 from horilla.group_by import group_by_queryset
 from horilla.horilla_settings import HORILLA_DATE_FORMATS
-from horilla.methods import get_horilla_model_class
+from horilla.methods import get_horilla_model_class, set_session_value
 from horilla_audit.models import AccountBlockUnblock, HistoryTrackingFields
 from horilla_documents.forms import (
     DocumentForm,
@@ -915,7 +915,11 @@ def employee_view(request):
     emp = Employee.objects.filter()
 
     # Store the employees in the session
-    request.session["filtered_employees"] = [employee.id for employee in queryset]
+    set_session_value(
+        request.session,
+        "filtered_employees",
+        [employee.id for employee in queryset],
+    )
 
     return render(
         request,
@@ -1616,7 +1620,11 @@ def employee_filter_view(request):
         employees = paginator_qry(employees, page_number)
 
         # Store the employees in the session
-        request.session["filtered_employees"] = [employee.id for employee in employees]
+        set_session_value(
+            request.session,
+            "filtered_employees",
+            [employee.id for employee in employees],
+        )
 
     return render(
         request,
@@ -5,4 +5,7 @@ python3 manage.py makemigrations
 python3 manage.py migrate
 python3 manage.py collectstatic --noinput
 python3 manage.py createhorillauser --first_name admin --last_name admin --username admin --password admin --email admin@example.com --phone 1234567890
+python3 manage.py run_scheduler &
+python3 manage.py biometric_poller &
+python3 manage.py send_outbox_mails &
 gunicorn --bind 0.0.0.0:8000 horilla.wsgi:application
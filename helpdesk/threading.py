@@ -5,27 +5,26 @@ This module is used handle mail sent in thread
 """
 
 import logging
-from threading import Thread
 
-from django.contrib import messages
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
 from base.backends import ConfiguredEmailBackend
+from base.mail_outbox import enqueue_mail
 from base.models import Department
 from employee.models import EmployeeWorkInformation
 from helpdesk.models import Ticket
+from horilla.horilla_tasks import BackgroundTask
 
 logger = logging.getLogger(__name__)
 
 
-class TicketSendThread(Thread):
+class TicketSendThread(BackgroundTask):
     """
     MailSend
     """
 
     def __init__(self, request, ticket, type):
-        Thread.__init__(self)
         self.ticket = ticket
         self.type = type
         self.request = request
@@ -66,16 +65,9 @@ class TicketSendThread(Thread):
                 [recipient.email],
             )
             email.content_subtype = "html"
-            try:
-                email.send()
-            except:
-                messages.error(
-                    self.request, f"Mail not sent to {recipient.get_full_name()}"
-                )
+            enqueue_mail(email, request=self.request)
 
     def run(self) -> None:
-        super().run()
-
         if self.type == "create":
             owner = self.ticket.employee_id
             manager = self.department_manager
@@ -120,13 +112,12 @@ class TicketSendThread(Thread):
         return
 
 
-class AddAssigneeThread(Thread):
+class AddAssigneeThread(BackgroundTask):
     """
     MailSend
     """
 
     def __init__(self, request, ticket, recipient):
-        Thread.__init__(self)
         self.ticket = ticket
         self.recipients = recipient
         self.request = request
@@ -134,8 +125,6 @@ class AddAssigneeThread(Thread):
         self.protocol = "https" if request.is_secure() else "http"
 
     def run(self) -> None:
-        super().run()
-
         content = "Please review the ticket details and take appropriate action accordingly. If you have any questions or require further information, feel free to reach out to the owner or the Support/Helpdesk team."
         subject = "You have been assigned to a Ticket"
 
@@ -163,21 +152,15 @@ class AddAssigneeThread(Thread):
                 [recipient.email],
             )
             email.content_subtype = "html"
-            try:
-                email.send()
-            except:
-                messages.error(
-                    self.request, f"Mail not sent to {recipient.get_full_name()}"
-                )
+            enqueue_mail(email, request=self.request)
 
 
-class RemoveAssigneeThread(Thread):
+class RemoveAssigneeThread(BackgroundTask):
     """
     MailSend
     """
 
     def __init__(self, request, ticket, recipient):
-        Thread.__init__(self)
         self.ticket = ticket
         self.recipients = recipient
         self.request = request
@@ -185,8 +168,6 @@ class RemoveAssigneeThread(Thread):
         self.protocol = "https" if request.is_secure() else "http"
 
     def run(self) -> None:
-        super().run()
-
         content = "Please review the ticket details and take appropriate action accordingly. If you have any questions or require further information, feel free to reach out to the owner or the Support/Helpdesk team."
         subject = "You have been removed from a Ticket"
 
@@ -214,9 +195,4 @@ class RemoveAssigneeThread(Thread):
                 [recipient.email],
             )
             email.content_subtype = "html"
-            try:
-                email.send()
-            except:
-                messages.error(
-                    self.request, f"Mail not sent to {recipient.get_full_name()}"
-                )
+            enqueue_mail(email, request=self.request)
@@ -216,13 +216,6 @@ def is_recruitment_manager(function, perm):
 
 def login_required(view_func):
     def wrapped_view(request, *args, **kwargs):
-        path = request.path
-        res = path.split("/", 2)[1].capitalize().replace("-", " ").upper()
-        if res == "PMS":
-            res = "Performance"
-        request.session["title"] = res
-        if path == "" or path == "/":
-            request.session["title"] = "Dashboard".upper()
         if not request.user.is_authenticated:
             login_url = reverse("login")
             params = urlencode(request.GET)
@@ -1,56 +1,98 @@
 from django.core.paginator import Paginator
+from django.db.models import Count, Max, Min
 from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.utils.functional import cached_property
 
 from horilla.horilla_middlewares import _thread_locals
 
 
-def record_queryset_paginator(request, queryset, page_name, records_per_page=10):
+class GroupPaginator(Paginator):
+    """
+    Paginator of a group's records whose count is already known from the
+    grouping query
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+def record_queryset_paginator(
+    request, queryset, page_name, records_per_page=10, count=None
+):
     """
     This method is used to return the paginator entries
     """
-    page = request.GET.get(page_name)
-    queryset = Paginator(queryset, records_per_page)
+    page = request.GET.get(page_name) if request else None
+    if count is None:
+        queryset = Paginator(queryset, records_per_page)
+    else:
+        queryset = GroupPaginator(queryset, records_per_page, count)
     queryset = queryset.get_page(page)
     return queryset
 
 
+def group_counts(queryset, group_field):
+    """
+    Returns the (value, record count) pairs of the group field in one query,
+    ordered like the first appearance of each value in the queryset
+    """
+    group_order = []
+    aggregates = {}
+    orderings = queryset.query.order_by
+    if not orderings and queryset.query.default_ordering:
+        orderings = queryset.model._meta.ordering
+    for index, ordering in enumerate(orderings or ()):
+        if not isinstance(ordering, str) or ordering == "?":
+            continue
+        field = ordering.lstrip("-")
+        if field == "pk":
+            field = queryset.model._meta.pk.name
+        descending = ordering.startswith("-")
+        aggregates[f"group_order_{index}"] = (Max if descending else Min)(field)
+        group_order.append(
+            f"-group_order_{index}" if descending else f"group_order_{index}"
+        )
+    groups = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(group_count=Count("pk"), **aggregates)
+        .order_by(*group_order, group_field)
+    )
+    return [(group[group_field], group["group_count"]) for group in groups]
+
+
 def generate_groups(request, groupers, queryset, page_name, group_field, is_fk_field):
     """
     groups generating method
+
+    groupers are (grouper, record count) pairs, the records of each group are
+    fetched lazily by its paginated list
     """
     groups = []
-    if is_fk_field:
-        for grouper in groupers:
+    for grouper, count in groupers:
+        # to avoid zero records groupings
+        if not count:
+            continue
+        if is_fk_field:
             group_queryset = queryset.filter(**{group_field: grouper.id})
-            # to avoid zero records groupings
-            if group_queryset.count():
-                group_info = {
-                    "grouper": grouper,
-                    "list": record_queryset_paginator(
-                        request,
-                        group_queryset,
-                        f"dynamic_page_{page_name}{grouper.id}",
-                    ),
-                    "dynamic_name": f"dynamic_page_{page_name}{grouper.id}",
-                }
-                groups.append(group_info)
-    else:
-        for grouper in groupers:
+            dynamic_name = f"dynamic_page_{page_name}{grouper.id}"
+        else:
             group_queryset = queryset.filter(**{group_field: grouper})
-            # to avoid zero records groupings
-            if group_queryset.count():
-                group = {
-                    "grouper": grouper,
-                    "list": record_queryset_paginator(
-                        request,
-                        group_queryset,
-                        f"dynamic_page_{page_name}{grouper}".replace(" ", "_"),
-                    ),
-                    "dynamic_name": f"dynamic_page_{page_name}{grouper}".replace(
-                        " ", "_"
-                    ),
-                }
-                groups.append(group)
+            dynamic_name = f"dynamic_page_{page_name}{grouper}".replace(" ", "_")
+        groups.append(
+            {
+                "grouper": grouper,
+                "list": record_queryset_paginator(
+                    request, group_queryset, dynamic_name, count=count
+                ),
+                "dynamic_name": dynamic_name,
+            }
+        )
     return groups
 
 
@@ -59,6 +101,10 @@ def group_by_queryset(
 ):
     """
     This method is used to make group-by and split groups by nested pagination
+
+    The groups and their record counts come from a single aggregate query,
+    the groups are paginated first and only the records of the groups on the
+    requested page are fetched.
     """
     from base.methods import get_pagination
 
@@ -76,46 +122,48 @@ def group_by_queryset(
 
     # getting request from the thread locals
     request = getattr(_thread_locals, "request", None)
+    counts = group_counts(queryset, group_field)
+    related_model = None
     if splitted or is_fk_field:
         for field in fields_split:
             field_obj = model_copy._meta.get_field(field)
             model_copy = field_obj.related_model
         if model_copy:
-            groupers = model_copy.objects.all()
-            groups = generate_groups(
-                request,
-                groupers,
-                queryset,
-                page_name,
-                group_field,
-                is_fk_field=True,
+            related_model = model_copy
+            # ordered like the related model, skipping the ones hidden by its manager
+            related_ids = model_copy.objects.all().filter(
+                id__in=[value for value, _count in counts if value is not None]
             )
-        else:
-            groupers = [
-                item
-                for index, item in enumerate(
-                    queryset.values_list(group_field, flat=True)
-                )
-                if item not in queryset.values_list(group_field, flat=True)[:index]
-            ]
-            groups = generate_groups(
-                request, groupers, queryset, page_name, group_field, is_fk_field=False
+        is_fk_field = bool(model_copy)
+    else:
+        related_model = queryset.model._meta.get_field(group_field).related_model
+        if related_model:
+            related_ids = related_model.objects.filter(
+                id__in=[value for value, _count in counts if value is not None]
             )
 
-    else:
-        # making unique | not using set(groupers) due to ordering issue
+    if related_model:
+        count_map = dict(counts)
         groupers = [
-            item
-            for index, item in enumerate(queryset.values_list(group_field, flat=True))
-            if item not in queryset.values_list(group_field, flat=True)[:index]
+            (pk, count_map[pk]) for pk in related_ids.values_list("id", flat=True)
         ]
-        # getting related queryset
-        related_model = queryset.model._meta.get_field(group_field).related_model
-        if related_model:
-            groupers = related_model.objects.filter(id__in=groupers)
-        groups = generate_groups(
-            request, groupers, queryset, page_name, group_field, is_fk_field=False
-        )
+    else:
+        groupers = counts
 
-    groups = Paginator(groups, records_per_page)
-    return groups.get_page(page)
+    groupers = Paginator(groupers, records_per_page).get_page(page)
+    if related_model:
+        instances = related_model._base_manager.in_bulk(
+            [pk for pk, _count in groupers.object_list]
+        )
+        groupers.object_list = [
+            (instances[pk], count) for pk, count in groupers.object_list
+        ]
+    groupers.object_list = generate_groups(
+        request,
+        groupers.object_list,
+        queryset,
+        page_name,
+        group_field,
+        is_fk_field=is_fk_field,
+    )
+    return groupers
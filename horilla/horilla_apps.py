@@ -25,6 +25,12 @@ AUDITLOG_INCLUDE_ALL_MODELS = True
 AUDITLOG_EXCLUDE_TRACKING_MODELS = (
     # "<app_name>",
     # "<app_name>.<model>"
+    "django_apscheduler",
+    "base.schedulerlease",
+    "attendance.attendancedailysummary",
+    "base.mailoutbox",
+    "base.cacheversion",
+    "payroll.payrollrun",
 )
 
 setattr(settings, "AUDITLOG_INCLUDE_ALL_MODELS", AUDITLOG_INCLUDE_ALL_MODELS)
@@ -0,0 +1,155 @@
+"""
+horilla_export.py
+
+Export engine of the data exports, shared by base.methods.export_data and
+the list views.
+
+The records are read with QuerySet.iterator, the forward relations of the
+exported fields being fetched in the same query by select_related, and the
+rows are written one at a time, streamed as CSV or written to an xlsx
+workbook in xlsxwriter's constant_memory mode, so the memory used does not
+depend on the number of exported records.
+"""
+
+import csv
+import tempfile
+from decimal import Decimal
+
+import xlsxwriter
+from bs4 import BeautifulSoup
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+
+from horilla.horilla_settings import EXPORT_CHUNK_SIZE
+
+
+def related_paths(model, attrs):
+    """
+    select_related paths of the forward relations traversed by the exported
+    attributes, the methods and properties ending the traversal
+
+    Args:
+        model: the exported model
+        attrs (list): attribute paths, like "employee_id__employee_first_name"
+
+    Returns:
+        set: the paths to pass to select_related
+    """
+    paths = set()
+    for attr in attrs:
+        related_model = model
+        path = []
+        for part in attr.split("__"):
+            try:
+                field = related_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or not (field.many_to_one or field.one_to_one):
+                break
+            path.append(part)
+            related_model = field.related_model
+        if path:
+            paths.add("__".join(path))
+    return paths
+
+
+def iterate_export(queryset, attrs, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterate over the records to export, chunk_size records fetched at a time
+    """
+    queryset = queryset.select_related(*related_paths(queryset.model, attrs))
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def plain_text(value):
+    """
+    Text of a value rendered as HTML, the list items on lines of their own
+    and the blank lines removed
+    """
+    text = str(value)
+    if "<" in text or "&" in text:
+        soup = BeautifulSoup(text, "html.parser")
+        for li in soup.find_all("li"):
+            li.insert_before("\n")
+            li.unwrap()
+        text = soup.get_text()
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+class Echo:
+    """
+    File like object returning what is written, to stream the CSV rows
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(file_name, headers, rows):
+    """
+    Returns:
+        StreamingHttpResponse: the CSV file, written as it is sent
+    """
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(["" if value is None else value for value in row])
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{file_name}.csv"'
+    return response
+
+
+def write_xlsx(file_name, headers, rows, column_width=18):
+    """
+    Write the rows to an xlsx workbook in a temporary file, keeping a single
+    row in memory at a time
+
+    Returns:
+        FileResponse: the workbook, read from the temporary file as it is sent
+    """
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Sheet1")
+    header_format = workbook.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    cell_format = workbook.add_format({"align": "center"})
+    worksheet.set_column(0, max(len(headers) - 1, 0), column_width)
+    for column, header in enumerate(headers):
+        worksheet.write_string(0, column, str(header), header_format)
+    for row_number, row in enumerate(rows, start=1):
+        for column, value in enumerate(row):
+            if value is None:
+                worksheet.write_blank(row_number, column, None, cell_format)
+            elif isinstance(value, (int, float, Decimal)) and not isinstance(
+                value, bool
+            ):
+                worksheet.write_number(row_number, column, value, cell_format)
+            else:
+                worksheet.write_string(row_number, column, str(value), cell_format)
+    workbook.close()
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{file_name}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def export_response(file_name, headers, rows, export_format="xlsx"):
+    """
+    Response of an export
+
+    Args:
+        file_name (str): name of the file, without its extension
+        headers (list): column titles
+        rows (iterable): lists of cell values, consumed once
+        export_format (str): "csv" or "xlsx"
+    """
+    if export_format == "csv":
+        return stream_csv(file_name, headers, rows)
+    return write_xlsx(file_name, headers, rows)
@@ -0,0 +1,254 @@
+"""
+horilla_scheduler.py
+
+Registry and runner of the scheduled jobs.
+
+The apps register their jobs in their ``scheduler`` module with the
+scheduled_job decorator, and the jobs depending on data, such as the
+biometric devices, with a job_provider. Nothing runs in the web processes,
+the jobs are run by the ``run_scheduler`` management command.
+
+Several run_scheduler processes may be started, only the one holding the
+SchedulerLease runs the jobs, the others take over once its lease expires.
+The jobs are stored in the django_apscheduler job store, so their next run
+survives a restart, and every run is recorded as a DjangoJobExecution with
+its status and duration, see job_statuses.
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.util import ref_to_obj
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from horilla.horilla_settings import SCHEDULER_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+
+# job id -> add_job keyword arguments, the func being a "module:function" reference
+SCHEDULED_JOBS = {}
+# callables returning the jobs that depend on data, in the same form
+JOB_PROVIDERS = []
+
+
+def scheduled_job(trigger, run_on_start=False, **options):
+    """
+    Register the function as a scheduled job
+
+    Args:
+        trigger (str): apscheduler trigger, "interval", "cron" or "date"
+        run_on_start (bool): also run the job when a runner takes the lead
+        options: trigger arguments and job options, as taken by add_job
+    """
+
+    def register(func):
+        job_id = f"{func.__module__}.{func.__name__}"
+        SCHEDULED_JOBS[job_id] = {
+            "func": f"{func.__module__}:{func.__qualname__}",
+            "trigger": trigger,
+            "run_on_start": run_on_start,
+            **options,
+        }
+        return func
+
+    return register
+
+
+def job_provider(func):
+    """
+    Register a callable returning {job id: add_job keyword arguments}, called
+    by the leader runner every time it renews its lease
+    """
+    JOB_PROVIDERS.append(func)
+    return func
+
+
+def run_job(func_ref, *args, **kwargs):
+    """
+    Run a scheduled job with fresh database connections, like a request
+    """
+    func = ref_to_obj(func_ref)
+    close_old_connections()
+    started_at = time.monotonic()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+        logger.info(
+            "Scheduled job %s ran in %.2fs", func_ref, time.monotonic() - started_at
+        )
+
+
+def acquire_lease(owner, seconds=SCHEDULER_LEASE_SECONDS):
+    """
+    Take or renew the leader lease
+
+    Returns:
+        bool: whether the owner holds the lease
+    """
+    from base.models import SchedulerLease
+
+    now = timezone.now()
+    SchedulerLease.objects.get_or_create(name=LEASE_NAME)
+    with transaction.atomic():
+        return bool(
+            SchedulerLease.objects.filter(name=LEASE_NAME)
+            .filter(Q(owner=owner) | Q(owner__isnull=True) | Q(expires_at__lt=now))
+            .update(owner=owner, expires_at=now + timedelta(seconds=seconds))
+        )
+
+
+def release_lease(owner):
+    """
+    Give the lead up, another runner takes it on its next renewal
+    """
+    from base.models import SchedulerLease
+
+    SchedulerLease.objects.filter(name=LEASE_NAME, owner=owner).update(owner=None)
+
+
+def job_statuses():
+    """
+    Monitoring data of the stored jobs
+
+    Returns:
+        list: dicts with the job id, next run, last run and last successful
+        run, the number of failures and the average duration in seconds
+    """
+    from django_apscheduler.models import DjangoJob, DjangoJobExecution
+
+    return list(
+        DjangoJob.objects.annotate(
+            last_run=Max("djangojobexecution__run_time"),
+            last_success=Max(
+                "djangojobexecution__run_time",
+                filter=Q(djangojobexecution__status=DjangoJobExecution.SUCCESS),
+            ),
+            failures=Count(
+                "djangojobexecution",
+                filter=Q(djangojobexecution__status=DjangoJobExecution.ERROR),
+            ),
+            average_duration=Avg("djangojobexecution__duration"),
+            max_duration=Max("djangojobexecution__duration"),
+        )
+        .values(
+            "id",
+            "next_run_time",
+            "last_run",
+            "last_success",
+            "failures",
+            "average_duration",
+            "max_duration",
+        )
+        .order_by("id")
+    )
+
+
+class SchedulerRunner:
+    """
+    Runs the registered jobs while holding the leader lease
+    """
+
+    def __init__(self, lease_seconds=SCHEDULER_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.scheduler = None
+        autodiscover_modules("scheduler")
+
+    @property
+    def is_leader(self):
+        return self.scheduler is not None
+
+    def desired_jobs(self):
+        jobs = dict(SCHEDULED_JOBS)
+        for provider in JOB_PROVIDERS:
+            try:
+                jobs.update(provider())
+            except Exception as error:
+                logger.error(
+                    "Got an error while loading the jobs of %s %s", provider, error
+                )
+        return jobs
+
+    def sync_jobs(self):
+        """
+        Add the new and changed jobs to the job store and remove the ones no
+        longer registered, the unchanged jobs keep their next run time
+        """
+        jobs = self.desired_jobs()
+        stored = {job.id: job for job in self.scheduler.get_jobs()}
+        for job_id in set(stored) - set(jobs):
+            self.scheduler.remove_job(job_id)
+        for job_id, options in jobs.items():
+            options = dict(options)
+            func_ref = options.pop("func")
+            args = options.pop("args", [])
+            options.pop("run_on_start", None)
+            # the job is replaced when its definition changes
+            name = f"{func_ref} {args} {sorted(options.items())}"
+            if job_id in stored and stored[job_id].name == name:
+                continue
+            self.scheduler.add_job(
+                run_job,
+                id=job_id,
+                name=name,
+                args=[func_ref, *args],
+                replace_existing=True,
+                **options,
+            )
+
+    def start(self):
+        from django_apscheduler.jobstores import DjangoJobStore
+
+        self.scheduler = BackgroundScheduler(
+            timezone=settings.TIME_ZONE,
+            job_defaults={"coalesce": True, "max_instances": 1},
+        )
+        self.scheduler.add_jobstore(DjangoJobStore(), "default")
+        self.scheduler.start(paused=True)
+        self.sync_jobs()
+        for job in self.scheduler.get_jobs():
+            if SCHEDULED_JOBS.get(job.id, {}).get("run_on_start"):
+                job.modify(next_run_time=timezone.now())
+        self.scheduler.resume()
+        logger.info("%s is running the scheduled jobs", self.owner)
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+            logger.info("%s stopped running the scheduled jobs", self.owner)
+
+    def tick(self):
+        """
+        Renew the lease, starting or stopping the jobs when the lead changes
+        """
+        close_old_connections()
+        try:
+            leader = acquire_lease(self.owner, self.lease_seconds)
+        except Exception as error:
+            logger.error("Got an error while renewing the scheduler lease %s", error)
+            leader = False
+        if leader and not self.is_leader:
+            self.start()
+        elif leader:
+            self.sync_jobs()
+        elif self.is_leader:
+            self.stop()
+
+    def close(self):
+        was_leader = self.is_leader
+        self.stop()
+        if was_leader:
+            release_lease(self.owner)
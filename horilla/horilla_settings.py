@@ -28,4 +28,132 @@ HORILLA_TIME_FORMATS = {
     "HH:mm": "%H:%M",  # 24-hour format
 }
 
-BIO_DEVICE_THREADS = {}
+"""
+BIO_POLLER_WORKERS: int
+
+Number of threads reading the live biometric devices, see biometric.poller.
+
+BIO_POLLER_INTERVAL: int
+
+Seconds between two reads of a live biometric device.
+
+BIO_POLLER_BATCH_SIZE: int
+
+Number of punches recorded at a time by the biometric poller.
+"""
+BIO_POLLER_WORKERS = settings.env.int("BIO_POLLER_WORKERS", default=8)
+BIO_POLLER_INTERVAL = settings.env.int("BIO_POLLER_INTERVAL", default=5)
+BIO_POLLER_BATCH_SIZE = settings.env.int("BIO_POLLER_BATCH_SIZE", default=1000)
+
+"""
+BACKGROUND_WORKERS: int
+
+Number of threads running the background tasks of a process, mails,
+automations and signal side effects, see horilla.horilla_tasks.
+
+BACKGROUND_QUEUE_SIZE: int
+
+Number of background tasks waiting for a thread. When the queue is full the
+tasks run in the request that submits them.
+"""
+BACKGROUND_WORKERS = settings.env.int("BACKGROUND_WORKERS", default=4)
+BACKGROUND_QUEUE_SIZE = settings.env.int("BACKGROUND_QUEUE_SIZE", default=1000)
+
+"""
+MAIL_OUTBOX_BATCH_SIZE: int
+
+Number of queued mails delivered at a time by the send_outbox_mails command,
+see base.mail_outbox.
+
+MAIL_OUTBOX_INTERVAL: int
+
+Seconds the send_outbox_mails command waits when the outbox is empty.
+
+MAIL_OUTBOX_MAX_ATTEMPTS: int
+
+Number of deliveries tried before a mail is marked as failed.
+
+MAIL_OUTBOX_RETRY_DELAY: int
+
+Seconds before the first retry of a failed delivery, doubled on every retry.
+"""
+MAIL_OUTBOX_BATCH_SIZE = settings.env.int("MAIL_OUTBOX_BATCH_SIZE", default=100)
+MAIL_OUTBOX_INTERVAL = settings.env.int("MAIL_OUTBOX_INTERVAL", default=10)
+MAIL_OUTBOX_MAX_ATTEMPTS = settings.env.int("MAIL_OUTBOX_MAX_ATTEMPTS", default=5)
+MAIL_OUTBOX_RETRY_DELAY = settings.env.int("MAIL_OUTBOX_RETRY_DELAY", default=60)
+
+"""
+PAYROLL_RUN_WORKERS: int
+
+Number of worker processes used to compute the payslips of a batch. When it
+is 0 the payslips are computed in the request.
+
+PAYROLL_RUN_CHUNK_SIZE: int
+
+Number of employees computed by a worker process at a time. Batches smaller
+than a chunk are always computed in the request.
+
+PAYROLL_RUN_TIMEOUT: int
+
+Seconds a queued or running payroll run may go without progress. A run
+whose process was stopped never finishes, it is marked as failed when its
+progress is polled after this delay.
+"""
+PAYROLL_RUN_WORKERS = settings.env.int("PAYROLL_RUN_WORKERS", default=0)
+PAYROLL_RUN_CHUNK_SIZE = settings.env.int("PAYROLL_RUN_CHUNK_SIZE", default=100)
+PAYROLL_RUN_TIMEOUT = settings.env.int("PAYROLL_RUN_TIMEOUT", default=1800)
+
+"""
+SCHEDULER_LEASE_SECONDS: int
+
+Seconds the leader run_scheduler process holds its lease without renewing
+it, another process takes over the scheduled jobs once it expires, see
+horilla.horilla_scheduler.
+
+SCHEDULER_HISTORY_DAYS: int
+
+Days the runs of the scheduled jobs are kept for monitoring.
+"""
+SCHEDULER_LEASE_SECONDS = settings.env.int("SCHEDULER_LEASE_SECONDS", default=60)
+SCHEDULER_HISTORY_DAYS = settings.env.int("SCHEDULER_HISTORY_DAYS", default=7)
+
+"""
+EXPORT_CHUNK_SIZE: int
+
+Number of records fetched at a time by the data exports, see
+horilla.horilla_export.
+"""
+EXPORT_CHUNK_SIZE = settings.env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+"""
+PAYSLIP_PDF_WORKERS: int
+
+Number of worker processes converting the payslips to PDF. When it is 0 the
+payslips are converted in the process that needs them.
+
+PAYSLIP_PDF_CHUNK_SIZE: int
+
+Number of payslips converted by a worker process at a time. Batches with
+fewer payslips to convert are always converted in the process that needs
+them.
+
+PAYSLIP_PDF_ROOT: str
+
+Directory keeping the rendered payslip PDFs. It must not be served, unlike
+MEDIA_ROOT, the PDFs are only downloaded through the payslip views.
+"""
+PAYSLIP_PDF_WORKERS = settings.env.int("PAYSLIP_PDF_WORKERS", default=0)
+PAYSLIP_PDF_CHUNK_SIZE = settings.env.int("PAYSLIP_PDF_CHUNK_SIZE", default=20)
+PAYSLIP_PDF_ROOT = settings.env(
+    "PAYSLIP_PDF_ROOT", default=str(settings.BASE_DIR / "private" / "payslip_pdf")
+)
+
+"""
+WORKING_CALENDAR_VERSION_SECONDS: int
+
+Seconds a process keeps using the holiday and company leave calendar before
+checking its version in the database again, see base.working_calendar.
+"""
+WORKING_CALENDAR_VERSION_SECONDS = settings.env.int(
+    "WORKING_CALENDAR_VERSION_SECONDS", default=5
+)
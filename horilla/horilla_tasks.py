@@ -0,0 +1,164 @@
+"""
+horilla_tasks.py
+
+Shared in-process executor for the background side effects of a request,
+mails, automations and recomputations triggered by signals.
+
+Every task runs on a bounded thread pool instead of a thread of its own, so
+the number of threads, and of database connections, stays bounded however
+many records are saved at once. The database connection of a worker is
+reused from a task to the next and released after each task according to
+CONN_MAX_AGE, like a request. When the queue is full the task runs in the
+caller, which slows the producer down instead of dropping the task.
+
+The counters of the executor are available with ``background_executor.metrics()``.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from horilla.horilla_middlewares import _thread_locals
+from horilla.horilla_settings import BACKGROUND_QUEUE_SIZE, BACKGROUND_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundExecutor:
+    """
+    Bounded thread pool running the background tasks
+    """
+
+    def __init__(self, workers=BACKGROUND_WORKERS, queue_size=BACKGROUND_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.queued = 0
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.ran_in_caller = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def _get_executor(self):
+        # the pool is created in the process that uses it, a forked web
+        # worker does not inherit the threads of its parent
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="horilla-background"
+            )
+            self._pid = os.getpid()
+            self.queued = self.active = 0
+        return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in the background
+
+        Returns:
+            Future: resolved with the result of the task, None if it failed
+        """
+        with self._lock:
+            self.submitted += 1
+            executor = self._get_executor()
+            in_caller = self.queued >= self.queue_size
+            if in_caller:
+                self.ran_in_caller += 1
+            else:
+                self.queued += 1
+        if in_caller:
+            logger.warning(
+                "Background queue is full, running %s in the caller",
+                getattr(func, "__qualname__", func),
+            )
+            future = Future()
+            future.set_result(self._run(func, args, kwargs, time.monotonic(), False))
+            return future
+        return executor.submit(self._run, func, args, kwargs, time.monotonic(), True)
+
+    def _run(self, func, args, kwargs, submitted_at, in_worker):
+        started_at = time.monotonic()
+        with self._lock:
+            if in_worker:
+                self.queued -= 1
+            self.active += 1
+            wait = started_at - submitted_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        failed = False
+        if in_worker:
+            close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            logger.exception(
+                "Background task %s failed", getattr(func, "__qualname__", func)
+            )
+        finally:
+            if in_worker:
+                close_old_connections()
+                # the worker thread is reused, nothing is carried to the next task
+                _thread_locals.__dict__.clear()
+            run = time.monotonic() - started_at
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.failed += failed
+                self.total_run += run
+                self.max_run = max(self.max_run, run)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: queue depth, running tasks, task counters and latencies in seconds
+        """
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "ran_in_caller": self.ran_in_caller,
+                "avg_wait": self.total_wait / completed,
+                "max_wait": self.max_wait,
+                "avg_run": self.total_run / completed,
+                "max_run": self.max_run,
+            }
+
+
+background_executor = BackgroundExecutor()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Submit func(*args, **kwargs) to the shared background executor
+    """
+    return background_executor.submit(func, *args, **kwargs)
+
+
+class BackgroundTask:
+    """
+    Base of the mail senders, a drop-in for threading.Thread whose start()
+    runs the task on the shared background executor
+    """
+
+    def run(self):
+        pass
+
+    def start(self):
+        return run_in_background(self.run)
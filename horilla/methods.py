@@ -71,3 +71,17 @@ def horilla_users_with_perms(permissions):
         )
 
     return users_with_permissions.distinct()
+
+
+def set_session_value(session, key, value):
+    """
+    Stores the value in the session only when it differs from the stored one,
+    so that a request reading the same state does not rewrite the session.
+
+    Args:
+        session: The session of the request.
+        key (str): The session key.
+        value: The JSON serializable value to store.
+    """
+    if key not in session or session[key] != value:
+        session[key] = value
@@ -188,6 +188,12 @@ CSRF_TRUSTED_ORIGINS = env("CSRF_TRUSTED_ORIGINS")
 
 LOGIN_URL = "/login"
 
+# Session storage, "django.contrib.sessions.backends.cached_db" reads the
+# sessions from the cache, so the requests do not query the session table.
+# The sessions hold the selected filters and lists of ids, which outgrow the
+# 4KB of a cookie, signed_cookies is not supported
+SESSION_ENGINE = env("SESSION_ENGINE", default="django.contrib.sessions.backends.db")
+
 
 SIMPLE_HISTORY_REVERT_DISABLED = True
 
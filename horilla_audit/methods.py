@@ -4,7 +4,6 @@ methods.py
 This module is used to write methods related to the history
 """
 
-from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db import models
 from django.shortcuts import render
@@ -23,33 +22,6 @@ class Bot:
         return "https://ui-avatars.com/api/?name=Horilla+Bot&background=random"
 
 
-def _check_and_delete(entry1, entry2, dry_run=False):
-    delta = entry1.diff_against(entry2)
-    if not delta.changed_fields:
-        if not dry_run:
-            entry1.delete()
-        return 1
-    return 0
-
-
-def remove_duplicate_history(instance):
-    """
-    This method is used to remove duplicate entries
-    """
-    o_qs = instance.history_set.all()
-    entries_deleted = 0
-    # ordering is ('-history_date', '-history_id') so this is ok
-    f1 = o_qs.first()
-    if not f1:
-        return
-    for f2 in o_qs[1:]:
-        entries_deleted += _check_and_delete(
-            f1,
-            f2,
-        )
-        f1 = f2
-
-
 def get_field_label(model_class, field_name):
     # Check if the field exists in the model class
     if hasattr(model_class, field_name):
@@ -73,26 +45,54 @@ def filter_history(histories, track_fields):
     return histories
 
 
+def history_changes(entry, previous):
+    """
+    Changes of a history entry against the previous one, the stored delta or
+    the one computed by simple history for the entries recorded without it
+    """
+    if entry.history_changes is not None:
+        return [
+            (change["field"], change["old"], change["new"])
+            for change in entry.history_changes
+        ]
+    delta = entry.diff_against(previous)
+    return [(change.field, change.old, change.new) for change in delta.changes]
+
+
+def history_user(entry):
+    """
+    Employee who recorded the history entry
+    """
+    try:
+        return entry.history_user.employee_get
+    except Exception:
+        return Bot()
+
+
 def get_diff(instance):
     """
     This method is used to find the differences in the history
+
+    The changes are stored on each entry when it is recorded, the entries
+    are fetched once with their users and tags.
     """
-    remove_duplicate_history(instance)
-    history = instance.history_set.all()
-    history_list = list(history)
-    pairs = [
-        [history_list[i], history_list[i + 1]] for i in range(len(history_list) - 1)
-    ]
+    history_list = list(
+        instance.history_set.select_related(
+            "history_user__employee_get"
+        ).prefetch_related("history_tags")
+    )
     delta_changes = []
-    create_history = history.filter(history_type="+").first()
-    for pair in pairs:
-        delta = pair[0].diff_against(pair[1])
+    create_history = next(
+        (entry for entry in history_list if entry.history_type == "+"), None
+    )
+    class_name = instance.__class__
+    for entry, previous in zip(history_list, history_list[1:]):
+        changes = history_changes(entry, previous)
+        if not changes:
+            continue
         diffs = []
-        class_name = pair[0].instance.__class__
-        for change in delta.changes:
-            old = change.old
-            new = change.new
-            field = instance._meta.get_field(change.field)
+        for field_name, old, new in changes:
+            field = instance._meta.get_field(field_name)
             is_fk = False
             if (
                 isinstance(field, models.fields.CharField)
@@ -101,44 +101,33 @@ def get_diff(instance):
                 and new
             ):
                 choices = dict(field.choices)
-                old = choices[old]
-                new = choices[new]
+                old = choices.get(old, old)
+                new = choices.get(new, new)
             if isinstance(field, models.ForeignKey):
                 is_fk = True
-                # old = getattr(pair[0], change.field)
-                # new = getattr(pair[1], change.field)
             diffs.append(
                 {
-                    "field": get_field_label(class_name, change.field),
-                    "field_name": change.field,
+                    "field": get_field_label(class_name, field_name),
+                    "field_name": field_name,
                     "is_fk": is_fk,
                     "old": old,
                     "new": new,
                 }
             )
-        updated_by = (
-            User.objects.get(id=pair[0].history_user.id).employee_get
-            if pair[0].history_user
-            else Bot()
-        )
         delta_changes.append(
             {
                 "type": "Changes",
-                "pair": pair,
+                "pair": [entry, previous],
                 "changes": diffs,
-                "updated_by": updated_by,
+                "updated_by": history_user(entry),
             }
         )
     if create_history:
-        try:
-            updated_by = create_history.history_user.employee_get
-        except:
-            updated_by = Bot()
         delta_changes.append(
             {
                 "type": f"{create_history.instance.__class__._meta.verbose_name.capitalize()} created",
                 "pair": (create_history, create_history),
-                "updated_by": updated_by,
+                "updated_by": history_user(create_history),
             }
         )
     if instance._meta.model_name == "employeeworkinformation":
@@ -4,6 +4,7 @@ models.py
 
 from collections.abc import Iterable
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.dispatch import receiver
 from simple_history.models import (
@@ -19,7 +20,6 @@ from simple_history.signals import (  # pre_create_historical_m2m_records,; post
 
 # from employee.models import Employee
 from horilla.models import HorillaModel
-from horilla_audit.methods import remove_duplicate_history
 
 # Create your models here.
 
@@ -52,6 +52,8 @@ class HorillaAuditInfo(models.Model):
     history_description = models.TextField(null=True)
     history_highlight = models.BooleanField(default=False, null=True)
     history_tags = models.ManyToManyField(AuditTag)
+    # fields changed since the previous entry, see HorillaAuditLog
+    history_changes = models.JSONField(null=True, blank=True, editable=False)
 
     class Meta:
         """
@@ -62,16 +64,72 @@ class HorillaAuditInfo(models.Model):
         abstract = True
 
 
+def history_value(value):
+    """
+    JSON value of a field stored in the history changes
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
 class HorillaAuditLog(HistoricalRecords):
     """
     Model to store additional information for historical records.
+
+    An update is only recorded when a tracked field changed since the latest
+    entry, and the changed fields are stored on the entry.
     """
 
     # def __init__(self, *args, bases=None, **kwargs):
     #     super(HorillaAuditLog, self).__init__(*args, **kwargs)
     #     self.is_horilla_audit_log = True
 
-    pass
+    def get_history_changes(self, instance):
+        """
+        Fields of the instance changed since its latest history entry, the
+        editable fields only like diff_against, so the timestamps and the
+        modifier alone do not make a change
+
+        Returns:
+            list: field, old and new value of each changed field, None when
+            the instance has no history yet
+        """
+        fields = [field for field in self.fields_included(instance) if field.editable]
+        previous = (
+            getattr(instance, self.manager_name)
+            .values(*[field.attname for field in fields])
+            .first()
+        )
+        if previous is None:
+            return None
+        changes = []
+        for field in fields:
+            old = previous[field.attname]
+            new = getattr(instance, field.attname)
+            try:
+                new = field.to_python(new)
+            except ValidationError:
+                pass
+            if old != new:
+                changes.append(
+                    {
+                        "field": field.name,
+                        "old": history_value(old),
+                        "new": history_value(new),
+                    }
+                )
+        return changes
+
+    def create_historical_record(self, instance, history_type, using=None):
+        changes = None
+        if history_type == "~":
+            changes = self.get_history_changes(instance)
+            if changes == []:
+                # nothing changed since the latest entry
+                return
+        instance._history_changes = changes
+        super().create_historical_record(instance, history_type, using=using)
 
     # history_comments = models.ManyToManyField("HistoryComment", blank=True)
 
@@ -81,6 +139,9 @@ def pre_create_horilla_audit_log(sender, instance, *args, **kwargs):
     """
     Pre create horill audit log method
     """
+    kwargs["history_instance"].history_changes = getattr(
+        instance, "_history_changes", None
+    )
     try:
         history_instance = kwargs["history_instance"]
         history_instance.history_title = HistoricalRecords.thread.request.POST.get(
@@ -109,12 +170,6 @@ def post_create_horilla_audit_log(sender, instance, *_args, **kwargs):
         history_instance.history_tags.set(
             HistoricalRecords.thread.request.POST.getlist("history_tags")
         )
-        if isinstance(history_instance, HorillaAuditLog):
-            history_instance.history_title = "Demo Title"
-            remove_duplicate_history(instance)
-            if instance.skip_history:
-                instance.history_set.filter(pk=history_instance.pk).delete()
-            kwargs["history_instance"] = None
     except:
         pass
 
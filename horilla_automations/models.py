@@ -60,6 +60,26 @@ class MailAutomation(HorillaModel):
     def __str__(self) -> str:
         return self.title
 
+    def get_query_strings(self):
+        """
+        Conditions of the automation, split on their logic
+        """
+        from horilla_automations.methods.methods import split_query_string
+
+        return split_query_string(
+            (self.condition_querystring or "").replace("automation_multiple_", "")
+        )
+
+    def condition_fields(self):
+        """
+        Attributes of the model compared by the conditions of the automation
+        """
+        return [
+            condition.getlist("condition")[0]
+            for condition in self.get_query_strings()
+            if condition.getlist("condition")
+        ]
+
     def get_avatar(self):
         """
         Method will retun the api to the avatar or path to the profile image
@@ -3,12 +3,11 @@ horilla_automation/signals.py
 
 """
 
-import copy
 import logging
-import threading
 import types
 
 from django import template
+from django.core.exceptions import FieldDoesNotExist
 from django.core.mail import EmailMessage
 from django.db import models
 from django.db.models.query import QuerySet
@@ -16,31 +15,166 @@ from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from horilla.horilla_middlewares import _thread_locals
+from horilla.horilla_tasks import run_in_background
 from horilla.signals import post_bulk_update, pre_bulk_update
 
 logger = logging.getLogger(__name__)
 
 
-@classmethod
-def from_list(cls, object_list):
-    # Create a queryset-like object from the list
-    queryset_like_object = cls(model=object_list[0].__class__)
-    queryset_like_object._result_cache = list(object_list)
-    queryset_like_object._prefetch_related_lookups = ()
-    return queryset_like_object
+SIGNAL_HANDLERS = []
+INSTANCE_HANDLERS = []
 
 
-setattr(QuerySet, "from_list", from_list)
+def condition_value(value):
+    """
+    Value of an attribute as compared by the automation conditions
+    """
+    if getattr(value, "pk", None) and isinstance(value, models.Model):
+        return str(value.pk)
+    if isinstance(value, QuerySet):
+        return list(value.values_list("pk", flat=True))
+    return value
+
 
-SIGNAL_HANDLERS = []
-INSTANCE_HANDLERS = []
+def value_lookup(model_class, attr):
+    """
+    How the previous value of a condition attribute is read
+
+    Returns:
+        tuple: ("column", values() lookup, whether it is a relation) when the
+        value is stored in a column, ("many",) for many valued relations
+        whose previous value is the current one at save time and
+        ("computed",) for properties and methods evaluated on the
+        previous instance
+    """
+    model = model_class
+    field = None
+    for part in attr.split("__"):
+        if model is None:
+            return ("computed",)
+        try:
+            field = model._meta.pk if part == "pk" else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return ("computed",)
+        if field.many_to_many or field.one_to_many:
+            return ("many",)
+        if not field.concrete:
+            return ("computed",)
+        model = field.related_model
+    return ("column", attr, field.is_relation)
+
+
+def capture_previous_values(model_class, attrs, queryset):
+    """
+    Snapshot of the condition attributes of the records in the queryset
+
+    The attributes stored in a column are read with a single values() query,
+    the previous instances are only fetched for the computed ones.
+
+    Returns:
+        dict: {pk: {attr: previous value}}
+    """
+    from horilla_views.templatetags.generic_template_filters import getattribute
+
+    lookups = {attr: value_lookup(model_class, attr) for attr in attrs}
+    columns = {
+        attr: lookup for attr, lookup in lookups.items() if lookup[0] == "column"
+    }
+    computed = [attr for attr, lookup in lookups.items() if lookup[0] == "computed"]
+    rows = queryset.values("pk", *columns)
+    instances = (
+        model_class._base_manager.in_bulk([row["pk"] for row in rows])
+        if computed
+        else {}
+    )
+    previous_records = {}
+    for row in rows:
+        previous_values = {}
+        for attr, (_kind, lookup, is_relation) in columns.items():
+            value = row[lookup]
+            previous_values[attr] = (
+                str(value) if is_relation and value is not None else value
+            )
+        for attr in computed:
+            previous_values[attr] = condition_value(
+                getattribute(instances.get(row["pk"]), attr)
+            )
+        previous_records[row["pk"]] = previous_values
+    return previous_records
+
+
+def updated_value(model_class, attr, updates):
+    """
+    Value the update sets to the attribute, the update values are assumed
+    unknown for related paths and expressions
+
+    Returns:
+        tuple: (whether the value is known, value)
+    """
+    try:
+        field = model_class._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return False, None
+    for key in (field.name, getattr(field, "attname", None)):
+        if key in updates:
+            value = updates[key]
+            break
+    else:
+        return False, None
+    if hasattr(value, "resolve_expression"):
+        return False, None
+    if field.is_relation:
+        value = getattr(value, "pk", value)
+        return True, str(value) if value is not None else None
+    return True, field.to_python(value)
+
+
+def is_applicable(query_strings, values):
+    """
+    Whether the conditions of an automation hold for the given values, in
+    the order of the conditions
+    """
+    from horilla_automations.methods.methods import evaluate_condition, operator_map
+
+    applicable = False
+    and_exists = False
+    false_exists = False
+    values = iter(values)
+    for condition in query_strings:
+        if condition.getlist("condition"):
+            operator = condition.getlist("condition")[1]
+            value = condition.getlist("condition")[2]
+
+            if value == "on":
+                value = True
+            elif value == "off":
+                value = False
+            instance_value = next(values)
+
+            if not condition.get("logic"):
+
+                applicable = evaluate_condition(instance_value, operator, value)
+            logic = condition.get("logic")
+            if logic:
+                applicable = operator_map[logic](
+                    applicable,
+                    evaluate_condition(instance_value, operator, value),
+                )
+            if not applicable:
+                false_exists = True
+            if logic == "and":
+                and_exists = True
+            if false_exists and and_exists:
+                applicable = False
+                break
+    return applicable
 
 
 def start_automation():
     """
     Automation signals
     """
-    from horilla_automations.methods.methods import get_model_class, split_query_string
+    from horilla_automations.methods.methods import get_model_class
     from horilla_automations.models import MailAutomation
 
     @receiver(post_delete, sender=MailAutomation)
@@ -63,34 +197,30 @@ def start_automation():
 
     def create_post_bulk_update_handler(automation, model_class, query_strings):
         def post_bulk_update_handler(sender, queryset, *args, **kwargs):
-            def _bulk_update_thread_handler(
-                queryset, previous_queryset_copy, automation
-            ):
-                request = getattr(queryset, "request", None)
-
-                if request:
-                    for index, instance in enumerate(queryset):
-                        previous_instance = previous_queryset_copy[index]
+            def _bulk_update_thread_handler(request, previous_records, automation):
+                instances = model_class._base_manager.in_bulk(list(previous_records))
+                for pk, previous_values in previous_records.items():
+                    if pk in instances:
                         send_automated_mail(
                             request,
                             False,
                             automation,
                             query_strings,
-                            instance,
-                            previous_instance,
+                            instances[pk],
+                            previous_values,
                         )
 
-            previous_bulk_record = getattr(_thread_locals, "previous_bulk_record", None)
-            previous_queryset = None
-            if previous_bulk_record:
-                previous_queryset = previous_bulk_record["queryset"]
-                previous_queryset_copy = previous_bulk_record["queryset_copy"]
-
-            bulk_thread = threading.Thread(
-                target=_bulk_update_thread_handler,
-                args=(queryset, previous_queryset_copy, automation),
+            request = getattr(queryset, "request", None)
+            previous_records = getattr(queryset, "automation_previous_records", {}).get(
+                automation.id
             )
-            bulk_thread.start()
+            if request and previous_records:
+                run_in_background(
+                    _bulk_update_thread_handler,
+                    request,
+                    previous_records,
+                    automation,
+                )
 
         func_name = f"{automation.method_title}_post_bulk_signal_handler"
 
@@ -117,11 +247,7 @@ def start_automation():
         automations = MailAutomation.objects.filter(is_active=True)
         for automation in automations:
 
-            condition_querystring = automation.condition_querystring.replace(
-                "automation_multiple_", ""
-            )
-
-            query_strings = split_query_string(condition_querystring)
+            query_strings = automation.get_query_strings()
 
             model_path = automation.model
             model_class = get_model_class(model_path)
@@ -139,23 +265,22 @@ def start_automation():
                     Signal handler for post-save events of the model instances.
                     """
                     request = getattr(_thread_locals, "request", None)
-                    previous_record = getattr(_thread_locals, "previous_record", None)
-                    previous_instance = None
-                    if previous_record:
-                        previous_instance = previous_record["instance"]
+                    if not request:
+                        # the mails are only sent from a request
+                        return
+                    previous_values = (
+                        getattr(instance, "automation_previous_values", None) or {}
+                    )
 
-                    args = (
+                    run_in_background(
+                        send_automated_mail,
                         request,
                         created,
                         automation,
                         query_strings,
                         instance,
-                        previous_instance,
-                    )
-                    thread = threading.Thread(
-                        target=lambda: send_automated_mail(*args),
+                        previous_values,
                     )
-                    thread.start()
 
                 signal_handler.__name__ = name
                 signal_handler.model_class = model_class
@@ -172,39 +297,73 @@ def start_automation():
                 dynamic_signal_handler, sender=dynamic_signal_handler.model_class
             )
 
-    def create_pre_bulk_update_handler(automation, model_class):
-        def pre_bulk_update_handler(sender, queryset, *args, **kwargs):
-            request = getattr(_thread_locals, "request", None)
-            if request:
-                queryset_copy = queryset.none()
-                if queryset.count():
-                    queryset_copy = QuerySet.from_list(copy.deepcopy(list(queryset)))
-                _thread_locals.previous_bulk_record = {
-                    "automation": automation,
-                    "queryset": queryset,
-                    "queryset_copy": queryset_copy,
-                }
-
-        func_name = f"{automation.method_title}_pre_bulk_signal_handler"
-
-        # Dynamically create a function with a unique name
-        handler = types.FunctionType(
-            pre_bulk_update_handler.__code__,
-            globals(),
-            name=func_name,
-            argdefs=pre_bulk_update_handler.__defaults__,
-            closure=pre_bulk_update_handler.__closure__,
+    def create_pre_bulk_update_handler(model_class, automations):
+        def pre_bulk_update_handler(sender, queryset, **kwargs):
+            if getattr(_thread_locals, "request", None) is None:
+                return
+            updates = kwargs.get("kwargs") or {}
+            updated_fields = {model_class._meta.get_field(key).name for key in updates}
+            attrs = set()
+            automation_ids = []
+            for automation, fields in automations:
+                lookups = [value_lookup(model_class, attr) for attr in fields]
+                if not any(
+                    lookup[0] == "computed"
+                    or (
+                        lookup[0] == "column"
+                        and lookup[1].split("__")[0] in updated_fields
+                    )
+                    for lookup in lookups
+                ):
+                    # the update does not change what the automation compares
+                    continue
+                known = [updated_value(model_class, attr, updates) for attr in fields]
+                if all(is_known for is_known, _value in known) and not is_applicable(
+                    automation.get_query_strings(), [value for _known, value in known]
+                ):
+                    # none of the updated records can match the conditions
+                    continue
+                attrs.update(fields)
+                automation_ids.append(automation.id)
+            if not automation_ids:
+                return
+            previous_records = capture_previous_values(model_class, attrs, queryset)
+            queryset.automation_previous_records = {
+                automation_id: previous_records for automation_id in automation_ids
+            }
+
+        pre_bulk_update_handler.__name__ = (
+            f"{model_class.__name__.lower()}_pre_bulk_signal_handler"
         )
+        pre_bulk_update_handler.model_class = model_class
+        return pre_bulk_update_handler
 
-        # Set additional attributes on the function
-        handler.model_class = model_class
-        handler.automation = automation
-
-        return handler
+    def create_pre_save_handler(model_class, attrs):
+        def instance_handler(sender, instance, **kwargs):
+            """
+            Signal handler for pres-save events of the model instances.
+            """
+            # the snapshot is kept on the instance, so it cannot be picked up
+            # by the save of another record
+            instance.automation_previous_values = None
+            if not instance.pk or getattr(_thread_locals, "request", None) is None:
+                return
+            instance.automation_previous_values = capture_previous_values(
+                model_class,
+                attrs,
+                model_class._base_manager.filter(pk=instance.pk),
+            ).get(instance.pk)
+
+        instance_handler.__name__ = f"{model_class.__name__.lower()}_instance_handler"
+        instance_handler.model_class = model_class
+        return instance_handler
 
     def track_previous_instance():
         """
         method to add signal to track the automations model previous instances
+
+        Only the attributes compared by the on update automations are kept,
+        one snapshot per save whatever the number of automations of the model.
         """
 
         def clear_instance_signal_connection():
@@ -217,38 +376,26 @@ def start_automation():
             INSTANCE_HANDLERS.clear()
 
         clear_instance_signal_connection()
-        automations = MailAutomation.objects.filter(is_active=True)
-        for automation in automations:
+        automations = {}
+        for automation in MailAutomation.objects.filter(
+            is_active=True, trigger="on_update"
+        ):
             model_class = get_model_class(automation.model)
+            automations.setdefault(model_class, []).append(
+                (automation, automation.condition_fields())
+            )
+        for model_class, model_automations in automations.items():
+            attrs = {
+                attr for _automation, fields in model_automations for attr in fields
+            }
 
-            handler = create_pre_bulk_update_handler(automation, model_class)
+            handler = create_pre_bulk_update_handler(model_class, model_automations)
             INSTANCE_HANDLERS.append(handler)
             pre_bulk_update.connect(handler, sender=model_class)
 
-            @receiver(pre_save, sender=model_class)
-            def instance_handler(sender, instance, **kwargs):
-                """
-                Signal handler for pres-save events of the model instances.
-                """
-                # prevented storing the scheduled activities
-                request = getattr(_thread_locals, "request", None)
-                if instance.pk:
-                    # to get the previous instance
-                    instance = model_class.objects.filter(id=instance.pk).first()
-                if request:
-                    _thread_locals.previous_record = {
-                        "automation": automation,
-                        "instance": instance,
-                    }
-                instance_handler.__name__ = (
-                    f"{automation.method_title}_instance_handler"
-                )
-                return instance_handler
-
-            instance_handler.model_class = model_class
-            instance_handler.automation = automation
-
+            instance_handler = create_pre_save_handler(model_class, attrs)
             INSTANCE_HANDLERS.append(instance_handler)
+            pre_save.connect(instance_handler, sender=model_class)
 
     track_previous_instance()
     start_connection()
@@ -260,69 +407,32 @@ def send_automated_mail(
     automation,
     query_strings,
     instance,
-    previous_instance,
+    previous_values,
 ):
-    from horilla_automations.methods.methods import evaluate_condition, operator_map
+    """
+    Send the automation mail if the instance matches its conditions
+
+    previous_values are the condition attributes before the update, see
+    capture_previous_values, the attributes missing from it are unchanged
+    """
     from horilla_views.templatetags.generic_template_filters import getattribute
 
-    applicable = False
-    and_exists = False
-    false_exists = False
     instance_values = []
     previous_instance_values = []
     for condition in query_strings:
         if condition.getlist("condition"):
             attr = condition.getlist("condition")[0]
-            operator = condition.getlist("condition")[1]
-            value = condition.getlist("condition")[2]
-
-            if value == "on":
-                value = True
-            elif value == "off":
-                value = False
-            instance_value = getattribute(instance, attr)
-            previous_instance_value = getattribute(previous_instance, attr)
             # The send mail method only trigger when actually any changes
             # b/w the previous, current instance's `attr` field's values and
             # if applicable for the automation
-            if getattr(instance_value, "pk", None) and isinstance(
-                instance_value, models.Model
-            ):
-                instance_value = str(getattr(instance_value, "pk", None))
-                previous_instance_value = str(
-                    getattr(previous_instance_value, "pk", None)
-                )
-            elif isinstance(instance_value, QuerySet):
-                instance_value = list(instance_value.values_list("pk", flat=True))
-                previous_instance_value = list(
-                    previous_instance_value.values_list("pk", flat=True)
-                )
-
+            instance_value = condition_value(getattribute(instance, attr))
             instance_values.append(instance_value)
-
-            previous_instance_values.append(previous_instance_value)
-
-            if not condition.get("logic"):
-
-                applicable = evaluate_condition(instance_value, operator, value)
-            logic = condition.get("logic")
-            if logic:
-                applicable = operator_map[logic](
-                    applicable,
-                    evaluate_condition(instance_value, operator, value),
-                )
-            if not applicable:
-                false_exists = True
-            if logic == "and":
-                and_exists = True
-            if false_exists and and_exists:
-                applicable = False
-                break
-    if applicable:
+            previous_instance_values.append(previous_values.get(attr, instance_value))
+    if is_applicable(query_strings, instance_values):
         if created and automation.trigger == "on_create":
             send_mail(request, automation, instance)
         elif (automation.trigger == "on_update") and (
-            set(previous_instance_values) != set(instance_values)
+            previous_instance_values != instance_values
         ):
 
             send_mail(request, automation, instance)
@@ -333,6 +443,7 @@ def send_mail(request, automation, instance):
     mail sending method
     """
     from base.backends import ConfiguredEmailBackend
+    from base.mail_outbox import enqueue_mail
     from base.methods import generate_pdf
     from horilla_automations.methods.methods import (
         get_model_class,
@@ -378,13 +489,4 @@ def send_mail(request, automation, instance):
 
         email.attachments = attachments
 
-        def _send_mail(email):
-            try:
-                email.send()
-            except Exception as e:
-                logger.error(e)
-
-        thread = threading.Thread(
-            target=lambda: _send_mail(email),
-        )
-        thread.start()
+        enqueue_mail(email, request=request)
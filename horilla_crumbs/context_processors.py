@@ -1,3 +1,4 @@
+import copy
 import uuid
 from urllib.parse import urlparse
 
@@ -6,6 +7,7 @@ from django.shortcuts import redirect
 from django.urls import Resolver404, path, resolve, reverse
 
 from employee.models import Employee
+from horilla.methods import set_session_value
 from horilla.urls import urlpatterns
 
 
@@ -163,15 +165,15 @@ user_breadcrumbs = {}
 def breadcrumbs(request):
     base_url = request.build_absolute_uri("/")
 
-    # Initialize breadcrumbs in the session if not already present
-    if "breadcrumbs" not in request.session:
-        request.session["breadcrumbs"] = [
-            {"url": base_url, "name": "Horilla", "found": True}
-        ]
+    # The breadcrumbs are built on a copy, the session is only written when
+    # they change
+    breadcrumbs = copy.deepcopy(
+        request.session.get(
+            "breadcrumbs", [{"url": base_url, "name": "Horilla", "found": True}]
+        )
+    )
 
     try:
-        breadcrumbs = request.session["breadcrumbs"]
-
         qs = request.META.get("QUERY_STRING", "")
         pairs = qs.split("&")
         filtered_pairs = [pair for pair in pairs if "=" in pair and pair.split("=")[1]]
@@ -209,9 +211,11 @@ def breadcrumbs(request):
                     pass
                 else:
                     # Store the candidates in the session
-                    request.session["filtered_candidates"] = [
-                        candidate.id for candidate in candidates
-                    ]
+                    set_session_value(
+                        request.session,
+                        "filtered_candidates",
+                        [candidate.id for candidate in candidates],
+                    )
 
             if "employee-filter-view" in parts:
                 pass
@@ -223,12 +227,14 @@ def breadcrumbs(request):
                 pass
             else:
                 # Store the employees in the session
-                request.session["filtered_employees"] = [
-                    employee.id for employee in employees
-                ]
+                set_session_value(
+                    request.session,
+                    "filtered_employees",
+                    [employee.id for employee in employees],
+                )
 
         if len(parts) == 0:
-            request.session["breadcrumbs"].clear()
+            breadcrumbs.clear()
             breadcrumbs.append({"url": base_url, "name": "Horilla", "found": True})
 
         if len(parts) > 1:
@@ -240,8 +246,8 @@ def breadcrumbs(request):
                 or parts[-2] == "view-payslip"
             ):
                 first_path = breadcrumbs[0]
-                request.session["breadcrumbs"].clear()
-                request.session["breadcrumbs"].append(first_path)
+                breadcrumbs.clear()
+                breadcrumbs.append(first_path)
         for i, item in enumerate(parts):
             path = path + item + "/"
             parsed_url = urlparse(path)
@@ -290,13 +296,12 @@ def breadcrumbs(request):
         except:
             pass
 
-        request.session["breadcrumbs"] = breadcrumbs
-
     except Exception as e:
-        request.session["breadcrumbs"] = [
-            {"url": base_url, "name": "Horilla", "found": True}
-        ]
-    return {"breadcrumbs": request.session["breadcrumbs"]}
+        breadcrumbs = [{"url": base_url, "name": "Horilla", "found": True}]
+    if getattr(request, "user", None) and request.user.is_authenticated:
+        # no session is created for the anonymous pages
+        set_session_value(request.session, "breadcrumbs", breadcrumbs)
+    return {"breadcrumbs": breadcrumbs}
 
 
 urlpatterns.append(
@@ -11,8 +11,10 @@ from venv import logger
 from django import forms, template
 from django.contrib import messages
 from django.core.cache import cache as CACHE
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
 from django.core.paginator import Paginator
 from django.db import models
+from django.db.models import F, Q, QuerySet
 from django.db.models.fields.related import ForeignKey
 from django.db.models.fields.related_descriptors import (
     ForwardManyToOneDescriptor,
@@ -148,13 +150,6 @@ def login_required(view_func):
         request = getattr(_thread_locals, "request")
         if not getattr(self, "request", None):
             self.request = request
-        path = request.path
-        res = path.split("/", 2)[1].capitalize().replace("-", " ").upper()
-        if res == "PMS":
-            res = "Performance"
-        request.session["title"] = res
-        if path == "" or path == "/":
-            request.session["title"] = "Dashboard".upper()
         if not request.user.is_authenticated:
             login_url = reverse("login")
             params = urlencode(request.GET)
@@ -293,11 +288,95 @@ def render_template(
     return HttpResponse(rendered_content, status=status).content.decode(decoding)
 
 
-def paginator_qry(qryset, page_number, records_per_page=50):
+# Annotation holding the value a queryset is sorted by in the database
+SORT_VALUE = "sortby_value"
+
+
+def seek_filter(value, pk, descending):
+    """
+    Filter of the records listed after (value, pk) when sorted by sortby,
+    the empty values being listed last in descending order and first in
+    ascending order
+    """
+    if descending:
+        if value is None:
+            return Q(**{f"{SORT_VALUE}__isnull": True, "pk__lt": pk})
+        return (
+            Q(**{f"{SORT_VALUE}__lt": value})
+            | Q(**{SORT_VALUE: value, "pk__lt": pk})
+            | Q(**{f"{SORT_VALUE}__isnull": True})
+        )
+    if value is None:
+        return Q(**{f"{SORT_VALUE}__isnull": True, "pk__gt": pk}) | Q(
+            **{f"{SORT_VALUE}__isnull": False}
+        )
+    return Q(**{f"{SORT_VALUE}__gt": value}) | Q(**{SORT_VALUE: value, "pk__gt": pk})
+
+
+class SeekPaginator(Paginator):
     """
-    This method is used to paginate queryset
+    Paginator of the querysets sorted in the database by sortby
+
+    The first and the last record of the served page are kept in the cache,
+    the next and the previous pages are fetched by seeking from them instead
+    of skipping the records of the preceding pages, the other pages by offset.
     """
-    paginator = Paginator(qryset, records_per_page)
+
+    def __init__(self, object_list, per_page, cache_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.descending = object_list.query.order_by[0].descending
+
+    def page(self, number):
+        number = self.validate_number(number)
+        try:
+            query = str(self.object_list.query)
+        except EmptyResultSet:
+            query = None
+        state = CACHE.get(self.cache_key) or {}
+        if query and state.get("query") == query and number == state["number"] + 1:
+            value, pk = state["last"]
+            object_list = list(
+                self.object_list.filter(seek_filter(value, pk, self.descending))[
+                    : self.per_page
+                ]
+            )
+        elif query and state.get("query") == query and number == state["number"] - 1:
+            value, pk = state["first"]
+            object_list = list(
+                self.object_list.filter(
+                    seek_filter(value, pk, not self.descending)
+                ).reverse()[: self.per_page]
+            )[::-1]
+        else:
+            bottom = (number - 1) * self.per_page
+            object_list = list(self.object_list[bottom : bottom + self.per_page])
+        if query and object_list:
+            CACHE.set(
+                self.cache_key,
+                {
+                    "query": query,
+                    "number": number,
+                    "first": (getattr(object_list[0], SORT_VALUE), object_list[0].pk),
+                    "last": (getattr(object_list[-1], SORT_VALUE), object_list[-1].pk),
+                },
+            )
+        return self._get_page(object_list, number, self)
+
+
+def paginator_qry(qryset, page_number, records_per_page=50, seek_key=None):
+    """
+    This method is used to paginate queryset, the querysets sorted in the
+    database by sortby are paginated by seek when a seek_key is given
+    """
+    if (
+        seek_key
+        and isinstance(qryset, QuerySet)
+        and SORT_VALUE in qryset.query.annotations
+    ):
+        paginator = SeekPaginator(qryset, records_per_page, seek_key)
+    else:
+        paginator = Paginator(qryset, records_per_page)
     qryset = paginator.get_page(page_number)
     return qryset
 
@@ -347,11 +426,35 @@ def getmodelattribute(value, attr: str):
     return result
 
 
+def sort_expression(queryset, sort_key: str):
+    """
+    Expression the queryset can be sorted by in the database, None when the
+    key is a method or a property, or goes through a many valued relation
+    """
+    if sort_key in queryset.query.annotations:
+        return F(sort_key)
+    model = queryset.model
+    for part in sort_key.split("__"):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None
+        model = field.related_model
+    return F(sort_key)
+
+
 def sortby(
     query_dict, queryset, key: str, page: str = "page", is_first_sort: bool = False
 ):
     """
     New simplified method to sort the queryset/lists
+
+    The fields and annotations are sorted in the database, the queryset being
+    annotated with the SORT_VALUE, the methods and properties in python.
     """
     request = getattr(_thread_locals, "request", None)
     sort_key = query_dict[key]
@@ -362,21 +465,6 @@ def sortby(
         )
     reverse_object = CACHE.get(request.session.session_key + "cbvsortby")
     reverse = reverse_object.reverse
-    none_ids = []
-    none_queryset = []
-    model = queryset.model
-    model_attr = getmodelattribute(model, sort_key)
-    is_method = isinstance(model_attr, types.FunctionType)
-    if not is_method:
-        none_queryset = queryset.filter(**{f"{sort_key}__isnull": True})
-        none_ids = list(none_queryset.values_list("id", flat=True))
-        queryset = queryset.exclude(id__in=none_ids)
-
-    def _sortby(object):
-        result = getattribute(object, attr=sort_key)
-        if result is None:
-            none_ids.append(object.pk)
-        return result
 
     order = not reverse
     current_page = query_dict.get(page)
@@ -385,19 +473,49 @@ def sortby(
         if reverse_object.page == current_page and not is_first_sort:
             order = not order
         reverse_object.page = current_page
-    try:
-        queryset = sorted(queryset, key=_sortby, reverse=order)
-    except TypeError:
-        none_queryset = list(queryset.filter(id__in=none_ids))
-        queryset = sorted(queryset.exclude(id__in=none_ids), key=_sortby, reverse=order)
 
-    reverse_object.reverse = order
-    if order:
-        order = "asc"
-        queryset = list(queryset) + list(none_queryset)
+    expression = (
+        sort_expression(queryset, sort_key) if isinstance(queryset, QuerySet) else None
+    )
+    if expression is not None:
+        # the empty values are listed last in descending order, first in
+        # ascending order, like in python below
+        queryset = queryset.annotate(**{SORT_VALUE: expression})
+        if order:
+            queryset = queryset.order_by(F(SORT_VALUE).desc(nulls_last=True), "-pk")
+        else:
+            queryset = queryset.order_by(F(SORT_VALUE).asc(nulls_first=True), "pk")
     else:
-        queryset = list(none_queryset) + list(queryset)
-        order = "desc"
+        none_ids = []
+        none_queryset = []
+        model = queryset.model
+        model_attr = getmodelattribute(model, sort_key)
+        is_method = isinstance(model_attr, types.FunctionType)
+        if not is_method:
+            none_queryset = queryset.filter(**{f"{sort_key}__isnull": True})
+            none_ids = list(none_queryset.values_list("id", flat=True))
+            queryset = queryset.exclude(id__in=none_ids)
+
+        def _sortby(object):
+            result = getattribute(object, attr=sort_key)
+            if result is None:
+                none_ids.append(object.pk)
+            return result
+
+        try:
+            queryset = sorted(queryset, key=_sortby, reverse=order)
+        except TypeError:
+            none_queryset = list(queryset.filter(id__in=none_ids))
+            queryset = sorted(
+                queryset.exclude(id__in=none_ids), key=_sortby, reverse=order
+            )
+        if order:
+            queryset = list(queryset) + list(none_queryset)
+        else:
+            queryset = list(none_queryset) + list(queryset)
+
+    reverse_object.reverse = order
+    order = "asc" if order else "desc"
     setattr(request, "sort_order", order)
     setattr(request, "sort_key", sort_key)
     CACHE.set(request.session.session_key + "cbvsortby", reverse_object)
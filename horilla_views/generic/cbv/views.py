@@ -6,12 +6,12 @@ import json
 from typing import Any
 from urllib.parse import parse_qs
 
-from bs4 import BeautifulSoup
 from django import forms
 from django.contrib import messages
+from django.core import signing
 from django.core.cache import cache as CACHE
 from django.core.paginator import Page
-from django.http import HttpRequest, HttpResponse, QueryDict
+from django.http import Http404, HttpRequest, HttpResponse, QueryDict
 from django.shortcuts import render
 from django.urls import resolve, reverse
 from django.utils.decorators import method_decorator
@@ -19,8 +19,10 @@ from django.utils.translation import gettext_lazy as _trans
 from django.views.generic import DetailView, FormView, ListView, TemplateView
 
 from base.methods import closest_numbers, get_key_instances
+from horilla.decorators import login_required
 from horilla.filters import FilterSet
 from horilla.group_by import group_by_queryset
+from horilla.horilla_export import export_response, iterate_export, plain_text
 from horilla.horilla_middlewares import _thread_locals
 from horilla_views import models
 from horilla_views.cbv_methods import (
@@ -35,6 +37,11 @@ from horilla_views.cbv_methods import (
 from horilla_views.forms import DynamicBulkUpdateForm, ToggleColumnForm
 from horilla_views.templatetags.generic_template_filters import getattribute
 
+# "module.ClassName" -> HorillaListView subclass, the export and bulk update
+# routes dispatch to the list view named in their token
+LIST_VIEWS: dict = {}
+LIST_VIEW_TOKEN_SALT = "horilla-list-view"
+
 
 @method_decorator(hx_request_required, name="dispatch")
 class HorillaListView(ListView):
@@ -96,6 +103,10 @@ class HorillaListView(ListView):
     bulk_update_fields: list = []
     bulk_template: str = "generic/bulk_form.html"
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        LIST_VIEWS[f"{cls.__module__}.{cls.__qualname__}"] = cls
+
     def __init__(self, **kwargs: Any) -> None:
         if not self.view_id:
             self.view_id = get_short_uuid(4)
@@ -121,6 +132,20 @@ class HorillaListView(ListView):
             if column[1] in hidden_fields:
                 self.visible_column.remove(column)
 
+    def get_view_token(self) -> str:
+        """
+        Signed token of the view, its url arguments and the user, identifying
+        the view on the export and bulk update routes
+        """
+        return signing.dumps(
+            {
+                "view": f"{type(self).__module__}.{type(self).__qualname__}",
+                "user": self.request.user.pk,
+                "kwargs": {key: str(value) for key, value in self.kwargs.items()},
+            },
+            salt=LIST_VIEW_TOKEN_SALT,
+        )
+
     def bulk_update_accessibility(self) -> bool:
         """
         Accessibility method for bulk update
@@ -296,7 +321,6 @@ class HorillaListView(ListView):
             context["filter_dict"] = data_dict
 
         request = self.request
-        ordered_ids = list(queryset.values_list("id", flat=True))
         is_first_sort = False
         query_dict = self.request.GET
         if (
@@ -314,17 +338,23 @@ class HorillaListView(ListView):
                 query_dict, queryset, self.sortby_key, is_first_sort=is_first_sort
             )
 
-            ordered_ids = [instance.id for instance in queryset]
+        context["queryset"] = paginator_qry(
+            queryset,
+            self._saved_filters.get("page"),
+            self.records_per_page,
+            seek_key=(
+                None
+                if self._saved_filters.get("field")
+                else f"{self.request.session.session_key}{self.request.path}cbvseek"
+            ),
+        )
+        # only the records of the page are navigated in the detailed view
         ordered_ids = []
         if not self._saved_filters.get("field"):
-            for instance in queryset:
+            for instance in context["queryset"]:
                 instance.ordered_ids = ordered_ids
                 ordered_ids.append(instance.pk)
 
-        context["queryset"] = paginator_qry(
-            queryset, self._saved_filters.get("page"), self.records_per_page
-        )
-
         if request and self._saved_filters.get("field"):
             field = self._saved_filters.get("field")
             self.template_name = "generic/group_by.html"
@@ -344,35 +374,16 @@ class HorillaListView(ListView):
                     instance.ordered_ids = ordered_ids
                     ordered_ids.append(instance.pk)
         CACHE.get(self.request.session.session_key + "cbv")[HorillaListView] = context
-        from horilla.urls import path, urlpatterns
-
-        self.export_path = f"export-list-view-{get_short_uuid(4)}/"
 
-        urlpatterns.append(path(self.export_path, self.export_data))
+        token = self.get_view_token()
+        self.export_path = reverse("list-view-export", kwargs={"token": token})[1:]
         context["export_path"] = self.export_path
 
         if self.bulk_update_fields and self.bulk_update_accessibility():
-            get_bulk_path = (
-                f"get-bulk-update-{self.view_id}-{self.request.session.session_key}/"
-            )
-            post_bulk_path = (
-                f"post-bulk-update-{self.view_id}-{self.request.session.session_key}/"
-            )
-            self.post_bulk_path = post_bulk_path
-            urlpatterns.append(
-                path(
-                    get_bulk_path,
-                    self.serve_bulk_form,
-                )
-            )
-            urlpatterns.append(
-                path(
-                    post_bulk_path,
-                    self.handle_bulk_submission,
-                )
-            )
+            bulk_path = reverse("list-view-bulk-update", kwargs={"token": token})[1:]
+            self.post_bulk_path = bulk_path
             context["bulk_update_fields"] = self.bulk_update_fields
-            context["bulk_path"] = get_bulk_path
+            context["bulk_path"] = bulk_path
 
         return context
 
@@ -386,70 +397,63 @@ class HorillaListView(ListView):
         """
         Export list view visible columns
         """
-        from import_export import fields, resources
-
         request = getattr(_thread_locals, "request", None)
         ids = eval(request.GET["ids"])
         _columns = eval(request.GET["columns"])
         queryset = self.model.objects.filter(id__in=ids)
+        attrs = [field_tuple[1] for field_tuple in _columns]
 
-        _model = self.model
-
-        class HorillaListViewResorce(resources.ModelResource):
-            """
-            Instant Resource class
-            """
-
-            id = fields.Field(column_name="ID")
-
-            class Meta:
-                """
-                Meta class for additional option
-                """
-
-                model = _model
-                fields = []
-
-            def dehydrate_id(self, instance):
-                """
-                Dehydrate method for id field
-                """
-                return instance.pk
-
-            for field_tuple in _columns:
-                dynamic_fn_str = f"def dehydrate_{field_tuple[1]}(self, instance):return self.remove_extra_spaces(getattribute(instance, '{field_tuple[1]}'))"
-                exec(dynamic_fn_str)
-                dynamic_fn = locals()[f"dehydrate_{field_tuple[1]}"]
-                locals()[field_tuple[1]] = fields.Field(column_name=field_tuple[0])
+        rows = (
+            [instance.pk] + [plain_text(getattribute(instance, attr)) for attr in attrs]
+            for instance in iterate_export(queryset, attrs)
+        )
 
-            def remove_extra_spaces(self, text):
-                """
-                Remove blank space but keep line breaks and add new lines for <li> tags.
-                """
-                soup = BeautifulSoup(str(text), "html.parser")
-                for li in soup.find_all("li"):
-                    li.insert_before("\n")
-                    li.unwrap()
-                text = soup.get_text()
-                lines = text.splitlines()
-                non_blank_lines = [line.strip() for line in lines if line.strip()]
-                cleaned_text = "\n".join(non_blank_lines)
-                return cleaned_text
+        file_name = self.export_file_name
+        if not file_name:
+            file_name = "quick_export"
+        return export_response(
+            file_name,
+            ["ID"] + [field_tuple[0] for field_tuple in _columns],
+            rows,
+            request.GET.get("export_format", "xlsx"),
+        )
 
-        book_resource = HorillaListViewResorce()
 
-        # Export the data using the resource
-        dataset = book_resource.export(queryset)
+def get_list_view(request: HttpRequest, token: str) -> HorillaListView:
+    """
+    Instance of the list view the token was issued by, for the same user
+    """
+    try:
+        data = signing.loads(token, salt=LIST_VIEW_TOKEN_SALT)
+    except signing.BadSignature as error:
+        raise Http404 from error
+    view_class = LIST_VIEWS.get(data["view"])
+    if view_class is None or data["user"] != request.user.pk:
+        raise Http404
+    view = view_class()
+    view.setup(request, **data["kwargs"])
+    return view
+
+
+@login_required
+def list_view_export(request: HttpRequest, token: str) -> HttpResponse:
+    """
+    Export route of the list views
+    """
+    return get_list_view(request, token).export_data()
 
-        excel_data = dataset.export("xls")
 
-        # Set the response headers
-        file_name = self.export_file_name
-        if not file_name:
-            file_name = "quick_export"
-        response = HttpResponse(excel_data, content_type="application/vnd.ms-excel")
-        response["Content-Disposition"] = f'attachment; filename="{file_name}.xls"'
-        return response
+@login_required
+def list_view_bulk_update(request: HttpRequest, token: str) -> HttpResponse:
+    """
+    Bulk update route of the list views, serves the form on GET and handles
+    its submission on POST
+    """
+    view = get_list_view(request, token)
+    view.post_bulk_path = request.path[1:]
+    if request.method == "POST":
+        return view.handle_bulk_submission(request)
+    return view.serve_bulk_form(request)
 
 
 class HorillaSectionView(TemplateView):
@@ -885,18 +889,8 @@ class HorillaFormView(FormView):
                         "model": form._meta.model,
                     },
                 )
-
-                from django.urls import path
-
-                from horilla.urls import urlpatterns
-
-                urlpatterns.append(
-                    path(
-                        f"dynamic-path-{field}-{self.request.session.session_key}",
-                        view.as_view(),
-                        name=f"dynamic-path-{field}-{self.request.session.session_key}",
-                    )
-                )
+                # served by the dynamic-create route
+                CACHE.set(key + "view", view)
                 queryset = form.fields[field].queryset
                 choices = [(instance.id, instance) for instance in queryset]
                 choices.insert(0, ("", "Select option"))
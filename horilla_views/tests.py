@@ -1,3 +1,57 @@
+"""
+Test cases of the horilla_views app
+"""
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import URLResolver, get_resolver, reverse
+
+from employee.models import Employee
+
+
+def count_patterns(resolver):
+    """
+    Number of url patterns under the resolver, the includes counted in
+    """
+    return sum(
+        count_patterns(pattern) if isinstance(pattern, URLResolver) else 1
+        for pattern in resolver.url_patterns
+    )
+
+
+class ListViewRouteTests(TestCase):
+    """
+    Rendering a list view does not register url patterns
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        Employee(
+            employee_first_name="Admin",
+            email="admin@example.com",
+            phone="1234567890",
+            employee_user_id=cls.user,
+        ).save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def render_list(self):
+        response = self.client.get(
+            reverse("mail-automations-list-view"), HTTP_HX_REQUEST="true"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
 
-# Create your tests here.
+    def test_resolver_size_is_constant_across_renders(self):
+        # the first render loads the lazily included app urls
+        response = self.render_list()
+        self.assertIn("list-view-export/", response.content.decode())
+        patterns = count_patterns(get_resolver())
+        # every render used to add a pattern, a hundred renders show any growth
+        for _ in range(100):
+            self.render_list()
+        self.assertEqual(count_patterns(get_resolver()), patterns)
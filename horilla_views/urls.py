@@ -5,7 +5,11 @@ horilla_views/urls.py
 from django.urls import path
 
 from horilla_views import views
-from horilla_views.generic.cbv.views import ReloadMessages
+from horilla_views.generic.cbv.views import (
+    ReloadMessages,
+    list_view_bulk_update,
+    list_view_export,
+)
 
 urlpatterns = [
     path("toggle-columns", views.ToggleColumn.as_view(), name="toggle-columns"),
@@ -34,4 +38,19 @@ urlpatterns = [
         views.SearchInIds.as_view(),
         name="search-in-instance-ids",
     ),
+    path(
+        "list-view-export/<str:token>/",
+        list_view_export,
+        name="list-view-export",
+    ),
+    path(
+        "list-view-bulk-update/<str:token>/",
+        list_view_bulk_update,
+        name="list-view-bulk-update",
+    ),
+    path(
+        "dynamic-path-<str:field>-<str:session_key>",
+        views.DynamicCreate.as_view(),
+        name="dynamic-create",
+    ),
 ]
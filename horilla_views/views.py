@@ -3,7 +3,7 @@ import importlib
 from django import forms
 from django.contrib import messages
 from django.core.cache import cache as CACHE
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.views import View
@@ -96,6 +96,24 @@ class ReloadField(View):
         )
 
 
+@method_decorator(login_required, name="dispatch")
+class DynamicCreate(View):
+    """
+    Serves the dynamic create view of a form field, as set by the
+    HorillaFormView of the session
+    """
+
+    def get(self, request, *args, **kwargs):
+        session_key = self.kwargs["session_key"]
+        view = CACHE.get(f"{session_key}cbv{self.kwargs['field']}view")
+        if view is None or session_key != request.session.session_key:
+            raise Http404
+        return view.as_view()(request)
+
+    def post(self, request, *args, **kwargs):
+        return self.get(request, *args, **kwargs)
+
+
 @method_decorator(login_required, name="dispatch")
 class ActiveTab(View):
     def get(self, *args, **kwargs):
@@ -1,7 +1,6 @@
 import calendar
 import math
 import operator
-import threading
 from datetime import date, datetime, timedelta
 
 from dateutil.relativedelta import relativedelta
@@ -11,8 +10,9 @@ from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.db import models
-from django.db.models import Q
-from django.db.models.signals import post_save, pre_save
+from django.db.models import F, Func, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -30,12 +30,12 @@ from base.models import (
 )
 from employee.models import Employee, EmployeeWorkInformation
 from horilla import horilla_middlewares
+from horilla.horilla_tasks import run_in_background
 from horilla.methods import get_horilla_model_class
 from horilla.models import HorillaModel
 from horilla_audit.methods import get_diff
 from horilla_audit.models import HorillaAuditInfo, HorillaAuditLog
 from leave.methods import calculate_requested_days
-from leave.threading import LeaveClashThread
 
 operator_mapping = {
     "equal": operator.eq,
@@ -677,10 +677,15 @@ class LeaveRequest(HorillaModel):
         else:
             self.exclude_leaves()
 
-        self.leave_clashes_count = self.count_leave_clashes()
-
-        self.update_leave_clashes_count()
+        previous = None
+        if self.pk is not None:
+            previous = (
+                LeaveRequest._base_manager.filter(pk=self.pk)
+                .values("employee_id", "start_date", "end_date")
+                .first()
+            )
         super().save(*args, **kwargs)
+        self.update_leave_clashes_count(previous)
         work_info = EmployeeWorkInformation.objects.filter(employee_id=self.employee_id)
         department_id = None
         conditions = None
@@ -850,12 +855,8 @@ class LeaveRequest(HorillaModel):
             """
             Override the delete method to update the leave clashes count of related leave requests.
             """
-            leave_request = self
-
             super().delete(*args, **kwargs)
-
-            clash_thread = LeaveClashThread(leave_request)
-            clash_thread.start()
+            self.update_leave_clashes_count()
 
         else:
             if request:
@@ -865,18 +866,45 @@ class LeaveRequest(HorillaModel):
                     _("The {} leave request cannot be deleted !").format(self.status),
                 )
 
-    def update_leave_clashes_count(self):
-        """
-        Update the leave clashes count for all leave requests.
+    def update_leave_clashes_count(self, previous=None):
         """
-        leave_requests_to_update = LeaveRequest.objects.all().exclude(id=self.id)
-
-        for leave_request in leave_requests_to_update:
-            leave_request.leave_clashes_count = leave_request.count_leave_clashes()
+        Update the leave clashes count of the leave requests clashing with
+        the old or the new interval of this one, including itself.
 
-        # Bulk update leave clashes count for all leave requests
-        LeaveRequest.objects.bulk_update(
-            leave_requests_to_update, ["leave_clashes_count"]
+        Args:
+            previous (dict): employee_id, start_date and end_date before the save
+        """
+        intervals = Q(start_date__lte=self.end_date, end_date__gte=self.start_date)
+        employee_ids = {self.employee_id_id}
+        if previous is not None:
+            intervals |= Q(
+                start_date__lte=previous["end_date"],
+                end_date__gte=previous["start_date"],
+            )
+            employee_ids.add(previous["employee_id"])
+        groups = EmployeeWorkInformation._base_manager.filter(
+            employee_id__in=employee_ids
+        ).values_list("department_id", "job_position_id")
+        departments = {department for department, _job in groups} - {None}
+        job_positions = {job_position for _department, job_position in groups} - {None}
+        clash_counts = dict(
+            annotate_leave_clashes(
+                LeaveRequest._base_manager.filter(intervals).filter(
+                    Q(employee_id__employee_work_info__department_id__in=departments)
+                    | Q(
+                        employee_id__employee_work_info__job_position_id__in=job_positions
+                    )
+                )
+            ).values_list("id", "clashes_count")
+        )
+        if self.pk is not None:
+            self.leave_clashes_count = clash_counts.setdefault(self.pk, 0)
+        LeaveRequest._base_manager.bulk_update(
+            [
+                LeaveRequest(id=leave_request_id, leave_clashes_count=clashes_count)
+                for leave_request_id, clashes_count in clash_counts.items()
+            ],
+            ["leave_clashes_count"],
         )
 
     def count_leave_clashes(self):
@@ -884,20 +912,41 @@ class LeaveRequest(HorillaModel):
         Method to count leave clashes where this employee's leave request overlaps
         with other employees' requested dates.
         """
-        work_info = EmployeeWorkInformation.objects.filter(employee_id=self.employee_id)
-        if work_info.exists():
-            overlapping_requests = LeaveRequest.objects.exclude(id=self.id).filter(
-                Q(
-                    employee_id__employee_work_info__department_id=self.employee_id.employee_work_info.department_id
+        return (
+            annotate_leave_clashes(LeaveRequest._base_manager.filter(pk=self.pk))
+            .values_list("clashes_count", flat=True)
+            .first()
+            or 0
+        )
+
+
+def annotate_leave_clashes(queryset):
+    """
+    Annotate every leave request of the queryset with the number of leave
+    requests overlapping it in the same department or job position, counted
+    in the same query
+    """
+    clashes = (
+        LeaveRequest._base_manager.filter(
+            Q(
+                employee_id__employee_work_info__department_id=OuterRef(
+                    "employee_id__employee_work_info__department_id"
                 )
-                | Q(
-                    employee_id__employee_work_info__job_position_id=self.employee_id.employee_work_info.job_position_id
-                ),
-                start_date__lte=self.end_date,
-                end_date__gte=self.start_date,
             )
-            return overlapping_requests.count()
-        return 0
+            | Q(
+                employee_id__employee_work_info__job_position_id=OuterRef(
+                    "employee_id__employee_work_info__job_position_id"
+                )
+            ),
+            start_date__lte=OuterRef("end_date"),
+            end_date__gte=OuterRef("start_date"),
+        )
+        .exclude(id=OuterRef("id"))
+        .order_by()
+        .annotate(count=Func(F("id"), function="COUNT"))
+        .values("count")
+    )
+    return queryset.annotate(clashes_count=Coalesce(Subquery(clashes[:1]), 0))
 
 
 class LeaverequestFile(models.Model):
@@ -1141,6 +1190,14 @@ if apps.is_installed("attendance"):
             WorkRecords = get_horilla_model_class(
                 app_label="attendance", model="workrecords"
             )
+            # approved leave days do not count in the overtime accounts
+            instance.overtime_previous = (
+                LeaveRequest._base_manager.filter(pk=instance.pk)
+                .values("employee_id", "start_date", "end_date", "status")
+                .first()
+                if instance.pk
+                else None
+            )
             if (
                 instance.start_date == instance.end_date
                 and instance.end_date_breakdown != instance.start_date_breakdown
@@ -1150,55 +1207,72 @@ if apps.is_installed("attendance"):
 
             period_dates = get_date_range(instance.start_date, instance.end_date)
             if instance.status == "approved":
-                for date in period_dates:
-                    try:
-                        work_entry = (
-                            WorkRecords.objects.filter(
-                                date=date,
-                                employee_id=instance.employee_id,
-                            )
-                            if WorkRecords.objects.filter(
-                                date=date,
-                                employee_id=instance.employee_id,
-                            ).exists()
-                            else WorkRecords()
-                        )
-                        work_entry.employee_id = instance.employee_id
-                        work_entry.is_leave_record = True
-                        work_entry.day_percentage = (
-                            0.50
-                            if instance.start_date == date
-                            and instance.start_date_breakdown == "first_half"
-                            or instance.end_date == date
-                            and instance.end_date_breakdown == "second_half"
-                            else 0.00
-                        )
-                        status = (
-                            "CONF"
-                            if instance.start_date == date
-                            and instance.start_date_breakdown == "first_half"
-                            or instance.end_date == date
-                            and instance.end_date_breakdown == "second_half"
-                            else "ABS"
-                        )
-                        work_entry.work_record_type = status
-                        work_entry.date = date
-                        work_entry.message = (
-                            "Absent"
-                            if status == "ABS"
-                            else _("Half day Attendance need to validate")
-                        )
-                        work_entry.save()
-                    except:
-                        pass
 
-            else:
-                for date in period_dates:
-                    WorkRecords.objects.filter(
-                        is_leave_record=True,
-                        date=date,
-                        employee_id=instance.employee_id,
-                    ).delete()
+                def leave_work_record_values(leave_date, _work_record):
+                    half_day = (
+                        instance.start_date == leave_date
+                        and instance.start_date_breakdown == "first_half"
+                        or instance.end_date == leave_date
+                        and instance.end_date_breakdown == "second_half"
+                    )
+                    return {
+                        "is_leave_record": True,
+                        "day_percentage": 0.50 if half_day else 0.00,
+                        "work_record_type": "CONF" if half_day else "ABS",
+                        "message": (
+                            _("Validate half day attendance") if half_day else "Absent"
+                        ),
+                    }
+
+                WorkRecords.write_records(
+                    instance.employee_id_id, period_dates, leave_work_record_values
+                )
+
+            elif period_dates:
+                WorkRecords.objects.filter(
+                    is_leave_record=True,
+                    date__range=(period_dates[0], period_dates[-1]),
+                    employee_id=instance.employee_id,
+                ).delete()
+
+        @receiver(post_save, sender=LeaveRequest)
+        def leaverequest_overtime_accounts(sender, instance, **_kwargs):
+            """
+            Compute again the overtime accounts of the months an approved
+            leave enters or leaves
+            """
+            Attendance = get_horilla_model_class(
+                app_label="attendance", model="attendance"
+            )
+            previous = getattr(instance, "overtime_previous", None)
+            before = (
+                (previous["employee_id"], previous["start_date"], previous["end_date"])
+                if previous and previous["status"] == "approved"
+                else None
+            )
+            after = (
+                (instance.employee_id_id, instance.start_date, instance.end_date)
+                if instance.status == "approved"
+                else None
+            )
+            if before == after:
+                return
+            for period in {before, after} - {None}:
+                Attendance.refresh_overtime_accounts(*period)
+
+        @receiver(post_delete, sender=LeaveRequest)
+        def leaverequest_delete_overtime_accounts(sender, instance, **_kwargs):
+            """
+            Compute again the overtime accounts of the months of a deleted
+            approved leave
+            """
+            if instance.status == "approved":
+                Attendance = get_horilla_model_class(
+                    app_label="attendance", model="attendance"
+                )
+                Attendance.refresh_overtime_accounts(
+                    instance.employee_id_id, instance.start_date, instance.end_date
+                )
 
 
 @receiver(post_save, sender=LeaveRequest)
@@ -1216,5 +1290,4 @@ def update_available(sender, instance, **kwargs):
         for assigned in available_leaves:
             assigned.save()
 
-    thread = threading.Thread(target=update_leaves)
-    thread.start()
+    run_in_background(update_leaves)
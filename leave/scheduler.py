@@ -2,16 +2,16 @@ import calendar
 import datetime as dt
 from datetime import datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from dateutil.relativedelta import relativedelta
 
-today = datetime.now()
+from horilla.horilla_scheduler import scheduled_job
 
 
+@scheduled_job("interval", hours=4)
 def leave_reset():
     from leave.models import LeaveType
 
-    today_date = today.date()
+    today_date = datetime.now().date()
     leave_types = LeaveType.objects.filter(reset=True)
     # Looping through filtered leave types with reset is true
     for leave_type in leave_types:
@@ -35,9 +35,3 @@ def leave_reset():
                 )
                 available_leave.expired_date = new_expired_date
                 available_leave.save()
-
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(leave_reset, "interval", hours=4)
-
-scheduler.start()
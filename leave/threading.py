@@ -1,18 +1,15 @@
-from threading import Thread
-
-from django.contrib import messages
 from django.core.mail import EmailMessage
-from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.translation import gettext as _
 
 from base.backends import ConfiguredEmailBackend
+from base.mail_outbox import enqueue_mail
+from horilla.horilla_tasks import BackgroundTask
 
 
-class LeaveMailSendThread(Thread):
+class LeaveMailSendThread(BackgroundTask):
 
     def __init__(self, request, leave_request, type):
-        Thread.__init__(self)
         self.request = request
         self.leave_request = leave_request
         self.type = type
@@ -46,15 +43,9 @@ class LeaveMailSendThread(Thread):
                     [recipient.email],
                 )
                 email.content_subtype = "html"
-                try:
-                    email.send()
-                except:
-                    messages.error(
-                        self.request, f"Mail not sent to {recipient.get_full_name()}"
-                    )
+                enqueue_mail(email, request=self.request)
 
     def run(self) -> None:
-        super().run()
         if self.type == "request":
             owner = self.leave_request.employee_id
             reporting_manager = self.leave_request.employee_id.get_reporting_manager()
@@ -116,45 +107,3 @@ class LeaveMailSendThread(Thread):
             )
 
         return
-
-
-class LeaveClashThread(Thread):
-
-    def __init__(self, leave_request):
-        Thread.__init__(self)
-        self.leave_request = leave_request
-
-    def count_leave_clashes(self):
-        from leave.models import LeaveRequest
-
-        """
-        Method to count leave clashes where this employee's leave request overlaps
-        with other employees' requested dates.
-        """
-        overlapping_requests = LeaveRequest.objects.exclude(
-            id=self.leave_request.id
-        ).filter(
-            Q(
-                employee_id__employee_work_info__department_id=self.leave_request.employee_id.employee_work_info.department_id
-            )
-            | Q(
-                employee_id__employee_work_info__job_position_id=self.leave_request.employee_id.employee_work_info.job_position_id
-            ),
-            start_date__lte=self.leave_request.end_date,
-            end_date__gte=self.leave_request.start_date,
-        )
-
-        return overlapping_requests.count()
-
-    def run(self) -> None:
-        from leave.models import LeaveRequest
-
-        super().run()
-        dates = self.leave_request.requested_dates()
-        leave_requests_to_update = LeaveRequest.objects.filter(
-            Q(start_date__in=dates) | Q(end_date__in=dates)
-        )
-
-        for leave_request in leave_requests_to_update:
-            leave_request.leave_clashes_count = self.count_leave_clashes()
-            leave_request.save()
@@ -273,6 +273,10 @@ class AbstractNotification(models.Model):
 def notify_handler(verb, **kwargs):
     """
     Handler function to create Notification instance upon action signal call.
+
+    The notifications of a Group or QuerySet recipient are written with
+    bulk_create, BULK_BATCH_SIZE rows per INSERT and without the save
+    signals, pass bulk=True or bulk=False to choose for the other recipients.
     """
     # Pull the options out of kwargs
     kwargs.pop("signal", None)
@@ -284,6 +288,7 @@ def notify_handler(verb, **kwargs):
     public = bool(kwargs.pop("public", True))
     description = kwargs.pop("description", None)
     timestamp = kwargs.pop("timestamp", timezone.now())
+    bulk = kwargs.pop("bulk", isinstance(recipient, (Group, QuerySet)))
     Notification = load_model("notifications", "Notification")
     level = kwargs.pop("level", Notification.LEVELS.info)
 
@@ -295,36 +300,43 @@ def notify_handler(verb, **kwargs):
     else:
         recipients = [recipient]
 
-    new_notifications = []
-
-    for recipient in recipients:
-        newnotify = Notification(
-            recipient=recipient,
-            actor_content_type=ContentType.objects.get_for_model(actor),
-            actor_object_id=actor.pk,
-            verb=str(verb),
-            public=public,
-            description=description,
-            timestamp=timestamp,
-            level=level,
-        )
-
-        # Set optional objects
-        for obj, opt in optional_objs:
-            if obj is not None:
-                setattr(newnotify, "%s_object_id" % opt, obj.pk)
-                setattr(
-                    newnotify,
-                    "%s_content_type" % opt,
-                    ContentType.objects.get_for_model(obj),
-                )
-
+    # The fields are the same for all the recipients
+    fields = {
+        "actor_content_type": ContentType.objects.get_for_model(actor),
+        "actor_object_id": actor.pk,
+        "verb": str(verb),
+        "public": public,
+        "description": description,
+        "timestamp": timestamp,
+        "level": level,
+    }
+    for obj, opt in optional_objs:
+        if obj is not None:
+            fields["%s_object_id" % opt] = obj.pk
+            fields["%s_content_type" % opt] = ContentType.objects.get_for_model(obj)
+
+    def build_notification(recipient):
+        newnotify = Notification(recipient=recipient, **fields)
         if kwargs and EXTRA_DATA:
             newnotify.data = kwargs
             newnotify.verb_ar = newnotify.data.get("verb_ar", None)
             newnotify.verb_de = newnotify.data.get("verb_de", None)
             newnotify.verb_es = newnotify.data.get("verb_es", None)
             newnotify.verb_fr = newnotify.data.get("verb_fr", None)
+        return newnotify
+
+    if bulk:
+        if isinstance(recipients, QuerySet):
+            recipients = recipients.only("pk")
+        return Notification.objects.bulk_create(
+            [build_notification(recipient) for recipient in recipients],
+            batch_size=notifications_settings.get_config()["BULK_BATCH_SIZE"],
+        )
+
+    new_notifications = []
+
+    for recipient in recipients:
+        newnotify = build_notification(recipient)
         newnotify.save()
         new_notifications.append(newnotify)
 
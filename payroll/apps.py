@@ -23,13 +23,4 @@ class PayrollConfig(AppConfig):
         urlpatterns.append(
             path("payroll/", include("payroll.urls.urls")),
         )
-        try:
-            from payroll.scheduler import auto_payslip_generate
-
-            auto_payslip_generate()
-        except:
-            """
-            Migrations are not affected
-            """
-
         return ready
@@ -0,0 +1,432 @@
+"""
+bulk_payroll.py
+
+This module is used to generate the payslips of many employees at once.
+
+The inputs of the payroll calculation (contracts, approved leaves, attendances,
+allowances, deductions and tax brackets) are loaded for the whole employee set
+in a constant number of queries and kept in a PayrollPrefetch. The regular
+per-employee calculators read from it when it is passed as ``prefetch``, so the
+computed payslips are the same as the ones computed one by one.
+"""
+
+import json
+from collections import defaultdict
+
+from django.apps import apps
+from django.db.models import Q
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from horilla.horilla_middlewares import _thread_locals
+from horilla.methods import get_horilla_model_class
+from payroll.methods.methods import calculate_employer_contribution
+from payroll.methods.payslip_calc import (
+    ComponentCondition,
+    get_component_conditions,
+    get_condition_values,
+)
+from payroll.models.models import Allowance, Contract, Deduction, Payslip
+from payroll.models.tax_models import TaxBracket
+
+PAYSLIP_FIELDS = [
+    "group_name",
+    "status",
+    "basic_pay",
+    "contract_wage",
+    "gross_pay",
+    "deduction",
+    "net_pay",
+    "pay_head_data",
+    "modified_by",
+]
+
+
+def _one_time_filter(start_date, end_date):
+    return Q(one_time_date__isnull=True) | Q(
+        one_time_date__range=(start_date, end_date)
+    )
+
+
+class PayrollPrefetch:
+    """
+    In-memory payroll inputs of a set of employees for a period
+    """
+
+    def __init__(self, employees, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.employee_ids = [employee.pk for employee in employees]
+
+        self.contracts = defaultdict(list)
+        for contract in (
+            Contract.objects.filter(
+                employee_id__in=self.employee_ids, contract_status="active"
+            )
+            .select_related("filing_status")
+            .order_by("id")
+        ):
+            self.contracts[contract.employee_id_id].append(contract)
+
+        self.leaves = defaultdict(list)
+        if apps.is_installed("leave"):
+            LeaveRequest = get_horilla_model_class(
+                app_label="leave", model="leaverequest"
+            )
+            for leave in (
+                LeaveRequest.objects.filter(
+                    employee_id__in=self.employee_ids,
+                    status="approved",
+                    start_date__lte=end_date,
+                )
+                .filter(
+                    Q(end_date__gte=start_date)
+                    | Q(end_date__isnull=True, start_date__gte=start_date)
+                )
+                .select_related("leave_type_id")
+            ):
+                self.leaves[leave.employee_id_id].append(leave)
+
+        self._attendances = defaultdict(list)
+        if apps.is_installed("attendance"):
+            Attendance = get_horilla_model_class(
+                app_label="attendance", model="attendance"
+            )
+            self.attendance_model = Attendance
+            for attendance in (
+                Attendance.objects.filter(
+                    employee_id__in=self.employee_ids,
+                    attendance_date__range=(start_date, end_date),
+                )
+                .filter(
+                    Q(attendance_validated=True) | Q(attendance_overtime_approve=True)
+                )
+                .only(
+                    "employee_id",
+                    "attendance_date",
+                    "shift_id",
+                    "work_type_id",
+                    "at_work_second",
+                    "overtime_second",
+                    "attendance_validated",
+                    "attendance_overtime_approve",
+                )
+                .order_by("attendance_date", "id")
+            ):
+                self._attendances[attendance.employee_id_id].append(attendance)
+
+        self.allowance_list = list(
+            Allowance.objects.filter(_one_time_filter(start_date, end_date))
+            .prefetch_related("other_conditions")
+            .order_by("id")
+        )
+        self.deduction_list = list(
+            Deduction.objects.filter(_one_time_filter(start_date, end_date))
+            .prefetch_related("other_conditions")
+            .order_by("id")
+        )
+        self.deduction_map = {
+            deduction.pk: deduction for deduction in self.deduction_list
+        }
+        self.specific_employees = {
+            **self._employee_sets(Allowance, "specific_employees"),
+            **self._employee_sets(Deduction, "specific_employees"),
+        }
+        self.exclude_employees = {
+            **self._employee_sets(Allowance, "exclude_employees"),
+            **self._employee_sets(Deduction, "exclude_employees"),
+        }
+
+        self.brackets = defaultdict(list)
+        filing_ids = {
+            contract.filing_status_id
+            for contracts in self.contracts.values()
+            for contract in contracts
+            if contract.filing_status_id
+        }
+        for bracket in (
+            TaxBracket.objects.filter(filing_status_id__in=filing_ids)
+            .order_by("min_income")
+            .values("filing_status_id", "tax_rate", "min_income", "max_income")
+        ):
+            filing_id = bracket.pop("filing_status_id")
+            self.brackets[filing_id].append(bracket)
+
+        self.employees = employees
+        self._conditions = {}
+        self._condition_values = None
+
+    def _employee_sets(self, model, field_name):
+        """
+        Map (model, component id) to the ids of the employees of the run in the
+        many to many field
+        """
+        field = model._meta.get_field(field_name)
+        component_field = f"{field.m2m_field_name()}_id"
+        employee_field = f"{field.m2m_reverse_field_name()}_id"
+        employee_sets = defaultdict(set)
+        for component_id, employee_id in field.remote_field.through.objects.filter(
+            **{f"{employee_field}__in": self.employee_ids}
+        ).values_list(component_field, employee_field):
+            employee_sets[(model, component_id)].add(employee_id)
+        return employee_sets
+
+    def _targets(self, component, employee, condition_based=True):
+        key = (component.__class__, component.pk)
+        if employee.pk in self.specific_employees.get(key, ()):
+            return True
+        if employee.pk in self.exclude_employees.get(key, ()):
+            return False
+        return component.include_active_employees or (
+            condition_based and component.is_condition_based
+        )
+
+    @staticmethod
+    def _in_period(component, start_date, end_date):
+        return component.one_time_date is None or (
+            start_date <= component.one_time_date <= end_date
+        )
+
+    def contract(self, employee, is_active=None):
+        """
+        Active contract of the employee
+        """
+        for contract in self.contracts.get(employee.pk, []):
+            if is_active is None or contract.is_active == is_active:
+                return contract
+        return None
+
+    def approved_leaves(self, employee):
+        """
+        Approved leave requests of the employee overlapping the period
+        """
+        return self.leaves.get(employee.pk, [])
+
+    def attendances(self, employee, start_date, end_date, **lookups):
+        """
+        Validated or overtime approved attendances of the employee between
+        start_date and end_date matching the exact match lookups
+        """
+        attnames = {
+            self.attendance_model._meta.get_field(lookup.split("__")[0]).attname: value
+            for lookup, value in lookups.items()
+        }
+        return [
+            attendance
+            for attendance in self._attendances.get(employee.pk, [])
+            if start_date <= attendance.attendance_date <= end_date
+            and all(
+                getattr(attendance, attname) == value
+                for attname, value in attnames.items()
+            )
+        ]
+
+    def allowances(self, employee, start_date, end_date):
+        """
+        Allowances targeting the employee in the period
+        """
+        return [
+            allowance
+            for allowance in self.allowance_list
+            if self._in_period(allowance, start_date, end_date)
+            and self._targets(allowance, employee)
+        ]
+
+    def deductions(
+        self, employee, start_date, end_date, is_pretax, is_tax, condition_based=True
+    ):
+        """
+        Deductions targeting the employee in the period
+        """
+        return [
+            deduction
+            for deduction in self.deduction_list
+            if deduction.is_pretax == is_pretax
+            and deduction.is_tax == is_tax
+            and deduction.update_compensation is None
+            and self._in_period(deduction, start_date, end_date)
+            and self._targets(deduction, employee, condition_based)
+        ]
+
+    def compensation_deductions(
+        self, employee, compensation_type, start_date, end_date
+    ):
+        """
+        Deductions updating the basic/gross/net pay of the employee
+        """
+        return [
+            deduction
+            for deduction in self.deduction_list
+            if deduction.update_compensation == compensation_type
+            and self._in_period(deduction, start_date, end_date)
+            and employee.pk
+            in self.specific_employees.get((Deduction, deduction.pk), ())
+        ]
+
+    def deduction(self, deduction_id):
+        """
+        Deduction instance by id
+        """
+        deduction = self.deduction_map.get(deduction_id)
+        if deduction is None:
+            deduction = Deduction.objects.filter(id=deduction_id).first()
+        return deduction
+
+    def other_conditions(self, component):
+        """
+        (field, condition, value) tuples of the component's other conditions
+        """
+        return [
+            (condition.field, condition.condition, condition.value)
+            for condition in component.other_conditions.all()
+        ]
+
+    def component_condition(self, component, main_condition_only=False):
+        """
+        Compiled conditions of the condition based allowance or deduction
+        """
+        key = (component.__class__, component.pk, main_condition_only)
+        if key not in self._conditions:
+            self._conditions[key] = ComponentCondition(
+                get_component_conditions(component, self, main_condition_only)
+            )
+        return self._conditions[key]
+
+    def condition_values(self, employee):
+        """
+        Values of the fields used by the condition based allowances and
+        deductions, resolved for every employee of the run on first use
+        """
+        if self._condition_values is None:
+            fields = set()
+            for component in self.allowance_list + self.deduction_list:
+                if component.is_condition_based:
+                    fields |= self.component_condition(component).fields
+            self._condition_values = get_condition_values(self.employees, fields)
+        return self._condition_values.get(employee.pk, {})
+
+    def tax_brackets(self, filing_status):
+        """
+        Tax brackets of the filing status ordered by the minimum income
+        """
+        return self.brackets.get(filing_status.pk, [])
+
+
+def save_payslips(
+    payslip_datas, start_date, end_date, group_name=None, status="draft", user=None
+):
+    """
+    This method is used to save the generated payslips with bulk queries
+
+    Args:
+        payslip_datas (list): payslip data dicts returned by payroll_calculation
+        start_date (date): start date of the payroll period
+        end_date (date): end date of the payroll period
+        group_name (str): batch name of the payslips
+        status (str): status of the payslips
+        user (User): creator of the payslips, defaults to the request user
+    """
+    if user is None:
+        request = getattr(_thread_locals, "request", None)
+        user = getattr(request, "user", None)
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    existing = {
+        (payslip.employee_id_id, payslip.start_date, payslip.end_date): payslip
+        for payslip in Payslip.objects.filter(
+            employee_id__in=[data["employee"].pk for data in payslip_datas],
+            start_date__range=(start_date, end_date),
+            end_date=end_date,
+        )
+    }
+    to_create = []
+    to_update = []
+    instances = []
+    for data in payslip_datas:
+        key = (data["employee"].pk, data["start_date"], data["end_date"])
+        instance = existing.get(key)
+        if instance is None:
+            instance = Payslip(
+                employee_id=data["employee"],
+                start_date=data["start_date"],
+                end_date=data["end_date"],
+                created_by=user,
+            )
+            to_create.append(instance)
+        else:
+            to_update.append(instance)
+        instance.group_name = group_name
+        instance.status = status
+        instance.basic_pay = round(data["basic_pay"], 2)
+        instance.contract_wage = round(data["contract_wage"], 2)
+        instance.gross_pay = round(data["gross_pay"], 2)
+        instance.deduction = round(data["total_deductions"], 2)
+        instance.net_pay = round(data["net_pay"], 2)
+        instance.pay_head_data = data["pay_data"]
+        instance.modified_by = user
+        instances.append(instance)
+
+    if to_create:
+        bulk_create_with_history(to_create, Payslip, default_user=user)
+    if to_update:
+        bulk_update_with_history(to_update, Payslip, PAYSLIP_FIELDS, default_user=user)
+
+    # Installments
+    through = Payslip.installment_ids.through
+    through.objects.filter(
+        payslip_id__in=[payslip.pk for payslip in to_update]
+    ).delete()
+    through.objects.bulk_create(
+        [
+            through(payslip_id=instance.pk, deduction_id=installment.pk)
+            for instance, data in zip(instances, payslip_datas)
+            for installment in {
+                installment.pk: installment for installment in data["installments"]
+            }.values()
+        ]
+    )
+    return instances
+
+
+def generate_bulk_payslips(
+    employees, start_date, end_date, group_name=None, status="draft", user=None
+):
+    """
+    This method is used to generate and save the payslips of the employees for
+    the period in a constant number of queries
+
+    Args:
+        employees (QuerySet): Employee queryset
+        start_date (date): start date of the payroll period
+        end_date (date): end date of the payroll period
+        group_name (str): batch name of the payslips
+        status (str): status of the payslips
+        user (User): creator of the payslips, defaults to the request user
+
+    Returns:
+        list: payslip data dicts with the saved Payslip as "instance"
+    """
+    from payroll.views.component_views import payroll_calculation
+
+    employees = list(employees.select_related("employee_work_info", "employee_user_id"))
+    prefetch = PayrollPrefetch(employees, start_date, end_date)
+    payslips = []
+    for employee in employees:
+        contract = prefetch.contract(employee)
+        if contract is None or end_date < contract.contract_start_date:
+            continue
+        employee_start_date = max(start_date, contract.contract_start_date)
+        payslip_data = payroll_calculation(
+            employee, employee_start_date, end_date, prefetch=prefetch
+        )
+        pay_data = {
+            "pay_data": json.loads(payslip_data["json_data"]),
+        }
+        calculate_employer_contribution(pay_data, prefetch)
+        payslip_data["pay_data"] = pay_data["pay_data"]
+        payslips.append(payslip_data)
+
+    instances = save_payslips(payslips, start_date, end_date, group_name, status, user)
+    for payslip_data, instance in zip(payslips, instances):
+        payslip_data["instance"] = instance
+    return payslips
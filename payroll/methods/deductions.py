@@ -8,22 +8,33 @@ from payroll.models.models import Deduction
 
 
 def update_compensation_deduction(
-    employee, compensation_amount, compensation_type, start_date, end_date
+    employee,
+    compensation_amount,
+    compensation_type,
+    start_date,
+    end_date,
+    prefetch=None,
 ):
     """
     This method is used to update the basic or gross pay
 
     Args:
         compensation_amount (_type_): Gross pay or Basic pay or employee
+        prefetch (obj): optional PayrollPrefetch holding the deductions
     """
-    deduction_heads = (
-        Deduction.objects.filter(
-            update_compensation=compensation_type, specific_employees=employee
+    if prefetch is not None:
+        deduction_heads = prefetch.compensation_deductions(
+            employee, compensation_type, start_date, end_date
+        )
+    else:
+        deduction_heads = (
+            Deduction.objects.filter(
+                update_compensation=compensation_type, specific_employees=employee
+            )
+            .exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            # .exclude(exclude_employees=employee)
         )
-        .exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        # .exclude(exclude_employees=employee)
-    )
     deductions = []
     temp = compensation_amount
     for deduction in deduction_heads:
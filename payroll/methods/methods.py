@@ -47,7 +47,7 @@ def get_total_days(start_date, end_date):
     return total_days
 
 
-def get_leaves(employee, start_date, end_date):
+def get_leaves(employee, start_date, end_date, prefetch=None):
     """
     This method is used to return all the leaves taken by the employee
     between the period.
@@ -56,9 +56,14 @@ def get_leaves(employee, start_date, end_date):
         employee (obj): Employee model instance
         start_date (obj): the start date from the data needed
         end_date (obj): the end date till the date needed
+        prefetch (obj): optional PayrollPrefetch holding the employee's leaves
     """
-    if apps.is_installed("leave"):
-        approved_leaves = employee.leaverequest_set.filter(status="approved")
+    if prefetch is not None:
+        approved_leaves = prefetch.approved_leaves(employee)
+    elif apps.is_installed("leave"):
+        approved_leaves = employee.leaverequest_set.filter(
+            status="approved"
+        ).select_related("leave_type_id")
     else:
         approved_leaves = None
     paid_leave = 0
@@ -69,7 +74,7 @@ def get_leaves(employee, start_date, end_date):
     unpaid_leave_dates = []
     company_leave_dates = get_working_days(start_date, end_date)["company_leave_dates"]
 
-    if approved_leaves and approved_leaves.exists():
+    if approved_leaves:
         for instance in approved_leaves:
             if instance.leave_type_id.payment == "paid":
                 # if the taken leave is paid
@@ -114,7 +119,7 @@ def get_leaves(employee, start_date, end_date):
 
 if apps.is_installed("attendance"):
 
-    def get_attendance(employee, start_date, end_date):
+    def get_attendance(employee, start_date, end_date, prefetch=None):
         """
         This method is used to render attendance details between the range
 
@@ -122,36 +127,44 @@ if apps.is_installed("attendance"):
             employee (obj): Employee user instance
             start_date (obj): start date of the period
             end_date (obj): end date of the period
+            prefetch (obj): optional PayrollPrefetch holding the attendances
         """
-        Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
-        attendances_on_period = Attendance.objects.filter(
-            employee_id=employee,
-            attendance_date__range=(start_date, end_date),
-            attendance_validated=True,
-        )
+        if prefetch is not None:
+            attendances_on_period = prefetch.attendances(
+                employee, start_date, end_date, attendance_validated=True
+            )
+        else:
+            Attendance = get_horilla_model_class(
+                app_label="attendance", model="attendance"
+            )
+            attendances_on_period = Attendance.objects.filter(
+                employee_id=employee,
+                attendance_date__range=(start_date, end_date),
+                attendance_validated=True,
+            )
         present_on = [
             attendance.attendance_date for attendance in attendances_on_period
         ]
         working_days_between_range = get_working_days(start_date, end_date)[
             "working_days_on"
         ]
-        leave_dates = get_leaves(employee, start_date, end_date)["leave_dates"]
+        leave_dates = get_leaves(employee, start_date, end_date, prefetch)[
+            "leave_dates"
+        ]
         conflict_dates = list(
             set(working_days_between_range)
             - set(attendances_on_period)
             - set(leave_dates)
         )
+        holiday_dates = set(get_holiday_dates(start_date, end_date))
+        company_leave_dates = set(
+            get_company_leave_dates(start_date.year)
+            + get_company_leave_dates(end_date.year)
+        )
         conflict_dates = conflict_dates + [
             date
             for date in present_on
-            if date in get_holiday_dates(start_date, end_date)
-            or date
-            in list(
-                set(
-                    get_company_leave_dates(start_date.year)
-                    + get_company_leave_dates(end_date.year)
-                )
-            )
+            if date in holiday_dates or date in company_leave_dates
         ]
 
         return {
@@ -161,7 +174,7 @@ if apps.is_installed("attendance"):
         }
 
 
-def hourly_computation(employee, wage, start_date, end_date):
+def hourly_computation(employee, wage, start_date, end_date, prefetch=None):
     """
     Hourly salary computation for period.
 
@@ -170,13 +183,14 @@ def hourly_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        prefetch (obj): optional PayrollPrefetch of the payroll run
     """
     if not apps.is_installed("attendance"):
         return {
             "basic_pay": 0,
             "loss_of_pay": 0,
         }
-    attendance_data = get_attendance(employee, start_date, end_date)
+    attendance_data = get_attendance(employee, start_date, end_date, prefetch)
     attendances_on_period = attendance_data["attendances_on_period"]
     total_worked_hour_in_second = 0
     for attendance in attendances_on_period:
@@ -222,7 +236,79 @@ def find_half_day_leaves():
     }
 
 
-def daily_computation(employee, wage, start_date, end_date):
+def get_unpaid_half_day_leaves(employee, start_date, end_date, prefetch=None):
+    """
+    This method is used to return the unpaid half days of the approved leaves
+    starting or ending between the period.
+
+    Args:
+        employee (obj): Employee instance
+        start_date (obj): start date of the period
+        end_date (obj): end date of the period
+        prefetch (obj): optional PayrollPrefetch holding the employee's leaves
+    """
+    if not apps.is_installed("leave"):
+        return 0
+    if prefetch is not None:
+        unpaid_leaves = [
+            leave
+            for leave in prefetch.approved_leaves(employee)
+            if leave.leave_type_id.payment == "unpaid"
+        ]
+        start_date_leaves = len(
+            [
+                leave
+                for leave in unpaid_leaves
+                if start_date <= leave.start_date <= end_date
+                and leave.start_date_breakdown != "full_day"
+            ]
+        )
+        end_date_leaves = len(
+            [
+                leave
+                for leave in unpaid_leaves
+                if leave.end_date
+                and start_date <= leave.end_date <= end_date
+                and leave.end_date_breakdown != "full_day"
+                and leave.start_date != leave.end_date
+            ]
+        )
+    else:
+        date_range = get_date_range(start_date, end_date)
+        start_date_leaves = (
+            employee.leaverequest_set.filter(
+                leave_type_id__payment="unpaid",
+                start_date__in=date_range,
+                status="approved",
+            )
+            .exclude(start_date_breakdown="full_day")
+            .count()
+        )
+        end_date_leaves = (
+            employee.leaverequest_set.filter(
+                leave_type_id__payment="unpaid",
+                end_date__in=date_range,
+                status="approved",
+            )
+            .exclude(end_date_breakdown="full_day")
+            .exclude(start_date=F("end_date"))
+            .count()
+        )
+    return (start_date_leaves + end_date_leaves) * 0.5
+
+
+def get_active_contract(employee, prefetch=None):
+    """
+    This method is used to return the active contract of the employee
+    """
+    if prefetch is not None:
+        return prefetch.contract(employee, is_active=True)
+    return employee.contract_set.filter(
+        is_active=True, contract_status="active"
+    ).first()
+
+
+def daily_computation(employee, wage, start_date, end_date, prefetch=None):
     """
     Hourly salary computation for period.
 
@@ -231,43 +317,21 @@ def daily_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        prefetch (obj): optional PayrollPrefetch of the payroll run
     """
     working_day_data = get_working_days(start_date, end_date)
     total_working_days = working_day_data["total_working_days"]
 
-    leave_data = get_leaves(employee, start_date, end_date)
+    leave_data = get_leaves(employee, start_date, end_date, prefetch)
 
-    contract = employee.contract_set.filter(contract_status="active").first()
     basic_pay = wage * total_working_days
     loss_of_pay = 0
 
-    date_range = get_date_range(start_date, end_date)
-    half_day_leaves_between_period_on_start_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid",
-            start_date__in=date_range,
-            status="approved",
-        )
-        .exclude(start_date_breakdown="full_day")
-        .count()
+    unpaid_half_leaves = get_unpaid_half_day_leaves(
+        employee, start_date, end_date, prefetch
     )
 
-    half_day_leaves_between_period_on_end_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid", end_date__in=date_range, status="approved"
-        )
-        .exclude(end_date_breakdown="full_day")
-        .exclude(start_date=F("end_date"))
-        .count()
-    )
-    unpaid_half_leaves = (
-        half_day_leaves_between_period_on_start_date
-        + half_day_leaves_between_period_on_end_date
-    ) * 0.5
-
-    contract = employee.contract_set.filter(
-        is_active=True, contract_status="active"
-    ).first()
+    contract = get_active_contract(employee, prefetch)
 
     unpaid_leaves = leave_data["unpaid_leaves"] - unpaid_half_leaves
     if contract.calculate_daily_leave_amount:
@@ -357,7 +421,7 @@ def months_between_range(wage, start_date, end_date):
     return months_data
 
 
-def monthly_computation(employee, wage, start_date, end_date):
+def monthly_computation(employee, wage, start_date, end_date, prefetch=None):
     """
     Hourly salary computation for period.
 
@@ -366,56 +430,24 @@ def monthly_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        prefetch (obj): optional PayrollPrefetch of the payroll run
     """
     basic_pay = 0
     month_data = months_between_range(wage, start_date, end_date)
 
-    leave_data = get_leaves(employee, start_date, end_date)
+    leave_data = get_leaves(employee, start_date, end_date, prefetch)
 
     for data in month_data:
         basic_pay = basic_pay + (
             data["working_days_on_period"] * data["per_day_amount"]
         )
 
-    contract = employee.contract_set.filter(contract_status="active").first()
     loss_of_pay = 0
-    date_range = get_date_range(start_date, end_date)
-    if apps.is_installed("leave"):
-        start_date_leaves = (
-            employee.leaverequest_set.filter(
-                leave_type_id__payment="unpaid",
-                start_date__in=date_range,
-                status="approved",
-            )
-            .exclude(start_date_breakdown="full_day")
-            .count()
-        )
-        end_date_leaves = (
-            employee.leaverequest_set.filter(
-                leave_type_id__payment="unpaid",
-                end_date__in=date_range,
-                status="approved",
-            )
-            .exclude(end_date_breakdown="full_day")
-            .exclude(start_date=F("end_date"))
-            .count()
-        )
-    else:
-        start_date_leaves = 0
-        end_date_leaves = 0
-
-    half_day_leaves_between_period_on_start_date = start_date_leaves
-
-    half_day_leaves_between_period_on_end_date = end_date_leaves
-
-    unpaid_half_leaves = (
-        half_day_leaves_between_period_on_start_date
-        + half_day_leaves_between_period_on_end_date
-    ) * 0.5
+    unpaid_half_leaves = get_unpaid_half_day_leaves(
+        employee, start_date, end_date, prefetch
+    )
 
-    contract = employee.contract_set.filter(
-        is_active=True, contract_status="active"
-    ).first()
+    contract = get_active_contract(employee, prefetch)
     unpaid_leaves = abs(leave_data["unpaid_leaves"] - unpaid_half_leaves)
     paid_days = month_data[0]["working_days_on_period"] - unpaid_leaves
     daily_computed_salary = get_daily_salary(wage=wage, wage_date=start_date)[
@@ -438,7 +470,7 @@ def monthly_computation(employee, wage, start_date, end_date):
     }
 
 
-def compute_salary_on_period(employee, start_date, end_date, wage=None):
+def compute_salary_on_period(employee, start_date, end_date, wage=None, prefetch=None):
     """
     This method is used to compute salary on the start to end date period
 
@@ -446,10 +478,14 @@ def compute_salary_on_period(employee, start_date, end_date, wage=None):
         employee (obj): Employee instance
         start_date (obj): start date of the period
         end_date (obj): end date of the period
+        prefetch (obj): optional PayrollPrefetch of the payroll run
     """
-    contract = Contract.objects.filter(
-        employee_id=employee, contract_status="active"
-    ).first()
+    if prefetch is not None:
+        contract = prefetch.contract(employee)
+    else:
+        contract = Contract.objects.filter(
+            employee_id=employee, contract_status="active"
+        ).first()
     if contract is None:
         return contract
 
@@ -457,16 +493,16 @@ def compute_salary_on_period(employee, start_date, end_date, wage=None):
     wage_type = contract.wage_type
     data = None
     if wage_type == "hourly":
-        data = hourly_computation(employee, wage, start_date, end_date)
+        data = hourly_computation(employee, wage, start_date, end_date, prefetch)
         month_data = months_between_range(wage, start_date, end_date)
         data["month_data"] = month_data
     elif wage_type == "daily":
-        data = daily_computation(employee, wage, start_date, end_date)
+        data = daily_computation(employee, wage, start_date, end_date, prefetch)
         month_data = months_between_range(wage, start_date, end_date)
         data["month_data"] = month_data
 
     else:
-        data = monthly_computation(employee, wage, start_date, end_date)
+        data = monthly_computation(employee, wage, start_date, end_date, prefetch)
     data["contract_wage"] = wage
     data["contract"] = contract
     return data
@@ -481,7 +517,7 @@ def paginator_qry(qryset, page_number):
     return qryset
 
 
-def calculate_employer_contribution(data):
+def calculate_employer_contribution(data, prefetch=None):
     """
     This method is used to calculate the employer contribution
     """
@@ -500,9 +536,12 @@ def calculate_employer_contribution(data):
                     deduction.get("deduction_id")
                     and deduction.get("employer_contribution_rate", 0) > 0
                 ):
-                    object = Deduction.objects.filter(
-                        id=deduction.get("deduction_id")
-                    ).first()
+                    if prefetch is not None:
+                        object = prefetch.deduction(deduction.get("deduction_id"))
+                    else:
+                        object = Deduction.objects.filter(
+                            id=deduction.get("deduction_id")
+                        ).first()
                     if object:
                         amount = pay_head_data.get(object.based_on)
                         employer_contribution_amount = (
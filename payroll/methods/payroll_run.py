@@ -0,0 +1,243 @@
+"""
+payroll_run.py
+
+This module is used to generate the payslips of a batch in worker processes.
+
+The employees are split into chunks and every chunk is computed by
+generate_bulk_payslips in a ProcessPoolExecutor worker with its own database
+connection. The progress is written to the PayrollRun record after each
+chunk so the UI can poll it while the run goes on in the background.
+
+The runs are queued on an executor of their own, one at a time, so a long
+run does not hold a thread of the shared background executor. The company
+selected by the user who started the run scopes the queries of the run and
+of its worker processes, like in the request. A run that makes no progress
+for PAYROLL_RUN_TIMEOUT seconds, because its process was stopped, is marked
+as failed when it is polled.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.db import connection, connections
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from base.horilla_company_manager import get_selected_company, set_selected_company
+from horilla.horilla_settings import (
+    BACKGROUND_QUEUE_SIZE,
+    PAYROLL_RUN_CHUNK_SIZE,
+    PAYROLL_RUN_TIMEOUT,
+    PAYROLL_RUN_WORKERS,
+)
+from horilla.horilla_tasks import BackgroundExecutor
+
+# The worker processes import this module before django is set up, so the
+# models are imported inside the functions
+
+logger = logging.getLogger(__name__)
+
+payroll_run_executor = BackgroundExecutor(workers=1, queue_size=BACKGROUND_QUEUE_SIZE)
+
+
+def use_payroll_run(employee_count):
+    """
+    Whether a batch of employee_count employees is computed in worker processes
+    """
+    return PAYROLL_RUN_WORKERS > 0 and employee_count > PAYROLL_RUN_CHUNK_SIZE
+
+
+def _init_worker():
+    """
+    Worker process initializer, sets up django and drops any database
+    connection inherited from the parent so the worker opens its own
+    """
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "horilla.settings")
+    django.setup()
+    connections.close_all()
+
+
+def _generate_chunk(
+    employee_ids, start_date, end_date, group_name, status, user_id, company_id
+):
+    """
+    Compute and save the payslips of a chunk of employees in a worker process
+
+    Returns:
+        list: (employee user id, payslip id) of the generated payslips
+    """
+    from django.contrib.auth.models import User
+
+    from employee.models import Employee
+    from payroll.methods.bulk_payroll import generate_bulk_payslips
+
+    set_selected_company(company_id)
+    user = User.objects.filter(id=user_id).first() if user_id else None
+    payslips = generate_bulk_payslips(
+        Employee.objects.filter(id__in=employee_ids),
+        start_date,
+        end_date,
+        group_name=group_name,
+        status=status,
+        user=user,
+    )
+    return [
+        (payslip["employee"].employee_user_id_id, payslip["instance"].id)
+        for payslip in payslips
+    ]
+
+
+def _notify_payslips(sender, results):
+    """
+    Notify the employees of their generated payslips
+    """
+    from django.contrib.auth.models import User
+
+    from notifications.signals import notify
+
+    if sender is None:
+        return
+    users = User.objects.in_bulk([user_id for user_id, _payslip_id in results])
+    for user_id, payslip_id in results:
+        recipient = users.get(user_id)
+        if recipient is None:
+            continue
+        notify.send(
+            sender,
+            recipient=recipient,
+            verb="Payslip has been generated for you.",
+            verb_ar="تم إصدار كشف راتب لك.",
+            verb_de="Gehaltsabrechnung wurde für Sie erstellt.",
+            verb_es="Se ha generado la nómina para usted.",
+            verb_fr="La fiche de paie a été générée pour vous.",
+            redirect=reverse("view-created-payslip", kwargs={"payslip_id": payslip_id}),
+            icon="close",
+        )
+
+
+def execute_payroll_run(run_id, employee_ids, status="draft", company_id=None):
+    """
+    Compute the payslips of the run in worker processes, chunk by chunk,
+    updating the progress of the PayrollRun record
+    """
+    from payroll.models.models import PayrollRun
+
+    # a run failed as stale while it was queued is not started anymore
+    if not PayrollRun.objects.filter(id=run_id, status="queued").update(
+        status="running", updated_at=timezone.now()
+    ):
+        connection.close()
+        return
+    set_selected_company(company_id)
+    run = PayrollRun.objects.select_related("created_by").get(id=run_id)
+    sender = getattr(run.created_by, "employee_get", None)
+    chunks = [
+        employee_ids[index : index + PAYROLL_RUN_CHUNK_SIZE]
+        for index in range(0, len(employee_ids), PAYROLL_RUN_CHUNK_SIZE)
+    ]
+    try:
+        with ProcessPoolExecutor(
+            max_workers=PAYROLL_RUN_WORKERS or None,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _generate_chunk,
+                    chunk,
+                    run.start_date,
+                    run.end_date,
+                    run.group_name,
+                    status,
+                    run.created_by_id,
+                    company_id,
+                ): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                results = future.result()
+                PayrollRun.objects.filter(id=run_id).update(
+                    processed=F("processed") + len(futures[future]),
+                    generated=F("generated") + len(results),
+                    updated_at=timezone.now(),
+                )
+                _notify_payslips(sender, results)
+    except Exception as error:
+        logger.exception("Payroll run %s failed", run_id)
+        PayrollRun.objects.filter(id=run_id).update(
+            status="failed",
+            error=str(error),
+            updated_at=timezone.now(),
+            finished_at=timezone.now(),
+        )
+    else:
+        PayrollRun.objects.filter(id=run_id).update(
+            status="completed", updated_at=timezone.now(), finished_at=timezone.now()
+        )
+    finally:
+        # the executor thread is reused by the next run
+        set_selected_company(None)
+        connection.close()
+
+
+def fail_stale_run(run):
+    """
+    Mark the run as failed when it made no progress for PAYROLL_RUN_TIMEOUT
+    seconds, its process was stopped before it finished
+
+    Returns:
+        PayrollRun: the run, with its current status
+    """
+    if run.status not in ["queued", "running"]:
+        return run
+    last_progress = run.updated_at or run.created_at
+    if last_progress > timezone.now() - timedelta(seconds=PAYROLL_RUN_TIMEOUT):
+        return run
+    type(run).objects.filter(
+        id=run.id, status=run.status, updated_at=run.updated_at
+    ).update(
+        status="failed",
+        error="The payroll run stopped without finishing",
+        finished_at=timezone.now(),
+    )
+    run.refresh_from_db()
+    return run
+
+
+def start_payroll_run(
+    employees, start_date, end_date, group_name=None, status="draft", user=None
+):
+    """
+    Create a PayrollRun for the employees and compute it in the background
+
+    Args:
+        employees (QuerySet): Employee queryset
+        start_date (date): start date of the payroll period
+        end_date (date): end date of the payroll period
+        group_name (str): batch name of the payslips
+        status (str): status of the payslips
+        user (User): user who started the run
+
+    Returns:
+        PayrollRun: the run record to poll for the progress
+    """
+    from payroll.models.models import PayrollRun
+
+    employee_ids = list(employees.values_list("id", flat=True))
+    run = PayrollRun.objects.create(
+        group_name=group_name,
+        start_date=start_date,
+        end_date=end_date,
+        total=len(employee_ids),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    payroll_run_executor.submit(
+        execute_payroll_run, run.id, employee_ids, status, get_selected_company()
+    )
+    return run
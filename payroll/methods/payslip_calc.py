@@ -9,8 +9,10 @@ import contextlib
 import operator
 
 from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
 
 # from attendance.models import Attendance
+from employee.models import Employee
 from horilla.methods import get_horilla_model_class
 from payroll.methods.limits import compute_limit
 from payroll.models import models
@@ -39,33 +41,25 @@ operator_mapping = {
 }
 filter_mapping = {
     "work_type_id": {
-        "filter": lambda employee, allowance, start_date, end_date: {
-            "employee_id": employee,
-            "work_type_id__id": allowance.work_type_id.id,
-            "attendance_date__range": (start_date, end_date),
+        "filter": lambda allowance: {
+            "work_type_id": allowance.work_type_id_id,
             "attendance_validated": True,
         }
     },
     "shift_id": {
-        "filter": lambda employee, allowance, start_date, end_date: {
-            "employee_id": employee,
-            "shift_id__id": allowance.shift_id.id,
-            "attendance_date__range": (start_date, end_date),
+        "filter": lambda allowance: {
+            "shift_id": allowance.shift_id_id,
             "attendance_validated": True,
         }
     },
     "overtime": {
-        "filter": lambda employee, allowance, start_date, end_date: {
-            "employee_id": employee,
-            "attendance_date__range": (start_date, end_date),
+        "filter": lambda allowance: {
             "attendance_overtime_approve": True,
             "attendance_validated": True,
         }
     },
     "attendance": {
-        "filter": lambda employee, allowance, start_date, end_date: {
-            "employee_id": employee,
-            "attendance_date__range": (start_date, end_date),
+        "filter": lambda allowance: {
             "attendance_validated": True,
         }
     },
@@ -200,6 +194,199 @@ def dynamic_attr(obj, attribute_path):
     return obj
 
 
+def get_component_conditions(component, prefetch=None, main_condition_only=False):
+    """
+    Retrieves the conditions of a condition based allowance or deduction.
+
+    Args:
+        component: The Allowance or Deduction object.
+        prefetch: Optional PayrollPrefetch holding the other conditions.
+        main_condition_only: Skip the other conditions of the component.
+
+    Returns:
+        A list of (field, condition, value) tuples, the main condition is the last one.
+    """
+    if main_condition_only:
+        conditions = []
+    elif prefetch is not None:
+        conditions = prefetch.other_conditions(component)
+    else:
+        conditions = list(
+            component.other_conditions.values_list("field", "condition", "value")
+        )
+    conditions.append(
+        (
+            component.field,
+            component.condition,
+            component.value.lower().replace(" ", "_"),
+        )
+    )
+    return conditions
+
+
+class ComponentCondition:
+    """
+    The conditions of a condition based allowance or deduction compiled into a
+    predicate over the condition field values of an employee.
+    """
+
+    def __init__(self, conditions):
+        self.conditions = [
+            (field, operator_mapping.get(condition), value)
+            for field, condition, value in conditions
+        ]
+        self.fields = {field for field, _condition, _value in conditions}
+
+    def __call__(self, values):
+        for field, operator_func, value in self.conditions:
+            val = values.get(field)
+            if val is None or not operator_func(val, type(val)(value)):
+                return False
+        return True
+
+
+def compile_component_condition(component, prefetch=None, main_condition_only=False):
+    """
+    Returns the ComponentCondition of the component, cached for the payroll run
+    when a PayrollPrefetch is given.
+    """
+    if prefetch is not None:
+        return prefetch.component_condition(component, main_condition_only)
+    return ComponentCondition(
+        get_component_conditions(component, main_condition_only=main_condition_only)
+    )
+
+
+def _is_value_lookup(model, path):
+    """
+    Whether the path is a chain of single valued relations ending on a
+    non relational field of the model
+    """
+    parts = path.split("__")
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return False
+        if index == len(parts) - 1:
+            return not field.is_relation
+        if not field.is_relation:
+            return False
+        model = field.related_model
+    return False
+
+
+def get_condition_values(employees, fields):
+    """
+    Resolves the condition fields of the employees with one query for the
+    employee fields and one for the fields of the active contract. Paths that
+    are not plain database lookups are read with dynamic_attr.
+
+    Args:
+        employees: The employee objects.
+        fields: The condition field paths.
+
+    Returns:
+        A dictionary mapping each employee id to a {field: value} dictionary.
+    """
+    values = {employee.pk: {} for employee in employees}
+    employee_fields = []
+    contract_fields = {}
+    attr_fields = []
+    for field in fields:
+        contract_path = field.split("contract_set__", 1)
+        if (
+            not contract_path[0]
+            and len(contract_path) == 2
+            and _is_value_lookup(Contract, contract_path[1])
+        ):
+            contract_fields[field] = contract_path[1]
+        elif _is_value_lookup(Employee, field):
+            employee_fields.append(field)
+        else:
+            attr_fields.append(field)
+
+    if employee_fields:
+        for row in Employee._base_manager.filter(pk__in=values).values(
+            "pk", *employee_fields
+        ):
+            values[row.pop("pk")].update(row)
+    if contract_fields:
+        # dynamic_attr reads the first active contract of the employee
+        seen = set()
+        for row in (
+            Contract.objects.filter(employee_id__in=values, is_active=True)
+            .order_by("pk")
+            .values_list("employee_id", *contract_fields.values())
+        ):
+            if row[0] not in seen:
+                seen.add(row[0])
+                values[row[0]].update(zip(contract_fields, row[1:]))
+    for employee in employees:
+        for field in attr_fields:
+            values[employee.pk][field] = dynamic_attr(employee, field)
+    return values
+
+
+def condition_based_components(
+    employee, components, prefetch=None, main_condition_only=False
+):
+    """
+    Filters the allowances or deductions applicable to the employee, the
+    condition based ones are kept only when their conditions hold.
+
+    Args:
+        employee: The employee object.
+        components: The Allowance or Deduction objects.
+        prefetch: Optional PayrollPrefetch holding the compiled conditions and
+            the condition field values of the employees of the run.
+        main_condition_only: Check only the main condition of the components.
+    """
+    components = list(components)
+    conditions = {
+        component.pk: compile_component_condition(
+            component, prefetch, main_condition_only
+        )
+        for component in components
+        if component.is_condition_based
+    }
+    if not conditions:
+        return components
+    if prefetch is not None:
+        values = prefetch.condition_values(employee)
+    else:
+        fields = set().union(*(condition.fields for condition in conditions.values()))
+        values = get_condition_values([employee], fields)[employee.pk]
+    return [
+        component
+        for component in components
+        if not component.is_condition_based or conditions[component.pk](values)
+    ]
+
+
+def get_attendances(employee, start_date, end_date, prefetch=None, **lookups):
+    """
+    Retrieves the attendances of the employee between the period matching the lookups.
+
+    Args:
+        employee: The employee object.
+        start_date: The start date of the period.
+        end_date: The end date of the period.
+        prefetch: Optional PayrollPrefetch holding the attendances.
+        lookups: Exact match filters on the attendance fields.
+    """
+    if prefetch is not None:
+        return prefetch.attendances(employee, start_date, end_date, **lookups)
+    Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
+    return Attendance.objects.filter(
+        employee_id=employee,
+        attendance_date__range=(start_date, end_date),
+        **lookups,
+    )
+
+
 def calculate_gross_pay(*_args, **kwargs):
     """
     Calculate the gross pay for an employee within a given date range.
@@ -271,19 +458,25 @@ def calculate_allowance(**kwargs):
     end_date = kwargs["end_date"]
     basic_pay = kwargs["basic_pay"]
     day_dict = kwargs["day_dict"]
-    specific_allowances = Allowance.objects.filter(specific_employees=employee)
-    conditional_allowances = Allowance.objects.filter(is_condition_based=True).exclude(
-        exclude_employees=employee
-    )
-    active_employees = Allowance.objects.filter(include_active_employees=True).exclude(
-        exclude_employees=employee
-    )
-
-    allowances = specific_allowances | conditional_allowances | active_employees
-
-    allowances = allowances.exclude(one_time_date__lt=start_date).exclude(
-        one_time_date__gt=end_date
-    )
+    prefetch = kwargs.get("prefetch")
+    if prefetch is not None:
+        allowances = prefetch.allowances(employee, start_date, end_date)
+    else:
+        specific_allowances = Allowance.objects.filter(specific_employees=employee)
+        conditional_allowances = Allowance.objects.filter(
+            is_condition_based=True
+        ).exclude(exclude_employees=employee)
+        active_employees = Allowance.objects.filter(
+            include_active_employees=True
+        ).exclude(exclude_employees=employee)
+
+        allowances = (
+            specific_allowances | conditional_allowances | active_employees
+        ).distinct()
+
+        allowances = allowances.exclude(one_time_date__lt=start_date).exclude(
+            one_time_date__gt=end_date
+        )
 
     employee_allowances = []
     tax_allowances = []
@@ -291,42 +484,16 @@ def calculate_allowance(**kwargs):
     tax_allowances_amt = []
     no_tax_allowances_amt = []
     # Append allowances based on condition, or unconditionally to employee
-    for allowance in allowances:
+    for allowance in condition_based_components(employee, allowances, prefetch):
         if allowance.is_condition_based:
-            conditions = list(
-                allowance.other_conditions.values_list("field", "condition", "value")
-            )
-            condition_field = allowance.field
-            condition_operator = allowance.condition
-            condition_value = allowance.value.lower().replace(" ", "_")
-            conditions.append((condition_field, condition_operator, condition_value))
-            applicable = True
-            for condition in conditions:
-                val = dynamic_attr(employee, condition[0])
-                if val is not None:
-                    operator_func = operator_mapping.get(condition[1])
-                    condition_value = type(val)(condition[2])
-                    if operator_func(val, condition_value):
-                        applicable = applicable * True
-                        continue
-                    else:
-                        applicable = False
-                        break
-                else:
-                    applicable = False
-                    break
-            if applicable:
-                employee_allowances.append(allowance)
+            employee_allowances.append(allowance)
         else:
             if allowance.based_on in filter_mapping:
-                filter_params = filter_mapping[allowance.based_on]["filter"](
-                    employee, allowance, start_date, end_date
-                )
+                filter_params = filter_mapping[allowance.based_on]["filter"](allowance)
                 if apps.is_installed("attendance"):
-                    Attendance = get_horilla_model_class(
-                        app_label="attendance", model="attendance"
-                    )
-                    if Attendance.objects.filter(**filter_params):
+                    if get_attendances(
+                        employee, start_date, end_date, prefetch, **filter_params
+                    ):
                         employee_allowances.append(allowance)
             else:
                 employee_allowances.append(allowance)
@@ -357,6 +524,7 @@ def calculate_allowance(**kwargs):
                     "total_allowance": None,
                     "basic_pay": basic_pay,
                     "day_dict": day_dict,
+                    "prefetch": prefetch,
                 },
             )
             kwargs["amount"] = amount
@@ -382,6 +550,7 @@ def calculate_allowance(**kwargs):
                     "component": allowance,
                     "day_dict": day_dict,
                     "basic_pay": basic_pay,
+                    "prefetch": prefetch,
                 }
             )
             kwargs["amount"] = amount
@@ -431,18 +600,29 @@ def calculate_tax_deduction(*_args, **kwargs):
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=False, is_tax=True
-    )
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=False, is_tax=True
-    ).exclude(exclude_employees=employee)
-    deductions = specific_deductions | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
+    prefetch = kwargs.get("prefetch")
+    if prefetch is not None:
+        deductions = prefetch.deductions(
+            employee,
+            start_date,
+            end_date,
+            is_pretax=False,
+            is_tax=True,
+            condition_based=False,
+        )
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=False, is_tax=True
+        )
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=False, is_tax=True
+        ).exclude(exclude_employees=employee)
+        deductions = (specific_deductions | active_employee_deduction).distinct()
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+        )
     deductions_amt = []
     serialized_deductions = []
     for deduction in deductions:
@@ -457,6 +637,7 @@ def calculate_tax_deduction(*_args, **kwargs):
                 "total_allowance": kwargs["total_allowance"],
                 "basic_pay": kwargs["basic_pay"],
                 "day_dict": kwargs["day_dict"],
+                "prefetch": prefetch,
             }
         )
         kwargs["amount"] = amount
@@ -492,59 +673,42 @@ def calculate_pre_tax_deduction(*_args, **kwargs):
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
+    prefetch = kwargs.get("prefetch")
 
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=True, is_tax=False
-    )
-    conditional_deduction = models.Deduction.objects.filter(
-        is_condition_based=True, is_pretax=True, is_tax=False
-    ).exclude(exclude_employees=employee)
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=True, is_tax=False
-    ).exclude(exclude_employees=employee)
-
-    deductions = specific_deductions | conditional_deduction | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
-    # Installment deductions
-    installments = deductions.filter(is_installment=True)
+    if prefetch is not None:
+        deductions = prefetch.deductions(
+            employee, start_date, end_date, is_pretax=True, is_tax=False
+        )
+        # Installment deductions
+        installments = [
+            deduction for deduction in deductions if deduction.is_installment
+        ]
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=True, is_tax=False
+        )
+        conditional_deduction = models.Deduction.objects.filter(
+            is_condition_based=True, is_pretax=True, is_tax=False
+        ).exclude(exclude_employees=employee)
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=True, is_tax=False
+        ).exclude(exclude_employees=employee)
+
+        deductions = (
+            specific_deductions | conditional_deduction | active_employee_deduction
+        ).distinct()
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+        )
+        # Installment deductions
+        installments = deductions.filter(is_installment=True)
 
-    pre_tax_deductions = []
     pre_tax_deductions_amt = []
     serialized_deductions = []
 
-    for deduction in deductions:
-        if deduction.is_condition_based:
-            conditions = list(
-                deduction.other_conditions.values_list("field", "condition", "value")
-            )
-            condition_field = deduction.field
-            condition_operator = deduction.condition
-            condition_value = deduction.value.lower().replace(" ", "_")
-            conditions.append((condition_field, condition_operator, condition_value))
-            operator_func = operator_mapping.get(condition_operator)
-            applicable = True
-            for condition in conditions:
-                val = dynamic_attr(employee, condition[0])
-                if val is not None:
-                    operator_func = operator_mapping.get(condition[1])
-                    condition_value = type(val)(condition[2])
-                    if operator_func(val, condition_value):
-                        applicable = applicable * True
-                        continue
-                    else:
-                        applicable = False
-                        break
-                else:
-                    applicable = False
-                    break
-            if applicable:
-                pre_tax_deductions.append(deduction)
-        else:
-            pre_tax_deductions.append(deduction)
+    pre_tax_deductions = condition_based_components(employee, deductions, prefetch)
 
     for deduction in pre_tax_deductions:
         if deduction.is_fixed:
@@ -563,6 +727,7 @@ def calculate_pre_tax_deduction(*_args, **kwargs):
                     "total_allowance": kwargs["total_allowance"],
                     "basic_pay": kwargs["basic_pay"],
                     "day_dict": kwargs["day_dict"],
+                    "prefetch": prefetch,
                 }
             )
             kwargs["amount"] = amount
@@ -601,42 +766,43 @@ def calculate_post_tax_deduction(*_args, **kwargs):
     total_allowance = kwargs["total_allowance"]
     basic_pay = kwargs["basic_pay"]
     day_dict = kwargs["day_dict"]
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=False, is_tax=False
-    )
-    conditional_deduction = models.Deduction.objects.filter(
-        is_condition_based=True, is_pretax=False, is_tax=False
-    ).exclude(exclude_employees=employee)
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=False, is_tax=False
-    ).exclude(exclude_employees=employee)
-    deductions = specific_deductions | conditional_deduction | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
-    # Installment deductions
-    installments = deductions.filter(is_installment=True)
+    prefetch = kwargs.get("prefetch")
+    if prefetch is not None:
+        deductions = prefetch.deductions(
+            employee, start_date, end_date, is_pretax=False, is_tax=False
+        )
+        # Installment deductions
+        installments = [
+            deduction for deduction in deductions if deduction.is_installment
+        ]
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=False, is_tax=False
+        )
+        conditional_deduction = models.Deduction.objects.filter(
+            is_condition_based=True, is_pretax=False, is_tax=False
+        ).exclude(exclude_employees=employee)
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=False, is_tax=False
+        ).exclude(exclude_employees=employee)
+        deductions = (
+            specific_deductions | conditional_deduction | active_employee_deduction
+        ).distinct()
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+        )
+        # Installment deductions
+        installments = deductions.filter(is_installment=True)
 
-    post_tax_deductions = []
     post_tax_deductions_amt = []
     serialized_deductions = []
     serialized_net_pay_deductions = []
 
-    for deduction in deductions:
-        if deduction.is_condition_based:
-            condition_field = deduction.field
-            condition_operator = deduction.condition
-            condition_value = deduction.value.lower().replace(" ", "_")
-            employee_value = dynamic_attr(employee, condition_field)
-            operator_func = operator_mapping.get(condition_operator)
-            if employee_value is not None:
-                condition_value = type(employee_value)(condition_value)
-                if operator_func(employee_value, condition_value):
-                    post_tax_deductions.append(deduction)
-        else:
-            post_tax_deductions.append(deduction)
+    post_tax_deductions = condition_based_components(
+        employee, deductions, prefetch, main_condition_only=True
+    )
     for deduction in post_tax_deductions:
         if deduction.is_fixed:
             amount = deduction.amount
@@ -657,6 +823,7 @@ def calculate_post_tax_deduction(*_args, **kwargs):
                         "total_allowance": total_allowance,
                         "basic_pay": basic_pay,
                         "day_dict": day_dict,
+                        "prefetch": prefetch,
                     }
                 )
                 kwargs["amount"] = amount
@@ -869,18 +1036,21 @@ def calculate_based_on_attendance(*_args, **kwargs):
     if not apps.is_installed("attendance"):
         return 0
 
-    Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
 
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    count = len(
+        get_attendances(
+            employee,
+            start_date,
+            end_date,
+            kwargs.get("prefetch"),
+            attendance_validated=True,
+        )
+    )
     amount = count * component.per_attendance_fixed_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -905,20 +1075,22 @@ def calculate_based_on_shift(*_args, **kwargs):
     if not apps.is_installed("attendance"):
         return 0
 
-    Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
 
-    shift_id = component.shift_id.id
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        shift_id=shift_id,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    count = len(
+        get_attendances(
+            employee,
+            start_date,
+            end_date,
+            kwargs.get("prefetch"),
+            shift_id=component.shift_id_id,
+            attendance_validated=True,
+        )
+    )
     amount = count * component.shift_per_attendance_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -942,16 +1114,17 @@ def calculate_based_on_overtime(*_args, **kwargs):
     if not apps.is_installed("attendance"):
         return 0
 
-    Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
 
-    attendances = Attendance.objects.filter(
-        employee_id=employee,
-        attendance_date__range=(start_date, end_date),
+    attendances = get_attendances(
+        employee,
+        start_date,
+        end_date,
+        kwargs.get("prefetch"),
         attendance_overtime_approve=True,
     )
     overtime = sum(attendance.overtime_second for attendance in attendances)
@@ -984,20 +1157,22 @@ def calculate_based_on_work_type(*_args, **kwargs):
     if not apps.is_installed("attendance"):
         return 0
 
-    Attendance = get_horilla_model_class(app_label="attendance", model="attendance")
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
 
-    work_type_id = component.work_type_id.id
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        work_type_id=work_type_id,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    count = len(
+        get_attendances(
+            employee,
+            start_date,
+            end_date,
+            kwargs.get("prefetch"),
+            work_type_id=component.work_type_id_id,
+            attendance_validated=True,
+        )
+    )
     amount = count * component.work_type_per_attendance_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -0,0 +1,219 @@
+"""
+payslip_pdf.py
+
+This module is used to render the payslip PDFs.
+
+The context shared by the payslips, the date format and the currency, is
+read once per batch. The rendered HTML of a payslip keys its PDF, which is
+kept in a private storage outside MEDIA_ROOT, so a payslip is converted to PDF once as long
+as neither its data nor the template change, and the downloads and the
+mails reuse the stored files. The conversions of a large batch run in
+worker processes.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.template.loader import render_to_string
+from xhtml2pdf import pisa
+
+from horilla.horilla_settings import (
+    HORILLA_DATE_FORMATS,
+    PAYSLIP_PDF_CHUNK_SIZE,
+    PAYSLIP_PDF_ROOT,
+    PAYSLIP_PDF_WORKERS,
+)
+from payroll.methods.payroll_run import _init_worker
+
+# The worker processes import this module before django is set up, so the
+# models are imported inside the functions
+
+logger = logging.getLogger(__name__)
+
+# Bump to render the stored PDFs again, when the conversion itself changes
+PAYSLIP_PDF_VERSION = "1"
+PAYSLIP_PDF_TEMPLATE = "payroll/payslip/individual_pdf.html"
+# Outside MEDIA_ROOT, the stored PDFs are never served directly
+payslip_pdf_storage = FileSystemStorage(location=PAYSLIP_PDF_ROOT)
+
+
+def shared_context(request):
+    """
+    Context shared by the payslips rendered for the request, the date format
+    of the company of the user, the currency and the host
+    """
+    from employee.models import EmployeeWorkInformation
+    from payroll.models.tax_models import PayrollSettings
+
+    info = (
+        EmployeeWorkInformation.objects.filter(
+            employee_id__employee_user_id=request.user
+        )
+        .select_related("company_id")
+        .first()
+    )
+    company = info.company_id if info else None
+    settings = PayrollSettings.objects.first()
+    return {
+        "date_format": (
+            company.date_format if company and company.date_format else "MMM. D, YYYY"
+        ),
+        "currency": settings.currency_symbol if settings else "",
+        "host": request.get_host(),
+        "protocol": "https" if request.is_secure() else "http",
+    }
+
+
+def payslip_queryset(payslip_ids):
+    """
+    Payslips with the relations their PDF shows
+    """
+    from payroll.models.models import Payslip
+
+    return Payslip.objects.filter(id__in=payslip_ids).select_related(
+        "employee_id__employee_bank_details",
+        "employee_id__employee_work_info__department_id",
+    )
+
+
+def payslip_context(payslip, shared):
+    """
+    Template context of the payslip PDF
+    """
+    from payroll.views.views import equalize_lists_length
+
+    data = payslip.pay_head_data
+    format_string = HORILLA_DATE_FORMATS.get(
+        shared["date_format"], HORILLA_DATE_FORMATS["MMM. D, YYYY"]
+    )
+    for key in ["start_date", "end_date"]:
+        value = datetime.strptime(data[key], "%Y-%m-%d").date()
+        data[f"formatted_{key}"] = value.strftime(format_string)
+    data["employee"] = payslip.employee_id
+    data["payslip"] = payslip
+    data["json_data"] = data.copy()
+    data["json_data"]["employee"] = payslip.employee_id.id
+    data["json_data"]["payslip"] = payslip.id
+    data["instance"] = payslip
+    data["currency"] = shared["currency"]
+    data["all_deductions"] = []
+    for deduction_list in [
+        data["basic_pay_deductions"],
+        data["gross_pay_deductions"],
+        data["pretax_deductions"],
+        data["post_tax_deductions"],
+        data["tax_deductions"],
+        data["net_deductions"],
+    ]:
+        data["all_deductions"].extend(deduction_list)
+
+    data["all_allowances"] = data["allowances"].copy()
+    equalize_lists_length(data["allowances"], data["all_deductions"])
+    data["zipped_data"] = zip(data["allowances"], data["all_deductions"])
+    data["host"] = shared["host"]
+    data["protocol"] = shared["protocol"]
+    return data
+
+
+def html_to_pdf(html):
+    """
+    Convert the HTML to PDF, runs in the worker processes
+
+    Returns:
+        bytes: the PDF, None when the conversion failed
+    """
+    from base.methods import link_callback
+
+    output = io.BytesIO()
+    status = pisa.CreatePDF(
+        html.encode("utf-8"), dest=output, link_callback=link_callback
+    )
+    if status.err:
+        return None
+    return output.getvalue()
+
+
+def pdf_path(payslip_id, html):
+    digest = hashlib.sha256(f"{PAYSLIP_PDF_VERSION}{html}".encode()).hexdigest()
+    return f"{payslip_id}/{digest}.pdf"
+
+
+def delete_payslip_pdfs(payslip_id):
+    """
+    Remove the stored PDFs of the payslip
+    """
+    directory = str(payslip_id)
+    try:
+        _directories, files = payslip_pdf_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for file_name in files:
+        payslip_pdf_storage.delete(f"{directory}/{file_name}")
+    try:
+        os.rmdir(payslip_pdf_storage.path(directory))
+    except OSError:
+        pass
+
+
+def store_pdf(payslip_id, path, content):
+    """
+    Store the PDF of the payslip, removing the PDFs of its previous versions
+    """
+    delete_payslip_pdfs(payslip_id)
+    payslip_pdf_storage.save(path, ContentFile(content))
+
+
+def render_payslip_pdfs(payslips, shared):
+    """
+    PDFs of the payslips, read from the storage or converted, in worker
+    processes when more than PAYSLIP_PDF_CHUNK_SIZE payslips are missing
+
+    Args:
+        payslips (iterable): Payslip instances, see payslip_queryset
+        shared (dict): context shared by the payslips, see shared_context
+
+    Returns:
+        dict: {payslip id: (payslip, PDF bytes or None and the HTML when the
+        conversion failed)}
+    """
+    results = {}
+    missing = []
+    for payslip in payslips:
+        html = render_to_string(PAYSLIP_PDF_TEMPLATE, payslip_context(payslip, shared))
+        path = pdf_path(payslip.id, html)
+        if payslip_pdf_storage.exists(path):
+            with payslip_pdf_storage.open(path, "rb") as file:
+                results[payslip.id] = (payslip, file.read(), html)
+        else:
+            missing.append((payslip, path, html))
+
+    if PAYSLIP_PDF_WORKERS > 0 and len(missing) > PAYSLIP_PDF_CHUNK_SIZE:
+        with ProcessPoolExecutor(
+            max_workers=PAYSLIP_PDF_WORKERS,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+        ) as executor:
+            contents = list(
+                executor.map(
+                    html_to_pdf,
+                    [html for _payslip, _path, html in missing],
+                    chunksize=PAYSLIP_PDF_CHUNK_SIZE,
+                )
+            )
+    else:
+        contents = [html_to_pdf(html) for _payslip, _path, html in missing]
+
+    for (payslip, path, html), content in zip(missing, contents):
+        if content is None:
+            logger.error("Payslip %s could not be converted to PDF", payslip.id)
+        else:
+            store_pdf(payslip.id, path, content)
+        results[payslip.id] = (payslip, content, html)
+    return results
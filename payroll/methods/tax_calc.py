@@ -37,16 +37,25 @@ def calculate_taxable_amount(**kwargs):
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     basic_pay = kwargs["basic_pay"]
-    contract = Contract.objects.filter(
-        employee_id=employee, contract_status="active"
-    ).first()
+    prefetch = kwargs.get("prefetch")
+    if prefetch is not None:
+        contract = prefetch.contract(employee)
+    else:
+        contract = Contract.objects.filter(
+            employee_id=employee, contract_status="active"
+        ).first()
     filing = contract.filing_status
     if not filing:
         return 0
     federal_tax_for_period = 0
-    tax_brackets = TaxBracket.objects.filter(filing_status_id=filing).order_by(
-        "min_income"
-    )
+    if prefetch is not None:
+        tax_brackets = prefetch.tax_brackets(filing)
+    else:
+        tax_brackets = list(
+            TaxBracket.objects.filter(filing_status_id=filing)
+            .order_by("min_income")
+            .values("tax_rate", "min_income", "max_income")
+        )
     num_days = (end_date - start_date).days + 1
     calculation_functions = {
         "taxable_gross_pay": calculate_taxable_gross_pay,
@@ -74,7 +83,7 @@ def calculate_taxable_amount(**kwargs):
                 "min": item["min_income"],
                 "max": min(item["max_income"], yearly_income),
             }
-            for item in tax_brackets.values("tax_rate", "min_income", "max_income")
+            for item in tax_brackets
         ]
         filterd_brackets = []
         for bracket in brackets:
@@ -98,7 +107,7 @@ def calculate_taxable_amount(**kwargs):
             logger.error(e)
 
     federal_tax_for_period = 0
-    if federal_tax and (tax_brackets.exists() or filing.use_py):
+    if federal_tax and (tax_brackets or filing.use_py):
         daily_federal_tax = federal_tax / total_days
         federal_tax_for_period = daily_federal_tax * num_days
 
@@ -1 +0,0 @@
-from payroll import scheduler
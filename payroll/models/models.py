@@ -10,9 +10,10 @@ from datetime import date, datetime, timedelta
 from django import forms
 from django.apps import apps
 from django.contrib import messages
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.http import QueryDict
 from django.utils import timezone
@@ -29,7 +30,6 @@ from base.models import (
     WorkType,
     validate_time_format,
 )
-from employee.methods.duration_methods import strtime_seconds
 from employee.models import BonusPoint, Employee, EmployeeWorkInformation
 from horilla import horilla_middlewares
 from horilla.models import HorillaModel
@@ -445,175 +445,6 @@ class WorkRecord(models.Model):
         )
 
 
-if apps.is_installed("attendance"):
-    from attendance.models import Attendance
-
-    class OverrideAttendance(Attendance):
-        """
-        Class to override Attendance model save method
-        """
-
-        # Additional fields and methods specific to AnotherModel
-        @receiver(post_save, sender=Attendance)
-        def attendance_post_save(sender, instance, **kwargs):
-            """
-            Overriding Attendance model save method
-            """
-            if instance.first_save:
-                min_hour_second = strtime_seconds(instance.minimum_hour)
-                at_work_second = strtime_seconds(instance.attendance_worked_hour)
-
-                status = "FDP" if instance.at_work_second >= min_hour_second else "HDP"
-
-                status = "CONF" if instance.attendance_validated is False else status
-                message = (
-                    _("Validate the attendance") if status == "CONF" else _("Validated")
-                )
-
-                message = (
-                    _("Incomplete minimum hour")
-                    if status == "HDP" and min_hour_second > at_work_second
-                    else message
-                )
-                work_record = WorkRecord.objects.filter(
-                    date=instance.attendance_date,
-                    is_attendance_record=True,
-                    employee_id=instance.employee_id,
-                )
-                work_record = (
-                    WorkRecord()
-                    if not WorkRecord.objects.filter(
-                        date=instance.attendance_date,
-                        employee_id=instance.employee_id,
-                    ).exists()
-                    else WorkRecord.objects.filter(
-                        date=instance.attendance_date,
-                        employee_id=instance.employee_id,
-                    ).first()
-                )
-                work_record.employee_id = instance.employee_id
-                work_record.date = instance.attendance_date
-                work_record.at_work = instance.attendance_worked_hour
-                work_record.min_hour = instance.minimum_hour
-                work_record.min_hour_second = min_hour_second
-                work_record.at_work_second = at_work_second
-                work_record.work_record_type = status
-                work_record.message = message
-                work_record.is_attendance_record = True
-                if instance.attendance_validated:
-                    work_record.day_percentage = (
-                        1.00 if at_work_second > min_hour_second / 2 else 0.50
-                    )
-                work_record.save()
-
-                if status == "HDP" and work_record.is_leave_record:
-                    message = _("Half day leave")
-
-                if status == "FDP":
-                    message = _("Present")
-
-                work_record.message = message
-                work_record.save()
-
-                message = work_record.message
-                status = work_record.work_record_type
-                if not instance.attendance_clock_out:
-                    status = "FDP"
-                    message = _("Currently working")
-                work_record.message = message
-                work_record.work_record_type = status
-                work_record.save()
-
-    @receiver(pre_delete, sender=Attendance)
-    def attendance_pre_delete(sender, instance, **_kwargs):
-        """
-        Overriding Attendance model delete method
-        """
-        # Perform any actions before deleting the instance
-        # ...
-        WorkRecord.objects.filter(
-            employee_id=instance.employee_id,
-            is_attendance_record=True,
-            date=instance.attendance_date,
-        ).delete()
-
-
-if apps.is_installed("leave"):
-    from leave.models import LeaveRequest
-
-    class OverrideLeaveRequest(LeaveRequest):
-        """
-        Class to override Attendance model save method
-        """
-
-        # Additional fields and methods specific to AnotherModel
-        @receiver(pre_save, sender=LeaveRequest)
-        def leaverequest_pre_save(sender, instance, **_kwargs):
-            """
-            Overriding LeaveRequest model save method
-            """
-            if (
-                instance.start_date == instance.end_date
-                and instance.end_date_breakdown != instance.start_date_breakdown
-            ):
-                instance.end_date_breakdown = instance.start_date_breakdown
-                super(LeaveRequest, instance).save()
-
-            period_dates = get_date_range(instance.start_date, instance.end_date)
-            if instance.status == "approved":
-                for date in period_dates:
-                    try:
-                        work_entry = (
-                            WorkRecord.objects.filter(
-                                date=date,
-                                employee_id=instance.employee_id,
-                            )
-                            if WorkRecord.objects.filter(
-                                date=date,
-                                employee_id=instance.employee_id,
-                            ).exists()
-                            else WorkRecord()
-                        )
-                        work_entry.employee_id = instance.employee_id
-                        work_entry.is_leave_record = True
-                        work_entry.day_percentage = (
-                            0.50
-                            if instance.start_date == date
-                            and instance.start_date_breakdown == "first_half"
-                            or instance.end_date == date
-                            and instance.end_date_breakdown == "second_half"
-                            else 0.00
-                        )
-                        # scheduler task to validate the conflict entry for half day if they
-                        # take half day leave is when they mark the attendance.
-                        status = (
-                            "CONF"
-                            if instance.start_date == date
-                            and instance.start_date_breakdown == "first_half"
-                            or instance.end_date == date
-                            and instance.end_date_breakdown == "second_half"
-                            else "ABS"
-                        )
-                        work_entry.work_record_type = status
-                        work_entry.date = date
-                        work_entry.message = (
-                            "Absent"
-                            if status == "ABS"
-                            else _("Half day Attendance need to validate")
-                        )
-                        work_entry.save()
-                    except:
-                        pass
-
-            else:
-                for date in period_dates:
-                    WorkRecord.objects.filter(
-                        is_leave_record=True,
-                        date=date,
-                        employee_id=instance.employee_id,
-                    ).delete()
-
-
 class OverrideWorkInfo(EmployeeWorkInformation):
     """
     This class is to override the Model default methods
@@ -1461,6 +1292,16 @@ class Payslip(HorillaModel):
         ]
 
 
+@receiver(post_delete, sender=Payslip)
+def payslip_post_delete(sender, instance, **kwargs):
+    """
+    Remove the stored PDFs of the deleted payslip
+    """
+    from payroll.methods.payslip_pdf import delete_payslip_pdfs
+
+    delete_payslip_pdfs(instance.id)
+
+
 class LoanAccount(HorillaModel):
     """
     This modal is used to store the loan Account details
@@ -2014,3 +1855,49 @@ class PayslipAutoGenerate(models.Model):
 
     def __str__(self) -> str:
         return f"{self.generate_day} | {self.company_id} "
+
+
+class PayrollRun(models.Model):
+    """
+    Model to track the progress of a payslip generation computed in worker
+    processes
+    """
+
+    status_choices = [
+        ("queued", _("Queued")),
+        ("running", _("Running")),
+        ("completed", _("Completed")),
+        ("failed", _("Failed")),
+    ]
+    group_name = models.CharField(
+        max_length=50, null=True, blank=True, verbose_name=_("Batch name")
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(max_length=20, choices=status_choices, default="queued")
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    generated = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # last progress of the run, see payroll.methods.payroll_run
+    updated_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ["-id"]
+
+    def progress(self):
+        """
+        Percentage of the employees processed
+        """
+        if not self.total:
+            return 100 if self.status == "completed" else 0
+        return round(self.processed * 100 / self.total)
+
+    def __str__(self) -> str:
+        return f"{self.group_name} | {self.start_date} - {self.end_date}"
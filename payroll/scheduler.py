@@ -4,18 +4,17 @@ scheduler.py
 This module is used to register scheduled tasks
 """
 
-import json
 from datetime import date, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from dateutil.relativedelta import relativedelta
 
-from payroll.methods.methods import calculate_employer_contribution, save_payslip
-from payroll.views.component_views import payroll_calculation
+from horilla.horilla_scheduler import scheduled_job
+from payroll.methods.bulk_payroll import generate_bulk_payslips
 
 from .models.models import Contract, Payslip
 
 
+@scheduled_job("interval", hours=4)
 def expire_contract():
     """
     Finds all active contracts whose end date is earlier than the current date
@@ -55,36 +54,14 @@ def generate_payslip(date, companies, all):
     # find the date range
     start_date = date - relativedelta(months=1)
     end_date = date - timedelta(days=1)
+    # Skip the employees already having a payslip for the period
+    active_employees = active_employees.exclude(
+        id__in=Payslip.objects.filter(
+            start_date__range=(start_date, end_date), end_date=end_date
+        ).values("employee_id")
+    )
     # Payslip creation
-    for employee in active_employees:
-        payslip = Payslip.objects.filter(
-            employee_id=employee, start_date=start_date, end_date=end_date
-        ).first()
-        if payslip:
-            continue
-        contract = Contract.objects.filter(
-            employee_id=employee, contract_status="active"
-        ).first()
-        if end_date < contract.contract_start_date:
-            continue
-        if start_date < contract.contract_start_date:
-            start_date = contract.contract_start_date
-        payslip_data = payroll_calculation(employee, start_date, end_date)
-        payslip_data["payslip"] = payslip
-        data = {}
-        data["employee"] = employee
-        data["start_date"] = payslip_data["start_date"]
-        data["end_date"] = payslip_data["end_date"]
-        data["status"] = "draft"
-        data["contract_wage"] = payslip_data["contract_wage"]
-        data["basic_pay"] = payslip_data["basic_pay"]
-        data["gross_pay"] = payslip_data["gross_pay"]
-        data["deduction"] = payslip_data["total_deductions"]
-        data["net_pay"] = payslip_data["net_pay"]
-        data["pay_data"] = json.loads(payslip_data["json_data"])
-        calculate_employer_contribution(data)
-        data["installments"] = payslip_data["installments"]
-        payslip_data["instance"] = save_payslip(**data)
+    generate_bulk_payslips(active_employees, start_date, end_date)
 
 
 def is_last_day_of_month(date):
@@ -92,6 +69,7 @@ def is_last_day_of_month(date):
     return next_day.month != date.month
 
 
+@scheduled_job("interval", hours=3, run_on_start=True)
 def auto_payslip_generate():
     """
     Generating payslips for active contract employees
@@ -135,9 +113,3 @@ def auto_payslip_generate():
                 )
             else:
                 generate_payslip(date=date.today(), companies=companies, all=False)
-
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(expire_contract, "interval", hours=4)
-scheduler.add_job(auto_payslip_generate, "interval", hours=3)
-scheduler.start()
@@ -1,5 +1,278 @@
 """test cases"""
 
+import json
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+from attendance.models import Attendance
+from base.models import Department, EmployeeShift
+from employee.models import Employee
+from leave.models import LeaveRequest, LeaveType
+from payroll.methods.bulk_payroll import generate_bulk_payslips
+from payroll.methods.methods import calculate_employer_contribution
+from payroll.models.models import (
+    Allowance,
+    Contract,
+    Deduction,
+    FilingStatus,
+    MultipleCondition,
+)
+from payroll.models.tax_models import TaxBracket
+from payroll.views.component_views import payroll_calculation
+
+
+def create(model, **fields):
+    instance = model(**fields)
+    instance.save()
+    return instance
+
+
+class BulkPayslipTests(TestCase):
+    """
+    The bulk payroll run computes the same payslips as the per employee
+    calculation
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = create(Department, department="Dev")
+        shift = create(EmployeeShift, employee_shift="Day")
+        filing_status = FilingStatus.objects.create(
+            filing_status="single", based_on="taxable_gross_pay"
+        )
+        TaxBracket.objects.create(
+            filing_status_id=filing_status, min_income=0, max_income=10000, tax_rate=5
+        )
+        TaxBracket.objects.create(
+            filing_status_id=filing_status,
+            min_income=10000,
+            max_income=1e12,
+            tax_rate=10,
+        )
+        paid = LeaveType.objects.create(name="Paid", payment="paid")
+        unpaid = LeaveType.objects.create(name="Unpaid", payment="unpaid")
+
+        cls.employees = []
+        for index in range(8):
+            employee = Employee(
+                employee_first_name=f"Employee {index}",
+                email=f"employee{index}@example.com",
+                phone="1234567890",
+                children=index % 3,
+            )
+            employee.save()
+            work_info = employee.employee_work_info
+            work_info.department_id = department if index % 2 else None
+            work_info.shift_id = shift
+            work_info.save()
+            Contract.objects.create(
+                contract_name="Contract",
+                employee_id=employee,
+                contract_start_date=(
+                    date(2024, 3, 10) if index == 5 else date(2024, 1, 1)
+                ),
+                wage=30000 + index * 100,
+                wage_type="monthly",
+                contract_status="active",
+                filing_status=filing_status if index % 2 else None,
+                deduct_leave_from_basic_pay=bool(index % 3),
+                calculate_daily_leave_amount=bool(index % 4),
+            )
+            cls.employees.append(employee)
+
+        leave_requests = []
+        for employee in cls.employees[::3]:
+            leave_requests += [
+                LeaveRequest(
+                    employee_id=employee,
+                    leave_type_id=unpaid,
+                    start_date=date(2024, 3, 5),
+                    end_date=date(2024, 3, 7),
+                    status="approved",
+                    start_date_breakdown="second_half",
+                    end_date_breakdown="full_day",
+                    requested_days=3,
+                    description="Leave",
+                ),
+                LeaveRequest(
+                    employee_id=employee,
+                    leave_type_id=paid,
+                    start_date=date(2024, 3, 12),
+                    end_date=date(2024, 3, 12),
+                    status="approved",
+                    start_date_breakdown="full_day",
+                    end_date_breakdown="full_day",
+                    requested_days=1,
+                    description="Leave",
+                ),
+            ]
+        LeaveRequest.objects.bulk_create(leave_requests)
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    employee_id=employee,
+                    attendance_date=date(2024, 3, day),
+                    shift_id=shift,
+                    attendance_validated=bool(day % 3),
+                    attendance_overtime_approve=day % 5 == 0,
+                    at_work_second=30000,
+                    overtime_second=3600,
+                    minimum_hour="08:00",
+                    attendance_worked_hour="08:20",
+                )
+                for employee in cls.employees
+                for day in range(1, 29, 2)
+            ]
+        )
+
+        conditions = {"if_choice": "basic_pay", "if_condition": "gt", "if_amount": 0}
+        fixed = create(
+            Allowance,
+            title="Fixed",
+            is_fixed=True,
+            amount=500,
+            include_active_employees=True,
+            **conditions,
+        )
+        fixed.exclude_employees.add(cls.employees[1])
+        rate = create(
+            Allowance,
+            title="Rate",
+            is_fixed=False,
+            based_on="basic_pay",
+            rate=10,
+            **conditions,
+        )
+        rate.specific_employees.add(*cls.employees[:4])
+        condition_based = create(
+            Allowance,
+            title="Condition",
+            is_fixed=True,
+            amount=100,
+            is_condition_based=True,
+            field="children",
+            condition="equal",
+            value="1",
+            **conditions,
+        )
+        condition_based.other_conditions.add(
+            MultipleCondition.objects.create(
+                field="children", condition="ge", value="0"
+            )
+        )
+        for fields in [
+            {"based_on": "attendance", "per_attendance_fixed_amount": 10},
+            {"based_on": "overtime", "amount_per_one_hr": 20},
+            {
+                "based_on": "shift_id",
+                "shift_id": shift,
+                "shift_per_attendance_amount": 3,
+            },
+            {
+                "based_on": "children",
+                "per_children_fixed_amount": 50,
+                "is_taxable": False,
+            },
+        ]:
+            create(
+                Allowance,
+                title=fields["based_on"],
+                is_fixed=False,
+                include_active_employees=True,
+                **fields,
+                **conditions,
+            )
+
+        for fields in [
+            {"is_pretax": True, "based_on": "gross_pay", "rate": 6.2},
+            {"is_pretax": False, "based_on": "taxable_gross_pay", "rate": 1.45},
+            {"is_pretax": False, "is_tax": True, "based_on": "basic_pay", "rate": 3},
+            {"is_pretax": False, "based_on": "net_pay", "rate": 2},
+        ]:
+            create(
+                Deduction,
+                title=fields["based_on"],
+                is_fixed=False,
+                employer_rate=fields["rate"],
+                include_active_employees=True,
+                **fields,
+                **conditions,
+            )
+        create(
+            Deduction,
+            title="Department",
+            is_pretax=True,
+            is_fixed=True,
+            amount=77,
+            is_condition_based=True,
+            field="employee_work_info__department_id__department",
+            condition="equal",
+            value="Dev",
+            **conditions,
+        )
+        for one_time_date in [date(2024, 3, 15), date(2024, 1, 15)]:
+            create(
+                Deduction,
+                title="One time",
+                is_pretax=False,
+                is_fixed=True,
+                amount=10,
+                one_time_date=one_time_date,
+                include_active_employees=True,
+                **conditions,
+            )
+        compensation = create(
+            Deduction,
+            title="Compensation",
+            is_fixed=True,
+            amount=100,
+            update_compensation="basic_pay",
+            **conditions,
+        )
+        compensation.specific_employees.add(cls.employees[2], cls.employees[3])
+        installment = create(
+            Deduction,
+            title="Installment",
+            is_pretax=False,
+            is_fixed=True,
+            amount=33,
+            is_installment=True,
+            **conditions,
+        )
+        installment.specific_employees.add(cls.employees[4])
+
+    def test_bulk_payslips_match_the_employee_calculation(self):
+        start_date, end_date = date(2024, 3, 1), date(2024, 3, 31)
+        expected = {}
+        for employee in self.employees:
+            contract = Contract.objects.get(
+                employee_id=employee, contract_status="active"
+            )
+            payslip = payroll_calculation(
+                employee, max(start_date, contract.contract_start_date), end_date
+            )
+            pay_data = {"pay_data": json.loads(payslip["json_data"])}
+            calculate_employer_contribution(pay_data)
+            expected[employee.pk] = (
+                pay_data["pay_data"],
+                sorted(installment.pk for installment in payslip["installments"]),
+            )
+
+        payslips = generate_bulk_payslips(
+            Employee.objects.filter(pk__in=expected), start_date, end_date
+        )
+
+        self.assertEqual(len(payslips), len(self.employees))
+        for payslip in payslips:
+            employee_id = payslip["employee"].pk
+            with self.subTest(employee=employee_id):
+                self.assertEqual(
+                    payslip["instance"].pay_head_data, expected[employee_id][0]
+                )
+                self.assertEqual(
+                    sorted(
+                        payslip["instance"].installment_ids.values_list("pk", flat=True)
+                    ),
+                    expected[employee_id][1],
+                )
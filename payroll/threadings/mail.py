@@ -5,34 +5,40 @@ This module is used handle mail sent in thread
 """
 
 import logging
-from threading import Thread
 
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
 from base.backends import ConfiguredEmailBackend
 from employee.models import EmployeeWorkInformation
+from horilla.horilla_tasks import BackgroundTask
+from payroll.methods.payslip_pdf import (
+    payslip_queryset,
+    render_payslip_pdfs,
+    shared_context,
+)
 from payroll.models.models import Payslip
-from payroll.views.views import payslip_pdf
 
 logger = logging.getLogger(__name__)
 
 
-class MailSendThread(Thread):
+class MailSendThread(BackgroundTask):
     """
     MailSend
     """
 
     def __init__(self, request, result_dict, ids):
-        Thread.__init__(self)
         self.result_dict = result_dict
         self.ids = ids
         self.request = request
         self.host = request.get_host()
         self.protocol = "https" if request.is_secure() else "http"
+        self.shared = shared_context(request)
 
     def run(self) -> None:
-        super().run()
+        # the PDFs of all the payslips are converted together, in worker
+        # processes for the large batches
+        pdfs = render_payslip_pdfs(payslip_queryset(self.ids), self.shared)
         for record in list(self.result_dict.values()):
             html_message = render_to_string(
                 "payroll/mail_templates/default.html",
@@ -44,11 +50,13 @@ class MailSendThread(Thread):
             )
             attachments = []
             for instance in record["instances"]:
-                response = payslip_pdf(self.request, instance.id)
+                _payslip, content, _html = pdfs.get(instance.id, (None, None, None))
+                if content is None:
+                    continue
                 attachments.append(
                     (
                         f"{instance.get_payslip_title()}.pdf",
-                        response.content,
+                        content,
                         "application/pdf",
                     )
                 )
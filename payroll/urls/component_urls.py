@@ -65,6 +65,11 @@ urlpatterns = [
     ),
     path("create-payslip", component_views.create_payslip, name="create-payslip"),
     path("generate-payslip", component_views.generate_payslip, name="generate-payslip"),
+    path(
+        "payroll-run-status/<int:run_id>/",
+        component_views.payroll_run_status,
+        name="payroll-run-status",
+    ),
     path(
         "validate-start-date",
         component_views.validate_start_date,
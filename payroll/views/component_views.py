@@ -43,7 +43,7 @@ from horilla.decorators import (
 )
 from horilla.group_by import group_by_queryset
 from horilla.horilla_settings import HORILLA_DATE_FORMATS
-from horilla.methods import dynamic_attr, get_horilla_model_class
+from horilla.methods import get_horilla_model_class
 
 # from leave.models import AvailableLeave
 from notifications.signals import notify
@@ -56,6 +56,7 @@ from payroll.filters import (
     ReimbursementFilter,
 )
 from payroll.forms import component_forms as forms
+from payroll.methods.bulk_payroll import generate_bulk_payslips
 from payroll.methods.deductions import update_compensation_deduction
 from payroll.methods.methods import (
     calculate_employer_contribution,
@@ -63,6 +64,11 @@ from payroll.methods.methods import (
     paginator_qry,
     save_payslip,
 )
+from payroll.methods.payroll_run import (
+    fail_stale_run,
+    start_payroll_run,
+    use_payroll_run,
+)
 from payroll.methods.payslip_calc import (
     calculate_allowance,
     calculate_gross_pay,
@@ -71,12 +77,14 @@ from payroll.methods.payslip_calc import (
     calculate_pre_tax_deduction,
     calculate_tax_deduction,
     calculate_taxable_gross_pay,
+    condition_based_components,
 )
 from payroll.methods.tax_calc import calculate_taxable_amount
 from payroll.models.models import (
     Allowance,
     Deduction,
     LoanAccount,
+    PayrollRun,
     Payslip,
     Reimbursement,
     ReimbursementMultipleAttachment,
@@ -102,7 +110,7 @@ operator_mapping = {
 }
 
 
-def payroll_calculation(employee, start_date, end_date):
+def payroll_calculation(employee, start_date, end_date, prefetch=None):
     """
     Calculate payroll components for the specified employee within the given date range.
 
@@ -111,13 +119,17 @@ def payroll_calculation(employee, start_date, end_date):
         employee (Employee): The employee for whom the payroll is calculated.
         start_date (date): The start date of the payroll period.
         end_date (date): The end date of the payroll period.
+        prefetch (PayrollPrefetch): Optional prefetched payroll data, used by the
+            bulk payroll run instead of querying per employee.
 
 
     Returns:
         dict: A dictionary containing the calculated payroll components:
     """
 
-    basic_pay_details = compute_salary_on_period(employee, start_date, end_date)
+    basic_pay_details = compute_salary_on_period(
+        employee, start_date, end_date, prefetch=prefetch
+    )
     contract = basic_pay_details["contract"]
     contract_wage = basic_pay_details["contract_wage"]
     basic_pay = basic_pay_details["basic_pay"]
@@ -128,7 +140,7 @@ def payroll_calculation(employee, start_date, end_date):
     working_days_details = basic_pay_details["month_data"]
 
     updated_basic_pay_data = update_compensation_deduction(
-        employee, basic_pay, "basic_pay", start_date, end_date
+        employee, basic_pay, "basic_pay", start_date, end_date, prefetch
     )
     basic_pay = updated_basic_pay_data["compensation_amount"]
     basic_pay_deductions = updated_basic_pay_data["deductions"]
@@ -145,6 +157,7 @@ def payroll_calculation(employee, start_date, end_date):
         "end_date": end_date,
         "basic_pay": basic_pay,
         "day_dict": working_days_details,
+        "prefetch": prefetch,
     }
     # basic pay will be basic_pay = basic_pay - update_compensation_amount
     allowances = calculate_allowance(**kwargs)
@@ -156,7 +169,7 @@ def payroll_calculation(employee, start_date, end_date):
     kwargs["total_allowance"] = total_allowance
     gross_pay = calculate_gross_pay(**kwargs)["gross_pay"]
     updated_gross_pay_data = update_compensation_deduction(
-        employee, gross_pay, "gross_pay", start_date, end_date
+        employee, gross_pay, "gross_pay", start_date, end_date, prefetch
     )
     gross_pay = updated_gross_pay_data["compensation_amount"]
     gross_pay_deductions = updated_gross_pay_data["deductions"]
@@ -165,9 +178,14 @@ def payroll_calculation(employee, start_date, end_date):
     pretax_deductions = calculate_pre_tax_deduction(**kwargs)
     post_tax_deductions = calculate_post_tax_deduction(**kwargs)
 
-    installments = (
-        pretax_deductions["installments"] | post_tax_deductions["installments"]
-    )
+    if prefetch is not None:
+        installments = (
+            pretax_deductions["installments"] + post_tax_deductions["installments"]
+        )
+    else:
+        installments = (
+            pretax_deductions["installments"] | post_tax_deductions["installments"]
+        )
 
     taxable_gross_pay = calculate_taxable_gross_pay(**kwargs)
     tax_deductions = calculate_tax_deduction(**kwargs)
@@ -194,7 +212,7 @@ def payroll_calculation(employee, start_date, end_date):
 
     net_pay = (basic_pay + total_allowance) - total_deductions
     updated_net_pay_data = update_compensation_deduction(
-        employee, net_pay, "net_pay", start_date, end_date
+        employee, net_pay, "net_pay", start_date, end_date, prefetch
     )
     net_pay = updated_net_pay_data["compensation_amount"]
     update_net_pay_deductions = updated_net_pay_data["deductions"]
@@ -268,32 +286,9 @@ def allowances_deductions_tab(request, emp_id):
             | Allowance.objects.filter(include_active_employees=True).exclude(
                 exclude_employees=employee
             )
-        )
+        ).distinct()
 
-        for allowance in allowances:
-            applicable = True
-            if allowance.is_condition_based:
-                conditions = list(
-                    allowance.other_conditions.values_list(
-                        "field", "condition", "value"
-                    )
-                )
-                conditions.append(
-                    (
-                        allowance.field,
-                        allowance.condition,
-                        allowance.value.lower().replace(" ", "_"),
-                    )
-                )
-                for field, operator, value in conditions:
-                    val = dynamic_attr(employee, field)
-                    if val is None or not operator_mapping.get(operator)(
-                        val, type(val)(value)
-                    ):
-                        applicable = False
-                        break
-            if applicable:
-                employee_allowances.append(allowance)
+        employee_allowances = condition_based_components(employee, allowances)
         employee_allowances = [
             allowance
             for allowance in employee_allowances
@@ -314,31 +309,8 @@ def allowances_deductions_tab(request, emp_id):
             | Deduction.objects.filter(
                 include_active_employees=True,
             ).exclude(exclude_employees=employee)
-        )
-        for deduction in deductions:
-            applicable = True
-            if deduction.is_condition_based:
-                conditions = list(
-                    deduction.other_conditions.values_list(
-                        "field", "condition", "value"
-                    )
-                )
-                conditions.append(
-                    (
-                        deduction.field,
-                        deduction.condition,
-                        deduction.value.lower().replace(" ", "_"),
-                    )
-                )
-                for field, operator, value in conditions:
-                    val = dynamic_attr(employee, field)
-                    if val is None or not operator_mapping.get(operator)(
-                        val, type(val)(value)
-                    ):
-                        applicable = False
-                        break
-            if applicable:
-                employee_deductions.append(deduction)
+        ).distinct()
+        employee_deductions = condition_based_components(employee, deductions)
 
     allowance_ids = (
         json.dumps([instance.id for instance in employee_deductions])
@@ -699,40 +671,39 @@ def generate_payslip(request):
     if request.method == "POST":
         form = forms.GeneratePayslipForm(request.POST)
         if form.is_valid():
-            instances = []
             employees = form.cleaned_data["employee_id"]
             start_date = form.cleaned_data["start_date"]
             end_date = form.cleaned_data["end_date"]
             group_name = form.cleaned_data["group_name"]
-            for employee in employees:
-                contract = payroll.models.models.Contract.objects.filter(
-                    employee_id=employee, contract_status="active"
-                ).first()
-                if start_date < contract.contract_start_date:
-                    start_date = contract.contract_start_date
-                payslip = payroll_calculation(employee, start_date, end_date)
-                payslips.append(payslip)
+            employee_count = employees.count()
+            if use_payroll_run(employee_count):
+                run = start_payroll_run(
+                    employees,
+                    start_date,
+                    end_date,
+                    group_name=group_name,
+                    user=request.user,
+                )
+                messages.info(
+                    request,
+                    _(
+                        "Generating {count} payslips in the background, they will "
+                        "appear in the batch as they are saved."
+                    ).format(count=employee_count),
+                )
+                return redirect(
+                    f"/payroll/view-payslip?group_by=group_name&active_group={group_name}"
+                    f"&payroll_run={run.id}"
+                )
+            payslips = generate_bulk_payslips(
+                employees, start_date, end_date, group_name=group_name
+            )
+            for payslip in payslips:
                 json_data.append(payslip["json_data"])
-
-                payslip["payslip"] = payslip
-                data = {}
-                data["employee"] = employee
-                data["group_name"] = group_name
-                data["start_date"] = payslip["start_date"]
-                data["end_date"] = payslip["end_date"]
-                data["status"] = "draft"
-                data["contract_wage"] = payslip["contract_wage"]
-                data["basic_pay"] = payslip["basic_pay"]
-                data["gross_pay"] = payslip["gross_pay"]
-                data["deduction"] = payslip["total_deductions"]
-                data["net_pay"] = payslip["net_pay"]
-                data["pay_data"] = json.loads(payslip["json_data"])
-                data["installments"] = payslip["installments"]
-                instance = save_payslip(**data)
-                instances.append(instance)
+                instance = payslip["instance"]
                 notify.send(
                     request.user.employee_get,
-                    recipient=employee.employee_user_id,
+                    recipient=payslip["employee"].employee_user_id,
                     verb="Payslip has been generated for you.",
                     verb_ar="تم إصدار كشف راتب لك.",
                     verb_de="Gehaltsabrechnung wurde für Sie erstellt.",
@@ -743,7 +714,7 @@ def generate_payslip(request):
                     ),
                     icon="close",
                 )
-            messages.success(request, f"{employees.count()} payslip saved as draft")
+            messages.success(request, f"{employee_count} payslip saved as draft")
             return redirect(
                 f"/payroll/view-payslip?group_by=group_name&active_group={group_name}"
             )
@@ -751,6 +722,28 @@ def generate_payslip(request):
     return render(request, "payroll/common/form.html", {"form": form})
 
 
+@login_required
+@permission_required("payroll.add_payslip")
+def payroll_run_status(request, run_id):
+    """
+    Progress of a payslip generation running in the background
+    """
+    run = PayrollRun.objects.filter(id=run_id).first()
+    if run is None:
+        return JsonResponse({"error": "Payroll run not found"}, status=404)
+    run = fail_stale_run(run)
+    return JsonResponse(
+        {
+            "status": run.status,
+            "total": run.total,
+            "processed": run.processed,
+            "generated": run.generated,
+            "progress": run.progress(),
+            "error": run.error,
+        }
+    )
+
+
 @login_required
 @permission_required("payroll.add_payslip")
 def create_payslip(request, new_post_data=None):
@@ -915,6 +908,16 @@ def view_payslip(request):
     previous_data = request.GET.urlencode()
     data_dict = parse_qs(previous_data)
     get_key_instances(Payslip, data_dict)
+    payroll_run = request.GET.get("payroll_run")
+    if (
+        payroll_run
+        and payroll_run.isdigit()
+        and request.user.has_perm("payroll.add_payslip")
+    ):
+        payroll_run = PayrollRun.objects.filter(id=payroll_run).first()
+        payroll_run = fail_stale_run(payroll_run) if payroll_run else None
+    else:
+        payroll_run = None
     return render(
         request,
         "payroll/payslip/view_payslips.html",
@@ -927,6 +930,7 @@ def view_payslip(request):
             "bulk_form": bulk_form,
             "filter_dict": data_dict,
             "gp_fields": PayslipReGroup.fields,
+            "payroll_run": payroll_run,
         },
     )
 
@@ -23,7 +23,6 @@ from base.methods import (
     closest_numbers,
     export_data,
     generate_colors,
-    generate_pdf,
     get_key_instances,
     sortby,
 )
@@ -46,6 +45,11 @@ from payroll.forms.component_forms import (
     PayslipAutoGenerateForm,
 )
 from payroll.methods.methods import paginator_qry, save_payslip
+from payroll.methods.payslip_pdf import (
+    payslip_queryset,
+    render_payslip_pdfs,
+    shared_context,
+)
 from payroll.models.models import (
     Contract,
     FilingStatus,
@@ -1337,75 +1341,30 @@ def equalize_lists_length(allowances, deductions):
 
 
 def payslip_pdf(request, id):
-    payslip = Payslip.objects.get(id=id)
-    if (
+    """
+    Download the PDF of the payslip, converted once and then read from the
+    storage, see payroll.methods.payslip_pdf
+    """
+    payslip = payslip_queryset([id]).first()
+    if payslip is None or not (
         request.user.has_perm("payroll.view_payslip")
         or payslip.employee_id.employee_user_id == request.user
     ):
-        user = request.user
-        employee = user.employee_get
-
-        # Taking the company_name of the user
-        info = EmployeeWorkInformation.objects.filter(employee_id=employee)
-        if info.exists():
-            for data in info:
-                employee_company = data.company_id
-            company_name = Company.objects.filter(company=employee_company)
-            emp_company = company_name.first()
-
-            # Access the date_format attribute directly
-            date_format = (
-                emp_company.date_format
-                if emp_company and emp_company.date_format
-                else "MMM. D, YYYY"
-            )
-        else:
-            date_format = "MMM. D, YYYY"
-
-        data = payslip.pay_head_data
-        start_date_str = data["start_date"]
-        end_date_str = data["end_date"]
-
-        # Convert the string to a datetime.date object
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-
-        # Print the formatted date for each format
-        for format_name, format_string in HORILLA_DATE_FORMATS.items():
-            if format_name == date_format:
-                formatted_start_date = start_date.strftime(format_string)
-
-        for format_name, format_string in HORILLA_DATE_FORMATS.items():
-            if format_name == date_format:
-                formatted_end_date = end_date.strftime(format_string)
+        messages.info(request, "You dont have permission.")
+        previous_url = request.META.get("HTTP_REFERER", "/")
+        return HttpResponse(f'<script>window.location.href = "{previous_url}"</script>')
 
-        data["formatted_start_date"] = formatted_start_date
-        data["formatted_end_date"] = formatted_end_date
-        data["employee"] = payslip.employee_id
-        data["payslip"] = payslip
-        data["json_data"] = data.copy()
-        data["json_data"]["employee"] = payslip.employee_id.id
-        data["json_data"]["payslip"] = payslip.id
-        data["instance"] = payslip
-        data["currency"] = PayrollSettings.objects.first().currency_symbol
-        data["all_deductions"] = []
-        for deduction_list in [
-            data["basic_pay_deductions"],
-            data["gross_pay_deductions"],
-            data["pretax_deductions"],
-            data["post_tax_deductions"],
-            data["tax_deductions"],
-            data["net_deductions"],
-        ]:
-            data["all_deductions"].extend(deduction_list)
-
-        data["all_allowances"] = data["allowances"].copy()
-        equalize_lists_length(data["allowances"], data["all_deductions"])
-        data["zipped_data"] = zip(data["allowances"], data["all_deductions"])
-        data["host"] = request.get_host()
-        data["protocol"] = "https" if request.is_secure() else "http"
-
-    return generate_pdf("payroll/payslip/individual_pdf.html", context=data, html=False)
+    _payslip, content, html = render_payslip_pdfs([payslip], shared_context(request))[
+        payslip.id
+    ]
+    if content is None:
+        return HttpResponse("We had some errors <pre>" + html + "</pre>")
+    response = HttpResponse(content, content_type="application/pdf")
+    response["Content-Disposition"] = (
+        f"attachment; filename={payslip.employee_id}'s payslip for "
+        f"{payslip.pay_head_data.get('range')}.pdf"
+    )
+    return response
 
 
 @login_required
@@ -1,11 +1,12 @@
 from datetime import datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-
+from horilla.horilla_scheduler import scheduled_job
 from notifications.signals import notify
 
 
+@scheduled_job(
+    "cron", hour=8, misfire_grace_time=int(timedelta(days=1).total_seconds())
+)
 def cyclic_feedback_creation():
     from pms.models import Feedback
 
@@ -35,13 +36,3 @@ def cyclic_feedback_creation():
             feedback.save()
 
     return
-
-
-scheduler = BackgroundScheduler()
-cron_trigger = CronTrigger(hour=8)
-grace_time_seconds = int(timedelta(days=1).total_seconds())
-scheduler.add_job(
-    cyclic_feedback_creation, cron_trigger, misfire_grace_time=grace_time_seconds
-)
-
-scheduler.start()
@@ -1 +0,0 @@
-from recruitment import scheduler
@@ -2,17 +2,17 @@ import calendar
 import datetime as dt
 from datetime import datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from dateutil.relativedelta import relativedelta
 
-today = datetime.now()
+from horilla.horilla_scheduler import scheduled_job
 
 
+@scheduled_job("interval", hours=1)
 def recruitment_close():
 
     from recruitment.models import Recruitment
 
-    today_date = today.date()
+    today_date = datetime.now().date()
 
     recruitments = Recruitment.objects.filter(closed=False)
 
@@ -22,9 +22,3 @@ def recruitment_close():
                 rec.closed = True
                 rec.is_published = False
                 rec.save()
-
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(recruitment_close, "interval", hours=1)
-
-scheduler.start()
@@ -20,6 +20,7 @@ from horilla.decorators import (
 )
 from horilla.group_by import group_by_queryset
 from horilla.group_by import group_by_queryset as general_group_by
+from horilla.methods import set_session_value
 from recruitment.filters import (
     CandidateFilter,
     RecruitmentFilter,
@@ -126,9 +127,11 @@ def candidate_search(request):
         template = "candidate/group_by.html"
     else:
         # Store the Candidates in the session
-        request.session["filtered_candidates"] = [
-            candidate.id for candidate in candidates
-        ]
+        set_session_value(
+            request.session,
+            "filtered_candidates",
+            [candidate.id for candidate in candidates],
+        )
 
     candidates = paginator_qry(candidates, request.GET.get("page"))
 
@@ -54,6 +54,7 @@ from horilla.decorators import (
     permission_required,
 )
 from horilla.group_by import group_by_queryset
+from horilla.methods import set_session_value
 from notifications.signals import notify
 from recruitment.decorators import manager_can_enter, recruitment_manager_can_enter
 from recruitment.filters import (
@@ -1340,7 +1341,11 @@ def candidate_view(request):
     get_key_instances(Candidate, data_dict)
 
     # Store the candidates in the session
-    request.session["filtered_candidates"] = [candidate.id for candidate in candidates]
+    set_session_value(
+        request.session,
+        "filtered_candidates",
+        [candidate.id for candidate in candidates],
+    )
 
     return render(
         request,